@@ -13,6 +13,9 @@ load_dotenv()
 
 from phage_catalogue.model.specimens import *
 from phage_catalogue.model.uploads import *
+from phage_catalogue.model.request_profiles import RequestProfile
+from phage_catalogue.model.cache import CacheGeneration
+from phage_catalogue.model.statistics import SpecimenStatistic
 from phage_catalogue.model.specimens_audit import SpecimenAudit, BacteriumAudit, PhageAudit
 
 # this is the Alembic Config object, which provides
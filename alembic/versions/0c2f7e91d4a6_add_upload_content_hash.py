@@ -0,0 +1,28 @@
+"""Add Upload content hash
+
+Revision ID: 0c2f7e91d4a6
+Revises: b83c0d5f2a91
+Create Date: 2026-10-19 19:02:15.407233
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0c2f7e91d4a6'
+down_revision = 'b83c0d5f2a91'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('upload', sa.Column('content_hash', sa.String(length=64), nullable=True))
+    op.add_column('upload', sa.Column('file_removed_date', sa.DateTime(), nullable=True))
+    op.create_index(op.f('ix_upload_content_hash'), 'upload', ['content_hash'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_upload_content_hash'), table_name='upload')
+    op.drop_column('upload', 'file_removed_date')
+    op.drop_column('upload', 'content_hash')
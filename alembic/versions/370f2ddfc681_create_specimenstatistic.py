@@ -0,0 +1,67 @@
+"""Create SpecimenStatistic
+
+Revision ID: 370f2ddfc681
+Revises: 4384e59b7878
+Create Date: 2026-10-19 12:40:51.204877
+
+Populates the statistics from the existing specimens, grouping them
+in the database in the same way as statistics_rebuild.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '370f2ddfc681'
+down_revision = '4384e59b7878'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    specimen_statistic = op.create_table('specimen_statistic',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('dimension', sa.String(length=20), nullable=False),
+    sa.Column('type', sa.String(length=20), nullable=False),
+    sa.Column('value', sa.String(length=100), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('dimension', 'type', 'value', name='uq__specimen_statistic__dimension_type_value')
+    )
+
+    specimen = sa.table('specimen',
+        sa.column('type', sa.String),
+        sa.column('species_id', sa.Integer),
+        sa.column('host_id', sa.Integer),
+        sa.column('project_id', sa.Integer),
+        sa.column('freezer', sa.Integer),
+        sa.column('sample_date', sa.Date),
+    )
+
+    dimensions = [
+        ('type', specimen.c.type, None),
+        ('species', sa.cast(specimen.c.species_id, sa.String), specimen.c.species_id.is_not(None)),
+        ('host', sa.cast(specimen.c.host_id, sa.String), specimen.c.host_id.is_not(None)),
+        ('project', sa.cast(specimen.c.project_id, sa.String), specimen.c.project_id.is_not(None)),
+        ('freezer', sa.cast(specimen.c.freezer, sa.String), specimen.c.freezer.is_not(None)),
+        # The first 7 characters of an ISO date are the year and month
+        ('month', sa.func.substr(sa.cast(specimen.c.sample_date, sa.String), 1, 7), specimen.c.sample_date.is_not(None)),
+    ]
+
+    for dimension, value, where in dimensions:
+        q = sa.select(
+            sa.literal(dimension),
+            specimen.c.type,
+            value,
+            sa.func.count(),
+        ).group_by(specimen.c.type, value)
+
+        if where is not None:
+            q = q.where(where)
+
+        op.execute(sa.insert(specimen_statistic).from_select(['dimension', 'type', 'value', 'count'], q))
+
+
+def downgrade() -> None:
+    op.drop_table('specimen_statistic')
@@ -0,0 +1,29 @@
+"""Create CacheGeneration
+
+Revision ID: 4384e59b7878
+Revises: c3c4e1c69b28
+Create Date: 2026-10-19 11:24:03.871266
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4384e59b7878'
+down_revision = 'c3c4e1c69b28'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    cache_generation = op.create_table('cache_generation',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('value', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.bulk_insert(cache_generation, [{'name': 'specimens', 'value': 0}])
+
+
+def downgrade() -> None:
+    op.drop_table('cache_generation')
@@ -0,0 +1,96 @@
+"""Create UploadError
+
+Revision ID: 4a013bbb19a7
+Revises: 370f2ddfc681
+Create Date: 2026-10-19 14:05:37.418260
+
+Moves the errors of existing uploads from upload.errors into the
+upload_error table, one row per message.  The downgrade copies them
+back, one line per message.
+
+"""
+import re
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4a013bbb19a7'
+down_revision = '370f2ddfc681'
+branch_labels = None
+depends_on = None
+
+
+ROW_MESSAGE = re.compile(r'^Row (\d+): (.*)$')
+
+
+def upgrade() -> None:
+    upload_error = op.create_table('upload_error',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('upload_id', sa.Integer(), nullable=False),
+    sa.Column('row', sa.Integer(), nullable=True),
+    sa.Column('column', sa.String(length=100), nullable=True),
+    sa.Column('type', sa.String(length=50), nullable=False),
+    sa.Column('message', sa.Text(), nullable=False),
+    sa.ForeignKeyConstraint(['upload_id'], ['upload.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_upload_error_upload_id'), 'upload_error', ['upload_id'], unique=False)
+    op.add_column('upload', sa.Column('error_count', sa.Integer(), nullable=False, server_default='0'))
+
+    conn = op.get_bind()
+
+    for id, errors in conn.execute(sa.text("SELECT id, errors FROM upload WHERE errors <> ''")):
+        messages = []
+
+        for line in errors.splitlines():
+            if not line.strip():
+                continue
+
+            if m := ROW_MESSAGE.match(line):
+                messages.append({'upload_id': id, 'row': int(m.group(1)), 'type': 'Error', 'message': m.group(2)})
+            else:
+                messages.append({'upload_id': id, 'row': None, 'type': 'Error', 'message': line})
+
+        if messages:
+            conn.execute(sa.insert(upload_error), messages)
+            conn.execute(
+                sa.text("UPDATE upload SET error_count = :error_count WHERE id = :id"),
+                {'error_count': len(messages), 'id': id},
+            )
+
+    op.drop_column('upload', 'errors')
+
+
+def downgrade() -> None:
+    op.add_column('upload', sa.Column('errors', sa.Text(), nullable=True))
+
+    conn = op.get_bind()
+
+    upload_error = sa.table('upload_error',
+        sa.column('id'),
+        sa.column('upload_id'),
+        sa.column('row'),
+        sa.column('message'),
+    )
+
+    messages = {}
+
+    for upload_id, row, message in conn.execute(
+        sa.select(upload_error.c.upload_id, upload_error.c.row, upload_error.c.message)
+        .order_by(upload_error.c.upload_id, upload_error.c.id)
+    ):
+        messages.setdefault(upload_id, []).append(message if row is None else f"Row {row}: {message}")
+
+    for upload_id, lines in messages.items():
+        conn.execute(
+            sa.text("UPDATE upload SET errors = :errors WHERE id = :id"),
+            {'errors': '\n'.join(lines), 'id': upload_id},
+        )
+
+    conn.execute(sa.text("UPDATE upload SET errors = '' WHERE errors IS NULL"))
+    op.alter_column('upload', 'errors', existing_type=sa.Text(), nullable=False)
+
+    op.drop_column('upload', 'error_count')
+    op.drop_index(op.f('ix_upload_error_upload_id'), table_name='upload_error')
+    op.drop_table('upload_error')
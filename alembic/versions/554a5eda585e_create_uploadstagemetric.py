@@ -0,0 +1,38 @@
+"""Create UploadStageMetric
+
+Revision ID: 554a5eda585e
+Revises: fd4e64c71b1e
+Create Date: 2026-10-19 16:12:44.250913
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '554a5eda585e'
+down_revision = 'fd4e64c71b1e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('upload_stage_metric',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('upload_id', sa.Integer(), nullable=False),
+    sa.Column('stage', sa.String(length=50), nullable=False),
+    sa.Column('chunk_number', sa.Integer(), nullable=True),
+    sa.Column('duration', sa.Float(), nullable=False),
+    sa.Column('row_count', sa.Integer(), nullable=True),
+    sa.Column('query_count', sa.Integer(), nullable=False),
+    sa.Column('peak_memory', sa.Integer(), nullable=True),
+    sa.Column('created_date', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['upload_id'], ['upload.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_upload_stage_metric_upload_id'), 'upload_stage_metric', ['upload_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_upload_stage_metric_upload_id'), table_name='upload_stage_metric')
+    op.drop_table('upload_stage_metric')
@@ -0,0 +1,24 @@
+"""Add UploadError sheet
+
+Revision ID: 5e8a1b37c9d2
+Revises: 0c2f7e91d4a6
+Create Date: 2026-10-19 19:41:52.830174
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e8a1b37c9d2'
+down_revision = '0c2f7e91d4a6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('upload_error', sa.Column('sheet', sa.String(length=100), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('upload_error', 'sheet')
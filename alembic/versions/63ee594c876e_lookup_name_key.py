@@ -0,0 +1,55 @@
+"""Lookup name key
+
+Revision ID: 63ee594c876e
+Revises: f1470e032c21
+Create Date: 2026-10-19 09:12:40.118520
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '63ee594c876e'
+down_revision = 'f1470e032c21'
+branch_labels = None
+depends_on = None
+
+
+LOOKUP_TABLES = [
+    'bacterial_species',
+    'box_number',
+    'medium',
+    'phage_identifier',
+    'plasmid',
+    'project',
+    'resistance_marker',
+    'staff_member',
+    'storage_method',
+    'strain',
+]
+
+
+def name_key(name):
+    return ' '.join(str(name or '').split()).casefold()
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+
+    for table_name in LOOKUP_TABLES:
+        op.add_column(table_name, sa.Column('name_key', sa.String(length=100), nullable=True))
+
+        table = sa.table(table_name, sa.column('id', sa.Integer), sa.column('name', sa.String), sa.column('name_key', sa.String))
+
+        for id, name in conn.execute(sa.select(table.c.id, table.c.name)).all():
+            conn.execute(table.update().where(table.c.id == id).values(name_key=name_key(name)))
+
+        op.alter_column(table_name, 'name_key', existing_type=sa.String(length=100), nullable=False)
+        op.create_index(op.f(f'ix_{table_name}_name_key'), table_name, ['name_key'], unique=False)
+
+
+def downgrade() -> None:
+    for table_name in LOOKUP_TABLES:
+        op.drop_index(op.f(f'ix_{table_name}_name_key'), table_name=table_name)
+        op.drop_column(table_name, 'name_key')
@@ -0,0 +1,24 @@
+"""Upload error_count_is_estimate
+
+Revision ID: 749e046e02bd
+Revises: 4a013bbb19a7
+Create Date: 2026-10-19 14:48:12.903716
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '749e046e02bd'
+down_revision = '4a013bbb19a7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('upload', sa.Column('error_count_is_estimate', sa.Boolean(), nullable=False, server_default=sa.false()))
+
+
+def downgrade() -> None:
+    op.drop_column('upload', 'error_count_is_estimate')
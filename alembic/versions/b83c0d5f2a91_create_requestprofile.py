@@ -0,0 +1,39 @@
+"""Create RequestProfile
+
+Revision ID: b83c0d5f2a91
+Revises: 554a5eda585e
+Create Date: 2026-10-19 18:20:37.118406
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b83c0d5f2a91'
+down_revision = '554a5eda585e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('request_profile',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('method', sa.String(length=10), nullable=False),
+    sa.Column('url', sa.String(length=2000), nullable=False),
+    sa.Column('endpoint', sa.String(length=100), nullable=True),
+    sa.Column('status_code', sa.Integer(), nullable=False),
+    sa.Column('duration', sa.Float(), nullable=False),
+    sa.Column('query_count', sa.Integer(), nullable=False),
+    sa.Column('query_duration', sa.Float(), nullable=False),
+    sa.Column('report', sa.Text(length=16777215), nullable=False),
+    sa.Column('created_by', sa.String(length=500), nullable=False),
+    sa.Column('created_date', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_request_profile_created_date'), 'request_profile', ['created_date'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_request_profile_created_date'), table_name='request_profile')
+    op.drop_table('request_profile')
@@ -0,0 +1,38 @@
+"""Create LookupMerge
+
+Revision ID: c3c4e1c69b28
+Revises: 63ee594c876e
+Create Date: 2026-10-19 10:02:17.530194
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3c4e1c69b28'
+down_revision = '63ee594c876e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('lookup_merge',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('lookup_type', sa.String(length=100), nullable=False),
+    sa.Column('target_id', sa.Integer(), nullable=False),
+    sa.Column('target_name', sa.String(length=100), nullable=False),
+    sa.Column('merged_names', sa.Text(), nullable=False),
+    sa.Column('reference_count', sa.Integer(), nullable=False),
+    sa.Column('last_update_date', sa.DateTime(), nullable=False),
+    sa.Column('created_date', sa.DateTime(), nullable=False),
+    sa.Column('last_update_by', sa.String(length=200), nullable=False),
+    sa.Column('created_by', sa.String(length=200), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_lookup_merge_lookup_type'), 'lookup_merge', ['lookup_type'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_lookup_merge_lookup_type'), table_name='lookup_merge')
+    op.drop_table('lookup_merge')
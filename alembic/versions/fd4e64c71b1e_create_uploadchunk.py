@@ -0,0 +1,36 @@
+"""Create UploadChunk
+
+Revision ID: fd4e64c71b1e
+Revises: 749e046e02bd
+Create Date: 2026-10-19 15:31:08.662514
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'fd4e64c71b1e'
+down_revision = '749e046e02bd'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('upload_chunk',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('upload_id', sa.Integer(), nullable=False),
+    sa.Column('number', sa.Integer(), nullable=False),
+    sa.Column('first_row', sa.Integer(), nullable=False),
+    sa.Column('last_row', sa.Integer(), nullable=False),
+    sa.Column('completed_date', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['upload_id'], ['upload.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('upload_id', 'number', name='uq__upload_chunk__upload_id_number')
+    )
+    op.create_index(op.f('ix_upload_chunk_upload_id'), 'upload_chunk', ['upload_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_upload_chunk_upload_id'), table_name='upload_chunk')
+    op.drop_table('upload_chunk')
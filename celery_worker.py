@@ -16,5 +16,22 @@ application.app_context().push()
 
 application.config['SERVER_NAME'] = os.environ["CELERY_SERVER_NAME"]
 
+if application.config['WORKER_METRICS_PORT']:
+    from celery.signals import task_postrun, worker_process_shutdown
+    from phage_catalogue.metrics import enable_multiprocess_metrics, start_metrics_server, write_process_metrics
+
+    # Tasks are run by the pool's child processes, so they write
+    # their metrics for this process's metrics server to add up
+    enable_multiprocess_metrics(application.config['WORKER_METRICS_DIRECTORY'])
+    start_metrics_server(application, application.config['WORKER_METRICS_PORT'])
+
+    @task_postrun.connect
+    def _write_task_metrics(**kwargs):
+        write_process_metrics()
+
+    @worker_process_shutdown.connect
+    def _write_exiting_metrics(**kwargs):
+        write_process_metrics(exiting=True)
+
 
 from lbrc_flask.celery import celery
\ No newline at end of file
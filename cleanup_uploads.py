@@ -0,0 +1,19 @@
+#!/usr/bin/env python3
+
+from dotenv import load_dotenv
+from lbrc_flask.database import db
+
+# Load environment variables from '.env' file.
+load_dotenv()
+
+from phage_catalogue import create_app
+from phage_catalogue.services.uploads import upload_files_cleanup, upload_files_store_legacy, upload_validation_cache_cleanup
+
+application = create_app()
+application.app_context().push()
+
+print(f"Moved {upload_files_store_legacy()} upload files into the store")
+print(f"Removed the files of {upload_files_cleanup()} expired uploads")
+print(f"Removed {upload_validation_cache_cleanup()} expired validation results")
+
+db.session.close()
@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+
+from getpass import getuser
+from dotenv import load_dotenv
+from lbrc_flask.database import db
+
+# Load environment variables from '.env' file.
+load_dotenv()
+
+from phage_catalogue import create_app
+from phage_catalogue.services.lookups import lookup_classes, lookup_merge_duplicates
+
+application = create_app()
+application.app_context().push()
+
+for cls in lookup_classes():
+    merged = lookup_merge_duplicates(cls, getuser())
+    print(f"{cls.__name__}: merged {merged} duplicates")
+
+db.session.commit()
+
+db.session.close()
@@ -4,6 +4,8 @@ from phage_catalogue.model.security import User
 from .ui import blueprint as ui_blueprint
 from .config import Config
 from .admin import init_admin
+from .metrics import init_metrics
+from .profiling import init_profiling
 from lbrc_flask import init_lbrc_flask, ReverseProxied
 from lbrc_flask.security import init_security, Role
 from lbrc_flask.celery import init_celery
@@ -22,6 +24,8 @@ def create_app(config=Config):
         init_security(app, user_class=User, role_class=Role)
         init_admin(app, TITLE)
         init_celery(app, TITLE)
+        init_metrics(app)
+        init_profiling(app)
 
     app.register_blueprint(ui_blueprint)
 
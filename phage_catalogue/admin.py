@@ -1,6 +1,11 @@
+from flask import Response
+from flask_admin import expose
 from lbrc_flask.database import db
 from lbrc_flask.security import Role, User
 from lbrc_flask.admin import AdminCustomView, init_admin as flask_init_admin
+from markupsafe import Markup
+
+from phage_catalogue.model.request_profiles import RequestProfile
 
 
 
@@ -16,11 +21,32 @@ class UserView(AdminCustomView):
     }
 
 
+class RequestProfileView(AdminCustomView):
+    can_create = False
+    can_edit = False
+    column_list = ["id", "created_date", "created_by", "method", "url", "status_code", "duration", "query_count", "query_duration"]
+    column_default_sort = ("created_date", True)
+    column_formatters = {
+        'id': lambda v, c, m, n: Markup(f'<a href="{v.get_url(".download", id=m.id)}">{m.id}</a>'),
+    }
+
+    @expose("/download/<int:id>")
+    def download(self, id):
+        profile = db.get_or_404(RequestProfile, id)
+
+        return Response(
+            profile.report,
+            mimetype='text/plain',
+            headers={'Content-Disposition': f'attachment; filename={profile.filename}'},
+        )
+
+
 def init_admin(app, title):
     flask_init_admin(
         app,
         title,
         [
             UserView(User, db.session),
+            RequestProfileView(RequestProfile, db.session, name="Request Profiles"),
         ]
     )
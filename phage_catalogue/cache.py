@@ -0,0 +1,143 @@
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from threading import Lock
+from time import monotonic
+from lbrc_flask.database import db
+from sqlalchemy import event, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from phage_catalogue.model.cache import CacheGeneration
+from phage_catalogue.model.lookups import Lookup
+from phage_catalogue.model.specimens import Specimen
+
+
+# All the result caches, so that their hit ratios can be reported
+result_caches = []
+
+# Set while a request is profiled, so that the profile shows the
+# cost of calculating results rather than finding them in a cache
+bypass_result_caches = ContextVar('bypass_result_caches', default=False)
+
+
+class ResultCache():
+    """Small in-process LRU cache of calculated results with a timeout.
+
+    Each web or worker process has its own copy, so the timeout limits
+    how stale a result from another process's changes can be.  Include
+    specimen_generation() in the key for results that must be invalidated
+    as soon as the specimens change.
+    """
+    def __init__(self, name, max_size=128):
+        self.name = name
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._lock = Lock()
+
+        result_caches.append(self)
+
+    def get(self, key, calculate, timeout):
+        if bypass_result_caches.get():
+            return calculate()
+
+        now = monotonic()
+
+        with self._lock:
+            if key in self._items:
+                expires, value = self._items[key]
+
+                if expires > now:
+                    self._items.move_to_end(key)
+                    self.hits += 1
+                    return value
+
+                del self._items[key]
+
+            self.misses += 1
+
+        value = calculate()
+
+        with self._lock:
+            self._items[key] = (now + timeout, value)
+            self._items.move_to_end(key)
+
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+lookup_usage_cache = ResultCache('lookup_usage')
+specimen_facet_cache = ResultCache('specimen_facet', max_size=256)
+specimen_search_cache = ResultCache('specimen_search', max_size=32)
+
+
+def specimen_generation():
+    return db.session.execute(
+        select(CacheGeneration.value).where(CacheGeneration.name == CacheGeneration.GENERATION__SPECIMENS)
+    ).scalar() or 0
+
+
+def mark_specimens_changed(session):
+    """Records that the session has changed specimens, so that the
+    specimen generation is incremented when the session commits.
+
+    Changes made through the ORM are detected automatically, so this is
+    only needed for set-based UPDATEs and DELETEs.
+    """
+    session.info['specimens_changed'] = True
+
+
+@event.listens_for(Session, 'after_flush')
+def _after_flush(session, flush_context):
+    for o in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(o, (Specimen, Lookup)):
+            mark_specimens_changed(session)
+            return
+
+
+@event.listens_for(Session, 'after_commit')
+def _after_commit(session):
+    if session.info.pop('specimens_changed', False):
+        # Incremented in its own short transaction after the commit,
+        # so that concurrent imports do not queue for the row lock.
+        _increment_generation(CacheGeneration.GENERATION__SPECIMENS)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _after_rollback(session):
+    session.info.pop('specimens_changed', None)
+
+
+def _increment_generation(name):
+    increment = (
+        update(CacheGeneration)
+        .where(CacheGeneration.name == name)
+        .values(value=CacheGeneration.value + 1)
+    )
+
+    with _separate_transaction() as conn:
+        if conn.execute(increment).rowcount:
+            return
+
+        try:
+            with conn.begin_nested():
+                conn.execute(insert(CacheGeneration).values(name=name, value=1))
+        except IntegrityError:
+            conn.execute(increment)
+
+
+@contextmanager
+def _separate_transaction():
+    """Yields a connection in a transaction of its own, which is
+    committed when the block ends.
+    """
+    with db.engine.begin() as conn:
+        yield conn
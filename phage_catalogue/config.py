@@ -10,8 +10,51 @@ from lbrc_flask.config import BaseConfig, BaseTestConfig
 class ConfigMixin:
     FILE_UPLOAD_DIRECTORY = Path(os.environ["FILE_UPLOAD_DIRECTORY"])
 
+    # Upload validation
+    UPLOAD_VALIDATION_CHUNK_SIZE = int(os.environ.get("UPLOAD_VALIDATION_CHUNK_SIZE", 5000))
+    UPLOAD_VALIDATION_PROCESSES = int(os.environ.get("UPLOAD_VALIDATION_PROCESSES", os.cpu_count() or 1))
+    # Validation stops once this many errors are found (0 for no limit)
+    UPLOAD_VALIDATION_MAX_ERRORS = int(os.environ.get("UPLOAD_VALIDATION_MAX_ERRORS", 1000))
+    # "python" or "columnar", which requires pandas
+    UPLOAD_VALIDATION_ENGINE = os.environ.get("UPLOAD_VALIDATION_ENGINE", "python")
+    # Days that the checked rows of an uploaded file are kept, so that
+    # the same file is not checked again (0 to not keep them)
+    UPLOAD_VALIDATION_CACHE_DAYS = int(os.environ.get("UPLOAD_VALIDATION_CACHE_DAYS", 7))
+
+    # Upload import
+    # Valid uploads are imported in chunks by parallel Celery tasks
+    UPLOAD_IMPORT_ASYNC = os.environ.get("UPLOAD_IMPORT_ASYNC", "True").lower() == "true"
+    UPLOAD_IMPORT_CHUNK_SIZE = int(os.environ.get("UPLOAD_IMPORT_CHUNK_SIZE", 1000))
+
+    # Upload file store
+    UPLOAD_STORE_COMPRESS = os.environ.get("UPLOAD_STORE_COMPRESS", "False").lower() == "true"
+    # Files of uploads older than this are removed by cleanup_uploads.py (0 to keep forever)
+    UPLOAD_RETENTION_DAYS = int(os.environ.get("UPLOAD_RETENTION_DAYS", 0))
+
+    # Caching (timeouts in seconds)
+    LOOKUP_USAGE_CACHE_TIMEOUT = int(os.environ.get("LOOKUP_USAGE_CACHE_TIMEOUT", 300))
+    SPECIMEN_SEARCH_CACHE_TIMEOUT = int(os.environ.get("SPECIMEN_SEARCH_CACHE_TIMEOUT", 60))
+
+    # Bulk changes to more specimens than this are run by the Celery worker
+    SPECIMEN_BULK_BACKGROUND_THRESHOLD = int(os.environ.get("SPECIMEN_BULK_BACKGROUND_THRESHOLD", 5000))
+
+    # Metrics
+    # /metrics is only served to these addresses
+    METRICS_ALLOWED_ADDRESSES = os.environ.get("METRICS_ALLOWED_ADDRESSES", "127.0.0.1,::1").split(",")
+    # Port for the Celery worker's metrics server (0 to disable)
+    WORKER_METRICS_PORT = int(os.environ.get("WORKER_METRICS_PORT", 9101))
+    # Where the Celery worker's processes write their metrics to be added up
+    WORKER_METRICS_DIRECTORY = Path(os.environ.get("WORKER_METRICS_DIRECTORY", FILE_UPLOAD_DIRECTORY / "worker_metrics"))
+    # Trace the memory allocated in each upload stage with tracemalloc,
+    # which is more precise than the peak memory of the process but slower
+    UPLOAD_METRICS_TRACE_MEMORY = os.environ.get("UPLOAD_METRICS_TRACE_MEMORY", "False").lower() == "true"
+
+    # Profiling
+    # Administrators can profile a request by adding the X-Profile header
+    REQUEST_PROFILING_ENABLED = os.environ.get("REQUEST_PROFILING_ENABLED", "True").lower() == "true"
+
 class Config(BaseConfig, ConfigMixin):
     pass
 
 class TestConfig(BaseTestConfig, ConfigMixin):
-    pass
+    UPLOAD_IMPORT_ASYNC = False
@@ -0,0 +1,130 @@
+"""Store of uploaded files, named by the SHA-256 hash of their contents.
+
+Files are kept in a tree of directories named after the first two pairs
+of characters of their hash, for example ab/cd/abcd1234....xlsx, so
+that no directory holds more than a few files however many are stored.
+Identical files are only stored once.  The contents of stored files are
+never changed, but saving a file that is already stored updates its
+modification time, which records when the file was last used.
+
+Files can optionally be compressed with gzip.  Spreadsheets are already
+compressed, so this saves little space for them.
+"""
+import gzip
+import hashlib
+import os
+import shutil
+from contextlib import contextmanager
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from time import time
+from flask import current_app
+
+
+READ_BLOCK_SIZE = 1024 * 1024
+
+COMPRESSED_SUFFIX = '.gz'
+
+
+class FileStore():
+    def __init__(self, directory, compress=False):
+        self.directory = Path(directory)
+        self.compress = compress
+        self.temp_directory = self.directory / 'tmp'
+
+    def _filepath(self, content_hash, suffix, compressed):
+        filename = f"{content_hash}{suffix}{COMPRESSED_SUFFIX if compressed else ''}"
+        return self.directory / content_hash[:2] / content_hash[2:4] / filename
+
+    def filepath(self, content_hash, suffix):
+        """Returns the path of the stored file, which may be compressed,
+        or None if the file is not stored.
+        """
+        for compressed in [self.compress, not self.compress]:
+            result = self._filepath(content_hash, suffix, compressed)
+
+            if result.exists():
+                return result
+
+    def save(self, source, suffix):
+        """Stores the contents of a binary file object and returns
+        their hash.
+        """
+        self.temp_directory.mkdir(parents=True, exist_ok=True)
+
+        content_hash = hashlib.sha256()
+
+        with NamedTemporaryFile(dir=self.temp_directory, delete=False) as temp:
+            try:
+                destination = gzip.GzipFile(fileobj=temp, mode='wb') if self.compress else temp
+
+                while block := source.read(READ_BLOCK_SIZE):
+                    content_hash.update(block)
+                    destination.write(block)
+
+                if self.compress:
+                    destination.close()
+            except Exception:
+                os.unlink(temp.name)
+                raise
+
+        content_hash = content_hash.hexdigest()
+
+        if existing := self.filepath(content_hash, suffix):
+            # Marks the existing file as used, so that it is
+            # not removed before the new upload is saved.
+            os.utime(existing)
+            os.unlink(temp.name)
+        else:
+            result = self._filepath(content_hash, suffix, self.compress)
+            result.parent.mkdir(parents=True, exist_ok=True)
+            os.chmod(temp.name, 0o644)
+            os.replace(temp.name, result)
+
+        return content_hash
+
+    @contextmanager
+    def local_filepath(self, content_hash, suffix):
+        """Yields the path of an uncompressed copy of the stored file"""
+        filepath = self.filepath(content_hash, suffix)
+
+        if filepath is None:
+            raise FileNotFoundError(f"File {content_hash}{suffix} is not stored")
+
+        if filepath.suffix != COMPRESSED_SUFFIX:
+            yield filepath
+            return
+
+        self.temp_directory.mkdir(parents=True, exist_ok=True)
+
+        with NamedTemporaryFile(dir=self.temp_directory, suffix=suffix, delete=False) as temp:
+            with gzip.open(filepath, 'rb') as f:
+                shutil.copyfileobj(f, temp, READ_BLOCK_SIZE)
+
+        try:
+            yield Path(temp.name)
+        finally:
+            os.unlink(temp.name)
+
+    def delete(self, content_hash, suffix, min_age=0):
+        """Removes the stored file, unless it has been saved or used in
+        the last min_age seconds.  Returns whether the file was removed.
+        """
+        filepath = self.filepath(content_hash, suffix)
+
+        if filepath is None:
+            return False
+
+        if filepath.stat().st_mtime > time() - min_age:
+            return False
+
+        filepath.unlink(missing_ok=True)
+
+        return True
+
+
+def upload_file_store():
+    return FileStore(
+        current_app.config["FILE_UPLOAD_DIRECTORY"] / 'store',
+        compress=current_app.config["UPLOAD_STORE_COMPRESS"],
+    )
@@ -0,0 +1,370 @@
+"""Operational metrics in the Prometheus text exposition format.
+
+The format is simple enough to write directly, so the prometheus_client
+package is not needed.  Request latencies, cache hit counts and database
+pool usage are held in memory, so are for the process that serves the
+metrics, unless multiprocess metrics are enabled.  Then each process
+writes its metrics to a file in a shared directory, and the process that
+serves the metrics adds them up.  The upload queue and import throughput
+are read from the database, so are the same whichever process serves them.
+"""
+import json
+import os
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+from time import perf_counter
+from flask import Response, abort, current_app, g, request
+from lbrc_flask.database import db
+from sqlalchemy import func, select
+
+from phage_catalogue.cache import result_caches
+from phage_catalogue.model.uploads import Upload, UploadChunk, UploadStageMetric
+
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Period over which the import rate is calculated
+IMPORT_RATE_PERIOD = timedelta(hours=1)
+
+# Directory that each process writes its metrics to, when
+# multiprocess metrics are enabled
+_multiprocess_directory = None
+
+
+class Histogram():
+    def __init__(self, name, help, label_names, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series = {}
+        self._lock = Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels[n] for n in self.label_names)
+
+        with self._lock:
+            counts, total = self._series.get(key, ([0] * (len(self.buckets) + 1), 0))
+            counts[bisect_left(self.buckets, value)] += 1
+            self._series[key] = (counts, total + value)
+
+    def series(self):
+        """Returns a list of (label values, bucket counts, total) for each
+        series, sorted by the label values.
+        """
+        with self._lock:
+            return [(key, list(counts), total) for key, (counts, total) in sorted(self._series.items())]
+
+    def reset(self):
+        # The lock is replaced as well, as in a forked child
+        # it may have been held by another thread of the parent
+        self._lock = Lock()
+        self._series = {}
+
+    def lines(self, series=None):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+
+        if series is None:
+            series = self.series()
+
+        for key, counts, total in series:
+            labels = dict(zip(self.label_names, key))
+            cumulative = 0
+
+            for bucket, count in zip([*self.buckets, '+Inf'], counts):
+                cumulative += count
+                yield sample(f"{self.name}_bucket", {**labels, 'le': bucket}, cumulative)
+
+            yield sample(f"{self.name}_sum", labels, total)
+            yield sample(f"{self.name}_count", labels, cumulative)
+
+
+request_latency = Histogram(
+    'phage_catalogue_request_duration_seconds',
+    'Time taken to respond to requests',
+    ['endpoint', 'method', 'status'],
+)
+
+
+def sample(name, labels, value):
+    if labels:
+        label_text = ','.join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+        return f"{name}{{{label_text}}} {value}"
+
+    return f"{name} {value}"
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def gauge(name, help, samples, type='gauge'):
+    """Returns the lines for a metric, where samples is a list of
+    (labels, value) tuples.
+    """
+    yield f"# HELP {name} {help}"
+    yield f"# TYPE {name} {type}"
+
+    for labels, value in samples:
+        yield sample(name, labels, value)
+
+
+def db_pool_usage():
+    pool = db.engine.pool
+
+    # Only pools that hold connections, such as QueuePool, can report usage
+    if not hasattr(pool, 'checkedout'):
+        return None
+
+    return {
+        'size': pool.size(),
+        'checked_out': pool.checkedout(),
+        'checked_in': pool.checkedin(),
+        'overflow': max(pool.overflow(), 0),
+    }
+
+
+def db_pool_lines(usage):
+    if usage is None:
+        return
+
+    yield from gauge('phage_catalogue_db_pool_size', 'Number of connections the pool holds', [({}, usage['size'])])
+    yield from gauge('phage_catalogue_db_pool_connections', 'Number of database connections by state', [
+        ({'state': state}, usage[state]) for state in ['checked_out', 'checked_in', 'overflow']
+    ])
+
+
+def upload_queue_lines():
+    awaiting = db.session.execute(
+        select(func.count(Upload.id)).where(Upload.status == Upload.STATUS__AWAITING_PROCESSING)
+    ).scalar()
+
+    pending_chunks = db.session.execute(
+        select(func.count(UploadChunk.id)).where(UploadChunk.completed_date == None)
+    ).scalar()
+
+    rows, duration = db.session.execute(
+        select(func.sum(UploadStageMetric.row_count), func.sum(UploadStageMetric.duration))
+        .where(UploadStageMetric.stage == 'save')
+        .where(UploadStageMetric.created_date >= datetime.now() - IMPORT_RATE_PERIOD)
+    ).one()
+
+    yield from gauge('phage_catalogue_upload_queue_depth', 'Number of uploads awaiting processing', [({}, awaiting)])
+    yield from gauge('phage_catalogue_upload_chunks_pending', 'Number of upload import chunks not yet saved', [({}, pending_chunks)])
+    yield from gauge(
+        'phage_catalogue_upload_import_rows_per_second',
+        'Rows saved per second of chunk saving time over the last hour',
+        [({}, round(rows / duration, 1) if rows and duration else 0)],
+    )
+
+
+def cache_lines(counts):
+    """Returns the lines for the result caches, where counts is a
+    list of (cache name, hits, misses) tuples.
+    """
+    yield from gauge('phage_catalogue_cache_hits_total', 'Number of result cache hits', [
+        ({'cache': name}, hits) for name, hits, misses in counts
+    ], type='counter')
+    yield from gauge('phage_catalogue_cache_misses_total', 'Number of result cache misses', [
+        ({'cache': name}, misses) for name, hits, misses in counts
+    ], type='counter')
+    yield from gauge('phage_catalogue_cache_hit_ratio', 'Proportion of result cache lookups that were hits', [
+        ({'cache': name}, round(hits / (hits + misses), 4) if hits + misses else 0) for name, hits, misses in counts
+    ])
+
+
+def process_metrics(include_db_pool=True):
+    """Returns the metrics held in the memory of this process"""
+    return {
+        'request_latency': request_latency.series(),
+        'caches': [(c.name, c.hits, c.misses) for c in result_caches],
+        'db_pool': db_pool_usage() if include_db_pool else None,
+    }
+
+
+def _reset_process_metrics():
+    request_latency.reset()
+
+    for c in result_caches:
+        c.hits = 0
+        c.misses = 0
+
+
+def enable_multiprocess_metrics(directory):
+    """Serves the metrics of all the processes that write them to the
+    directory, for servers whose work is done by child processes, such as
+    the prefork Celery worker.
+
+    The files of earlier runs are removed, so this must be called before
+    the child processes are started.
+    """
+    global _multiprocess_directory
+
+    directory.mkdir(parents=True, exist_ok=True)
+
+    for p in directory.glob('*.json'):
+        p.unlink(missing_ok=True)
+
+    _multiprocess_directory = directory
+
+
+def write_process_metrics(exiting=False):
+    """Writes the metrics of this process for the process that serves
+    the metrics to add up, if multiprocess metrics are enabled.  The
+    counts of a process are kept after it exits, but not the connections
+    in its database pool, which are closed.
+    """
+    if _multiprocess_directory is None:
+        return
+
+    filepath = _multiprocess_directory / f"{os.getpid()}.json"
+    temp_filepath = filepath.with_suffix('.tmp')
+
+    temp_filepath.write_text(json.dumps(process_metrics(include_db_pool=not exiting)), 'utf8')
+    # Replaced in one step, so that it is never read half written
+    os.replace(temp_filepath, filepath)
+
+
+def collect_metrics():
+    """Returns the metrics of this process or, if multiprocess metrics
+    are enabled, of all the processes added up.
+    """
+    if _multiprocess_directory is None:
+        return process_metrics()
+
+    write_process_metrics()
+
+    series = {}
+    caches = {}
+    db_pool = None
+
+    for p in _multiprocess_directory.glob('*.json'):
+        try:
+            process = json.loads(p.read_text('utf8'))
+        except FileNotFoundError:
+            continue
+
+        for key, counts, total in process['request_latency']:
+            key = tuple(key)
+            merged_counts, merged_total = series.get(key, ([0] * len(counts), 0))
+            series[key] = ([a + b for a, b in zip(merged_counts, counts)], merged_total + total)
+
+        for name, hits, misses in process['caches']:
+            merged_hits, merged_misses = caches.get(name, (0, 0))
+            caches[name] = (merged_hits + hits, merged_misses + misses)
+
+        if usage := process['db_pool']:
+            db_pool = {k: (db_pool or {}).get(k, 0) + v for k, v in usage.items()}
+
+    return {
+        'request_latency': [(key, counts, total) for key, (counts, total) in sorted(series.items())],
+        'caches': [(name, hits, misses) for name, (hits, misses) in sorted(caches.items())],
+        'db_pool': db_pool,
+    }
+
+
+def render_metrics():
+    lines = []
+
+    try:
+        metrics = collect_metrics()
+    except Exception:
+        current_app.logger.exception("Metrics could not be collected")
+        metrics = {'request_latency': [], 'caches': [], 'db_pool': None}
+
+    for collector, args in [
+        (request_latency.lines, [metrics['request_latency']]),
+        (db_pool_lines, [metrics['db_pool']]),
+        (upload_queue_lines, []),
+        (cache_lines, [metrics['caches']]),
+    ]:
+        try:
+            lines.extend(collector(*args))
+        except Exception:
+            # Report the other metrics even if one cannot be collected
+            current_app.logger.exception(f"Metrics collector {collector.__name__} failed")
+
+    return '\n'.join(lines) + '\n'
+
+
+def _after_fork_in_child():
+    # A child starts with a copy of its parent's metrics, which
+    # would be counted twice once the child writes its own
+    if _multiprocess_directory is not None:
+        _reset_process_metrics()
+
+
+os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+def _before_request():
+    g.metrics_request_start = perf_counter()
+
+
+def _after_request(response):
+    if (start := g.pop('metrics_request_start', None)) is not None:
+        request_latency.observe(
+            perf_counter() - start,
+            endpoint=request.endpoint or 'none',
+            method=request.method,
+            status=response.status_code,
+        )
+
+    return response
+
+
+def metrics():
+    # Only serve metrics to local scrapers, and not to
+    # requests passed on by the reverse proxy
+    if request.remote_addr not in current_app.config["METRICS_ALLOWED_ADDRESSES"] or request.headers.get('X-Forwarded-For'):
+        abort(404)
+
+    return Response(render_metrics(), content_type=CONTENT_TYPE)
+
+
+def init_metrics(app):
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.add_url_rule('/metrics', 'metrics', metrics)
+
+
+def start_metrics_server(app, port):
+    """Serves the metrics from a thread in the current process, for
+    processes that do not serve web requests, such as the Celery worker.
+    """
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path != '/metrics':
+                self.send_error(404)
+                return
+
+            with app.app_context():
+                try:
+                    body = render_metrics().encode('utf8')
+                finally:
+                    db.session.remove()
+
+            self.send_response(200)
+            self.send_header('Content-Type', CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    try:
+        server = ThreadingHTTPServer(('127.0.0.1', port), MetricsHandler)
+    except OSError:
+        # For example, when another worker process already has the port
+        app.logger.warning(f"Could not serve metrics on port {port}")
+        return None
+
+    Thread(target=server.serve_forever, name='metrics_server', daemon=True).start()
+
+    return server
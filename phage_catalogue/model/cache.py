@@ -0,0 +1,14 @@
+from lbrc_flask.database import db
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import String
+
+
+class CacheGeneration(db.Model):
+    """Counter that is incremented whenever the data behind a cache
+    changes, so that cached results from any process can be invalidated
+    by including the generation in the cache key.
+    """
+    GENERATION__SPECIMENS = 'specimens'
+
+    name: Mapped[str] = mapped_column(String(50), primary_key=True)
+    value: Mapped[int] = mapped_column(default=0)
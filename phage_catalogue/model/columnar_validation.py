@@ -0,0 +1,108 @@
+"""Columnar validation of the values in upload columns.
+
+The column definitions check each value of a spreadsheet one at a time.
+This engine loads each column into a pandas Series and finds the values
+that the definitions certainly accept - integers, strings that are not
+too long and ISO dates - for the whole column at once, by the type of
+the column's values.  Only the rows
+that have a value that may not be valid are then checked by the column
+definitions, so the error messages are the same as those of the
+python engine.
+
+pandas is not installed by default, so the python engine is used
+unless pandas has been installed.
+"""
+from flask import current_app
+from lbrc_flask.column_data import DateColumnDefinition, IntegerColumnDefinition, StringColumnDefinition
+
+from phage_catalogue.model.spreadsheets import RowsData, record_columns
+
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
+
+ENGINE__PYTHON = 'python'
+ENGINE__COLUMNAR = 'columnar'
+
+INTEGER_PATTERN = r'-?\d+'
+ISO_DATE_PATTERN = r'\d{4}-\d{2}-\d{2}'
+
+
+def validation_engine():
+    engine = current_app.config["UPLOAD_VALIDATION_ENGINE"]
+
+    if engine == ENGINE__COLUMNAR and pd is None:
+        current_app.logger.warning("pandas is not installed, so the python validation engine is used")
+        return ENGINE__PYTHON
+
+    return engine
+
+
+def columnar_validation_errors(definition, spreadsheet):
+    rows = list(spreadsheet.iter_rows())
+    columns = record_columns(rows)
+    suspect = pd.Series(False, index=range(len(rows)))
+
+    for c in definition.column_definition:
+        values = pd.Series(columns.get(c.name, [None] * len(rows)), dtype=object)
+        suspect |= ~_accepted(c, values)
+
+    indexes = suspect[suspect].index.tolist()
+
+    if not indexes:
+        return []
+
+    errors = definition.column_data_validation_errors(
+        RowsData(spreadsheet.get_column_names(), [rows[i] for i in indexes])
+    )
+
+    for e in errors:
+        if e.row is not None:
+            e.row = indexes[e.row - 1] + 1
+
+    return errors
+
+
+def _accepted(column, values):
+    """Returns a boolean Series that is True for each value that the
+    column definition is certain to accept.
+
+    The checks are chosen by the type that pandas infers for the
+    column's values.  Columns that mix types, such as numbers and text,
+    are left to the column definition.
+    """
+    is_null = values.isna()
+    is_valid = pd.Series(False, index=values.index)
+    kind = pd.api.types.infer_dtype(values, skipna=True)
+
+    if kind == 'string':
+        strings = values.astype('string')
+
+    if isinstance(column, IntegerColumnDefinition):
+        if kind == 'integer':
+            is_valid = ~is_null
+        elif kind == 'string':
+            is_valid = strings.str.fullmatch(INTEGER_PATTERN).fillna(False)
+    elif isinstance(column, StringColumnDefinition):
+        if kind == 'string':
+            lengths = strings.str.len()
+            is_valid = ((lengths > 0) & ~strings.str.isspace()).fillna(False)
+
+            if column.max_length:
+                is_valid &= (lengths <= column.max_length).fillna(False)
+    elif isinstance(column, DateColumnDefinition):
+        if kind in ('date', 'datetime'):
+            is_valid = ~is_null
+        elif kind == 'string':
+            is_iso_date = strings.str.fullmatch(ISO_DATE_PATTERN).fillna(False)
+            parsed = pd.to_datetime(strings.where(is_iso_date), format='%Y-%m-%d', errors='coerce')
+            is_valid = parsed.notna()
+
+    if column.allow_null:
+        result = is_null | is_valid
+    else:
+        result = ~is_null & is_valid
+
+    return result.astype(bool)
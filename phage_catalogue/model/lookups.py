@@ -1,12 +1,34 @@
+from lbrc_flask.database import db
 from lbrc_flask.security import AuditMixin
 from lbrc_flask.model import CommonMixin
-from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy import String
+from sqlalchemy.orm import Mapped, mapped_column, validates
+from sqlalchemy import String, Text
+
+
+def lookup_name_key(name):
+    """Returns the key used to match lookup names, ignoring case and whitespace"""
+    return ' '.join(str(name or '').split()).casefold()
 
 
 class Lookup(AuditMixin, CommonMixin):
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column(String(100), index=True, unique=True)
+    name_key: Mapped[str] = mapped_column(String(100), index=True)
+
+    @validates('name')
+    def validate_name(self, key, value):
+        self.name_key = lookup_name_key(value)
+        return value
 
     def __str__(self):
         return self.name
+
+
+class LookupMerge(AuditMixin, CommonMixin, db.Model):
+    """Audit record summarising the merge of one or more lookups into another"""
+    id: Mapped[int] = mapped_column(primary_key=True)
+    lookup_type: Mapped[str] = mapped_column(String(100), index=True)
+    target_id: Mapped[int] = mapped_column()
+    target_name: Mapped[str] = mapped_column(String(100))
+    merged_names: Mapped[str] = mapped_column(Text)
+    reference_count: Mapped[int] = mapped_column()
@@ -0,0 +1,26 @@
+from datetime import datetime
+from lbrc_flask.database import db
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import DateTime, String, Text
+
+
+class RequestProfile(db.Model):
+    """Profile of a single request, recorded when an administrator asks
+    for it, with the SQL statements run by the request.
+    """
+    id: Mapped[int] = mapped_column(primary_key=True)
+    method: Mapped[str] = mapped_column(String(10))
+    url: Mapped[str] = mapped_column(String(2000))
+    endpoint: Mapped[str] = mapped_column(String(100), nullable=True)
+    status_code: Mapped[int] = mapped_column()
+    duration: Mapped[float] = mapped_column()
+    query_count: Mapped[int] = mapped_column()
+    query_duration: Mapped[float] = mapped_column()
+    # Medium text, as the profile report is too long for a MySQL TEXT
+    report: Mapped[str] = mapped_column(Text(16_777_215))
+    created_by: Mapped[str] = mapped_column(String(500))
+    created_date: Mapped[datetime] = mapped_column(DateTime, default=datetime.now, index=True)
+
+    @property
+    def filename(self):
+        return f"profile_{self.id}_{self.created_date:%Y%m%d_%H%M%S}.txt"
@@ -0,0 +1,287 @@
+import codecs
+import csv
+from collections.abc import Mapping
+from copy import copy
+from itertools import batched, chain
+from pathlib import Path
+from lbrc_flask.column_data import ExcelData
+from openpyxl import load_workbook
+
+
+class RowRecord(Mapping):
+    """A row that can be read like a dictionary, but which stores its
+    values in a tuple.  The positions of the fields are held in a
+    dictionary shared by all the rows with the same fields, so a row
+    takes a fraction of the memory of a dictionary of its own.
+
+    position is the (sheet, row) of the row in the file it was read
+    from, where sheet is None unless the row was read from one of
+    several sheets of a workbook.
+    """
+    __slots__ = ('_fields', '_values', 'position')
+
+    def __init__(self, fields, values, position=None):
+        self._fields = fields
+        self._values = values
+        self.position = position
+
+    def __getitem__(self, name):
+        return self._values[self._fields[name]]
+
+    def __contains__(self, name):
+        return name in self._fields
+
+    def __iter__(self):
+        return iter(self._fields)
+
+    def __len__(self):
+        return len(self._fields)
+
+    def __repr__(self):
+        return f"RowRecord({dict(self)!r})"
+
+
+def row_records(rows, sheet=None):
+    """Yields a RowRecord for each dictionary, sharing the field
+    positions between rows that have the same fields.
+
+    Each dictionary is given its position in the rows, numbered from
+    1, on the sheet.  RowRecords are yielded unchanged, so keep their
+    position in the file however the rows have been filtered.
+    """
+    field_positions = {}
+
+    for i, row in enumerate(rows, 1):
+        if isinstance(row, RowRecord):
+            yield row
+            continue
+
+        names = tuple(row)
+
+        if (fields := field_positions.get(names)) is None:
+            fields = field_positions[names] = {n: i for i, n in enumerate(names)}
+
+        yield RowRecord(fields, tuple(row.values()), (sheet, i))
+
+
+def record_columns(records):
+    """Returns a dictionary of each field name to a tuple of the
+    records' values for the field.
+    """
+    records = list(records)
+
+    if not records:
+        return {}
+
+    fields = records[0]._fields
+
+    # Records read from the same sheet share their fields, so their
+    # values can be transposed without looking up each field
+    if all(r._fields is fields for r in records):
+        return dict(zip(fields, zip(*(r._values for r in records))))
+
+    names = dict.fromkeys(chain.from_iterable(records))
+    return {n: tuple(r.get(n) for r in records) for n in names}
+
+
+class RowsData():
+    """Spreadsheet data that has already been read into memory.
+
+    Offers the same ``get_column_names`` and ``iter_rows`` methods as
+    ``ExcelData``, so can be passed to any ``ColumnsDefinition``.  Unlike
+    ``ExcelData`` it can be pickled, so chunks of rows can be sent to
+    other processes.  Rows are held as RowRecords.
+    """
+    def __init__(self, column_names, rows, sheet=None):
+        self.column_names = list(column_names)
+        self.rows = list(row_records(rows, sheet))
+
+    @classmethod
+    def from_spreadsheet(cls, spreadsheet):
+        return cls(spreadsheet.get_column_names(), spreadsheet.iter_rows())
+
+    def get_column_names(self):
+        return self.column_names
+
+    def iter_rows(self):
+        yield from self.rows
+
+    def chunks(self, size):
+        """Yields tuples of (offset, RowsData) for each chunk of `size` rows"""
+        for i, rows in enumerate(batched(self.rows, size)):
+            yield i * size, RowsData(self.column_names, rows)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def located_errors(self, errors):
+        """Returns copies of the validation messages, whose rows are
+        numbered from the first of these rows, with the row and sheet
+        of the row in the file that it was read from.
+        """
+        result = []
+
+        for e in errors:
+            e = copy(e)
+
+            if e.row is not None:
+                sheet, e.row = self.rows[e.row - 1].position
+
+                if sheet is not None:
+                    e.sheet = sheet
+
+            result.append(e)
+
+        return result
+
+
+class WorkbookRows(RowsData):
+    """The rows of several sheets of a workbook, one after the other, so
+    that all the sheets are validated and imported together.  Each row
+    keeps its position on its own sheet.
+    """
+    def __init__(self, sheets):
+        self.sheets = sheets
+
+        column_names = dict.fromkeys(chain.from_iterable(s.column_names for _, s in sheets))
+        super().__init__(column_names, chain.from_iterable(s.rows for _, s in sheets))
+
+
+class CsvData():
+    """Comma or tab separated data, read from a file as it is iterated.
+
+    Offers the same ``get_column_names`` and ``iter_rows`` methods as
+    ``ExcelData``.  The column names are taken from the first line and
+    are lower cased.  Empty values are read as None, in the same way as
+    empty cells in a spreadsheet.
+    """
+    def __init__(self, filepath, delimiter=','):
+        self.filepath = filepath
+        self.delimiter = delimiter
+
+    def _open(self):
+        # utf-8-sig ignores the byte order mark that Excel writes to CSV files
+        return open(self.filepath, newline='', encoding='utf-8-sig')
+
+    def get_column_names(self):
+        with self._open() as f:
+            header = next(csv.reader(f, delimiter=self.delimiter), [])
+
+        return [c.strip().lower() for c in header]
+
+    def iter_rows(self):
+        with self._open() as f:
+            reader = csv.reader(f, delimiter=self.delimiter)
+            column_names = [c.strip().lower() for c in next(reader, [])]
+
+            for values in reader:
+                if not any(values):
+                    continue
+
+                yield {n: (v or None) for n, v in zip(column_names, values)}
+
+
+DELIMITED_SUFFIXES = ('.csv', '.tsv', '.tab')
+
+
+def is_utf8(stream, chunk_size=1024 * 1024):
+    """Returns whether the binary stream can be read as UTF-8, which
+    is the only encoding that CsvData reads.  Excel saves CSV files in
+    the Windows code page unless 'CSV UTF-8' is chosen.
+
+    The stream is returned to its start.
+    """
+    decoder = codecs.getincrementaldecoder('utf-8-sig')()
+
+    try:
+        while chunk := stream.read(chunk_size):
+            decoder.decode(chunk)
+
+        decoder.decode(b'', final=True)
+        return True
+    except UnicodeDecodeError:
+        return False
+    finally:
+        stream.seek(0)
+
+
+def spreadsheet_data(filepath):
+    """Returns the reader for the file, chosen by its extension"""
+    match Path(filepath).suffix.lower():
+        case '.csv':
+            return CsvData(filepath)
+        case '.tsv' | '.tab':
+            return CsvData(filepath, delimiter='\t')
+        case _:
+            return ExcelData(filepath)
+
+
+def _column_name(value):
+    return str(value or '').strip().lower()
+
+
+def workbook_sheet_names(filepath, column_names):
+    """Returns the names of the sheets of the workbook whose first row
+    has all of the column names.
+    """
+    workbook = load_workbook(filepath, read_only=True, data_only=True)
+
+    try:
+        result = []
+
+        for sheet in workbook.worksheets:
+            header = next(sheet.iter_rows(max_row=1, values_only=True), ())
+
+            if set(column_names) <= {_column_name(c) for c in header}:
+                result.append(sheet.title)
+
+        return result
+    finally:
+        workbook.close()
+
+
+def read_workbook_sheets(filepath, sheet_names):
+    """Reads the sheets of the workbook into memory, returning a list of
+    (sheet name, RowsData).  Empty rows are skipped.
+
+    The sheet of each row's position is only recorded when more than
+    one sheet is read, so that the errors of a single sheet are
+    reported in the same way as those of other files.
+    """
+    workbook = load_workbook(filepath, read_only=True, data_only=True)
+
+    try:
+        result = []
+
+        for name in sheet_names:
+            values = workbook[name].iter_rows(values_only=True)
+            header = [_column_name(c) for c in next(values, ())]
+            sheet = name if len(sheet_names) > 1 else None
+
+            result.append((name, RowsData(
+                header,
+                (dict(zip(header, v)) for v in values if any(c is not None for c in v)),
+                sheet=name if len(sheet_names) > 1 else None,
+            )))
+
+        return result
+    finally:
+        workbook.close()
+
+
+def read_rows(filepath, column_names):
+    """Reads the file into memory.
+
+    The sheets of a workbook that have all of the column names are read
+    as WorkbookRows, so that every sheet is imported and other sheets,
+    such as instructions, are ignored.  Workbooks without such a sheet
+    and other files are read by their usual reader, so that the missing
+    columns are reported.
+    """
+    spreadsheet = spreadsheet_data(filepath)
+
+    if isinstance(spreadsheet, ExcelData):
+        if sheet_names := workbook_sheet_names(filepath, column_names):
+            return WorkbookRows(read_workbook_sheets(filepath, sheet_names))
+
+    return RowsData.from_spreadsheet(spreadsheet)
@@ -0,0 +1,27 @@
+from lbrc_flask.database import db
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import String, UniqueConstraint
+
+
+class SpecimenStatistic(db.Model):
+    """Number of specimens of a type with a value for a dimension.
+
+    Maintained incrementally as specimens are saved, so that
+    statistics can be shown without grouping the specimen table.
+    """
+    DIMENSION__TYPE = 'type'
+    DIMENSION__SPECIES = 'species'
+    DIMENSION__HOST = 'host'
+    DIMENSION__PROJECT = 'project'
+    DIMENSION__FREEZER = 'freezer'
+    DIMENSION__MONTH = 'month'
+
+    __table_args__ = (
+        UniqueConstraint('dimension', 'type', 'value', name='uq__specimen_statistic__dimension_type_value'),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    dimension: Mapped[str] = mapped_column(String(20))
+    type: Mapped[str] = mapped_column(String(20))
+    value: Mapped[str] = mapped_column(String(100))
+    count: Mapped[int] = mapped_column(default=0)
@@ -0,0 +1,108 @@
+import resource
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+_current_metrics = ContextVar('upload_metrics', default=None)
+
+
+class UploadStage():
+    def __init__(self, stage, chunk_number=None, row_count=None):
+        self.stage = stage
+        self.chunk_number = chunk_number
+        self.row_count = row_count
+        self.duration = None
+        self.query_count = 0
+        self.peak_memory = None
+
+
+class UploadMetrics():
+    """Records the duration, row count, number of queries and peak memory
+    of each stage of processing an upload.
+
+    Stages are timed using the upload_stage context manager, which does
+    nothing unless it is called while the metrics are being recorded, so
+    the validation code can be timed without being passed the metrics.
+
+    The peak memory of a stage is in kilobytes.  By default it is the
+    peak resident set size of the process when the stage finished, which
+    is cheap to read but only grows when a stage uses more memory than any
+    earlier work in the process.  With trace_memory, it is the most memory
+    allocated by Python while the stage was running, as traced by
+    tracemalloc, which is more precise but slows the processing down.
+    """
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.stages = []
+        self._running = []
+
+    @contextmanager
+    def recording(self):
+        token = _current_metrics.set(self)
+        start_tracing = self.trace_memory and not tracemalloc.is_tracing()
+
+        if start_tracing:
+            tracemalloc.start()
+
+        try:
+            yield self
+        finally:
+            if start_tracing:
+                tracemalloc.stop()
+
+            _current_metrics.reset(token)
+
+    def _query_executed(self):
+        for s in self._running:
+            s.query_count += 1
+
+    def _record_peak_memory(self):
+        """Records the peak memory in each running stage.  When tracing,
+        the traced peak is then reset, so that a stage that starts now
+        only records the memory allocated while it runs.
+        """
+        if not self.trace_memory:
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        elif tracemalloc.is_tracing():
+            peak = tracemalloc.get_traced_memory()[1] // 1024
+            tracemalloc.reset_peak()
+        else:
+            return
+
+        for s in self._running:
+            s.peak_memory = max(s.peak_memory or 0, peak)
+
+
+@contextmanager
+def upload_stage(stage, chunk_number=None, row_count=None):
+    """Times the stage, if upload metrics are being recorded.  Yields an
+    UploadStage, so that the row count can be set within the stage.
+    """
+    s = UploadStage(stage, chunk_number=chunk_number, row_count=row_count)
+    metrics = _current_metrics.get()
+
+    if metrics is None:
+        yield s
+        return
+
+    metrics._record_peak_memory()
+    metrics.stages.append(s)
+    metrics._running.append(s)
+    start = perf_counter()
+
+    try:
+        yield s
+    finally:
+        s.duration = perf_counter() - start
+        metrics._record_peak_memory()
+        metrics._running.remove(s)
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if metrics := _current_metrics.get():
+        metrics._query_executed()
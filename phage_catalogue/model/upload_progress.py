@@ -0,0 +1,111 @@
+import json
+import os
+from time import time
+from flask import current_app
+
+
+class UploadProgress():
+    """Progress of the validation and import of an upload.
+
+    Progress is appended as lines of JSON to a small file beside the
+    uploaded file, so that it can be polled without querying the database.
+    Each line is added by a single append, which is atomic, so the parallel
+    chunk tasks can report their progress without locking.
+
+    The file is deleted once the upload has been processed or has failed,
+    after which the upload's status shows the result.
+    """
+    STAGE__QUEUED = 'Queued'
+    STAGE__VALIDATING = 'Validating'
+    STAGE__IMPORTING = 'Importing'
+    STAGE__PROCESSED = 'Processed'
+    STAGE__ERROR = 'Error'
+
+    FINAL_STAGES = [STAGE__PROCESSED, STAGE__ERROR]
+
+    def __init__(self, upload_id):
+        self.filepath = current_app.config["FILE_UPLOAD_DIRECTORY"] / f"{upload_id}_progress.jsonl"
+
+    def update(self, stage=None, rows_total=None):
+        event = {}
+
+        if stage:
+            event['stage'] = stage
+        if rows_total is not None:
+            event['rows_total'] = rows_total
+
+        self._append(event)
+
+    def add(self, rows_validated=0, rows_saved=0):
+        # Counts reported after the upload has finished are dropped,
+        # rather than recreating the deleted file
+        try:
+            self._append({'rows_validated': rows_validated, 'rows_saved': rows_saved}, create=False)
+        except FileNotFoundError:
+            pass
+
+    def _append(self, event, create=True):
+        event['time'] = time()
+        line = (json.dumps(event) + '\n').encode('utf8')
+
+        flags = os.O_WRONLY | os.O_APPEND
+
+        if create:
+            self.filepath.parent.mkdir(parents=True, exist_ok=True)
+            flags |= os.O_CREAT
+
+        fd = os.open(self.filepath, flags, 0o644)
+        try:
+            os.write(fd, line)
+        finally:
+            os.close(fd)
+
+    def read(self):
+        """Returns a dictionary of the current progress, or None if no
+        progress has been reported.
+        """
+        try:
+            lines = self.filepath.read_text('utf8').splitlines()
+        except FileNotFoundError:
+            return None
+
+        result = {
+            'stage': None,
+            'rows_total': None,
+            'rows_validated': 0,
+            'rows_saved': 0,
+            'rows_per_second': None,
+            'is_final': False,
+        }
+        import_started = None
+        updated = None
+
+        for line in lines:
+            try:
+                event = json.loads(line)
+            except ValueError:
+                # A line that is still being written
+                continue
+
+            if stage := event.get('stage'):
+                result['stage'] = stage
+
+                if stage == UploadProgress.STAGE__IMPORTING:
+                    import_started = event['time']
+
+            if 'rows_total' in event:
+                result['rows_total'] = event['rows_total']
+
+            result['rows_validated'] += event.get('rows_validated', 0)
+            result['rows_saved'] += event.get('rows_saved', 0)
+            updated = event['time']
+
+        if import_started and updated > import_started:
+            result['rows_per_second'] = round(result['rows_saved'] / (updated - import_started))
+
+        result['is_final'] = result['stage'] in UploadProgress.FINAL_STAGES
+
+        return result
+
+    def delete(self):
+        self.filepath.unlink(missing_ok=True)
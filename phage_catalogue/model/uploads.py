@@ -1,14 +1,36 @@
+from contextlib import contextmanager
 from copy import deepcopy
+from datetime import datetime
+from itertools import batched
+from pathlib import Path
+from billiard import Pool
 from flask import current_app
 from lbrc_flask.database import db
 from lbrc_flask.security import AuditMixin
 from lbrc_flask.model import CommonMixin
-from lbrc_flask.column_data import ColumnsDefinition, ExcelData, IntegerColumnDefinition, StringColumnDefinition, DateColumnDefinition, ColumnsDefinitionValidationMessage
+from lbrc_flask.column_data import ColumnsDefinition, IntegerColumnDefinition, StringColumnDefinition, DateColumnDefinition, ColumnsDefinitionValidationMessage
 from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy import String, Text, select
+from sqlalchemy import DateTime, ForeignKey, String, Text, UniqueConstraint, insert, select
 from werkzeug.utils import secure_filename
 
+from phage_catalogue.file_store import upload_file_store
+from phage_catalogue.model.columnar_validation import ENGINE__COLUMNAR, ENGINE__PYTHON, columnar_validation_errors, validation_engine
+from phage_catalogue.model.lookups import lookup_name_key
 from phage_catalogue.model.specimens import BacterialSpecies, Bacterium, Phage, Specimen
+from phage_catalogue.model.spreadsheets import RowsData, WorkbookRows, read_rows, row_records
+from phage_catalogue.model.upload_metrics import upload_stage
+from phage_catalogue.services.species_matcher import bacterial_species_matcher
+from phage_catalogue.validation_cache import upload_validation_cache
+
+
+# Maximum number of values to put in a single SQL IN clause
+IN_CLAUSE_BATCH_SIZE = 1000
+
+# Number of upload errors saved by each INSERT
+ERROR_INSERT_BATCH_SIZE = 1000
+
+# Number of rows translated at once
+TRANSLATE_CHUNK_SIZE = 5000
 
 
 class Upload(AuditMixin, CommonMixin, db.Model):
@@ -25,35 +47,326 @@ class Upload(AuditMixin, CommonMixin, db.Model):
     id: Mapped[int] = mapped_column(primary_key=True)
     filename: Mapped[str] = mapped_column(String(500))
     status: Mapped[str] = mapped_column(String(50), default='')
-    errors: Mapped[str] = mapped_column(Text, default='')
+    error_count: Mapped[int] = mapped_column(default=0)
+    error_count_is_estimate: Mapped[bool] = mapped_column(default=False)
+    # Hash of the uploaded file in the upload file store.  Uploads saved
+    # before the store was used have no hash until they are moved into it.
+    content_hash: Mapped[str] = mapped_column(String(64), nullable=True, index=True)
+    file_removed_date: Mapped[datetime] = mapped_column(DateTime, nullable=True)
 
     @property
-    def local_filepath(self):
+    def legacy_filepath(self):
+        """Where the uploaded file was saved before the upload file store was used"""
         return current_app.config["FILE_UPLOAD_DIRECTORY"] / secure_filename(f"{self.id}_{self.filename}")
 
-    def validate(self):
-        spreadsheet = ExcelData(self.local_filepath)
+    @property
+    def file_suffix(self):
+        return Path(self.filename).suffix.lower()
+
+    def save_file(self, source):
+        self.content_hash = upload_file_store().save(source, self.file_suffix)
+
+    @contextmanager
+    def local_filepath(self):
+        """Yields the path of a local, uncompressed copy of the uploaded file"""
+        if self.content_hash:
+            with upload_file_store().local_filepath(self.content_hash, self.file_suffix) as result:
+                yield result
+        else:
+            yield self.legacy_filepath
+
+    def chunk_filepath(self, chunk_number):
+        """The file holding the translated rows for one import chunk"""
+        return current_app.config["FILE_UPLOAD_DIRECTORY"] / f"{self.id}_chunk_{chunk_number}.pickle"
+
+    def chunk_filepaths(self):
+        return current_app.config["FILE_UPLOAD_DIRECTORY"].glob(f"{self.id}_chunk_*.pickle")
+
+    def spreadsheet(self):
+        """Reads the uploaded spreadsheet into memory, so that it can
+        be validated and translated without reading the file again.
+
+        Every sheet of a workbook that has the columns shared by
+        bacteria and phages is read, so that they are all validated and
+        imported together.
+        """
+        with upload_stage('parse') as stage, self.local_filepath() as filepath:
+            result = read_rows(filepath, SpecimenColumnDefinition().column_names)
+            stage.row_count = len(result)
+
+        return result
+
+    def validate(self, progress=None, spreadsheet=None):
+        """Validates the upload and returns the spreadsheet that was
+        validated, so that it can be translated without reading the
+        file again.
+        """
         upload_column_definition = UploadColumnDefinition()
 
-        errors = upload_column_definition.validation_errors(spreadsheet)
+        budget = ErrorBudget(current_app.config["UPLOAD_VALIDATION_MAX_ERRORS"])
+        cache = upload_validation_cache()
+
+        with upload_stage('validate'):
+            file_validation = self.cached_file_validation(cache, budget, progress)
+            is_cached = file_validation is not None
+
+            if not is_cached:
+                if spreadsheet is None:
+                    spreadsheet = self.spreadsheet()
+
+                file_validation = upload_column_definition.file_validation(spreadsheet, budget, progress)
+
+            errors = upload_column_definition.database_validation_errors(file_validation, budget)
+
+        # Only files that fail the checks against the database are saved,
+        # as they are uploaded again once the missing values have been
+        # added.  Results cut short by the error budget are not saved, as
+        # they would not show the errors that were not looked for.
+        has_database_errors = len(errors) > len(file_validation.all_errors)
+
+        if self.content_hash and not is_cached and file_validation.is_complete and has_database_errors:
+            with upload_stage('save validation cache', row_count=len(file_validation.spreadsheet)):
+                cache.save(self.content_hash, self.file_suffix, file_validation)
 
         if errors:
-            self.errors = "\n".join([e.full_message for e in errors])
+            with upload_stage('save errors', row_count=len(errors)):
+                self.save_errors(budget.sample(errors), upload_column_definition.column_names)
+            self.error_count = budget.estimated_total
+            self.error_count_is_estimate = budget.is_estimate
             self.status = Upload.STATUS__ERROR
 
+        return file_validation.spreadsheet
+
+    def cached_file_validation(self, cache, budget, progress=None):
+        """Returns the FileValidation of the uploaded file from the
+        validation cache, or None if the same file has not been
+        validated before.
+        """
+        if not self.content_hash or not (result := cache.get(self.content_hash, self.file_suffix)):
+            return None
+
+        with upload_stage('read validation cache', row_count=len(result.spreadsheet)):
+            budget.spend(result.all_errors)
+
+            if progress:
+                progress.update(rows_total=len(result.spreadsheet))
+                progress.add(rows_validated=len(result.spreadsheet))
+
+        return result
+
+    def save_errors(self, errors, column_names):
+        """Saves the validation messages to the upload_error table using
+        bulk INSERTs, rather than creating an object for each message.
+        """
+        for batch in batched(errors, ERROR_INSERT_BATCH_SIZE):
+            db.session.execute(insert(UploadError), [
+                {
+                    'upload_id': self.id,
+                    'sheet': getattr(e, 'sheet', None),
+                    'row': e.row,
+                    'column': upload_error_column(e, column_names),
+                    'type': e.type,
+                    'message': e.message,
+                }
+                for e in batch
+            ])
+
+        self.error_count = len(errors)
+
+    @property
+    def error_messages(self):
+        return [e.full_message for e in db.session.execute(
+            select(UploadError)
+            .where(UploadError.upload_id == self.id)
+            .order_by(UploadError.id)
+        ).scalars()]
+
     @property
     def is_error(self):
         return self.status == Upload.STATUS__ERROR
 
-    def bacteria_data(self):
-        spreadsheet = BacteriumFullColumnDefinition()
+    @property
+    def is_awaiting_processing(self):
+        return self.status == Upload.STATUS__AWAITING_PROCESSING
+
+    def bacteria_data(self, spreadsheet=None):
+        if spreadsheet is None:
+            spreadsheet = self.spreadsheet()
+
+        return translated_records(BacteriumFullColumnDefinition(), spreadsheet)
 
-        return spreadsheet.translated_data(ExcelData(self.local_filepath))
+    def phages_data(self, spreadsheet=None):
+        if spreadsheet is None:
+            spreadsheet = self.spreadsheet()
 
-    def phages_data(self):
-        spreadsheet = PhageFullColumnDefinition()
+        return translated_records(PhageFullColumnDefinition(), spreadsheet)
 
-        return spreadsheet.translated_data(ExcelData(self.local_filepath))
+
+def translated_records(definition, spreadsheet):
+    """Yields the translated rows of the spreadsheet as RowRecords.
+
+    The rows are translated a chunk at a time, so that only one chunk
+    of translated rows is held as dictionaries at once.
+    """
+    for _, chunk in spreadsheet.chunks(TRANSLATE_CHUNK_SIZE):
+        yield from row_records(definition.translated_data(chunk))
+
+
+class UploadError(db.Model):
+    # Used to filter for errors without a column, which are
+    # for the whole row or spreadsheet
+    COLUMN__WHOLE_ROW = '-'
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    upload_id: Mapped[int] = mapped_column(ForeignKey(Upload.id, ondelete='CASCADE'), index=True)
+    # Only recorded for workbooks with more than one sheet
+    sheet: Mapped[str] = mapped_column(String(100), nullable=True)
+    row: Mapped[int] = mapped_column(nullable=True)
+    column: Mapped[str] = mapped_column(String(100), nullable=True)
+    type: Mapped[str] = mapped_column(String(50))
+    message: Mapped[str] = mapped_column(Text)
+
+    @property
+    def full_message(self):
+        result = self.message
+
+        if self.row is not None:
+            result = f"Row {self.row}: {result}"
+
+        if self.sheet:
+            result = f"{self.sheet}: {result}"
+
+        return result
+
+
+class UploadStageMetric(db.Model):
+    """Performance of one stage of processing an upload"""
+    id: Mapped[int] = mapped_column(primary_key=True)
+    upload_id: Mapped[int] = mapped_column(ForeignKey(Upload.id, ondelete='CASCADE'), index=True)
+    stage: Mapped[str] = mapped_column(String(50))
+    chunk_number: Mapped[int] = mapped_column(nullable=True)
+    duration: Mapped[float] = mapped_column()
+    row_count: Mapped[int] = mapped_column(nullable=True)
+    query_count: Mapped[int] = mapped_column()
+    peak_memory: Mapped[int] = mapped_column(nullable=True)
+    created_date: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
+
+
+class UploadChunk(db.Model):
+    """Checkpoint for one chunk of rows being imported from an upload.
+
+    completed_date is set in the same transaction that saves the chunk's
+    specimens, so a chunk that has been completed is never saved again
+    when an import is resumed.
+    """
+    __table_args__ = (
+        UniqueConstraint('upload_id', 'number', name='uq__upload_chunk__upload_id_number'),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    upload_id: Mapped[int] = mapped_column(ForeignKey(Upload.id, ondelete='CASCADE'), index=True)
+    number: Mapped[int] = mapped_column()
+    first_row: Mapped[int] = mapped_column()
+    last_row: Mapped[int] = mapped_column()
+    completed_date: Mapped[datetime] = mapped_column(DateTime, nullable=True)
+
+    @property
+    def is_completed(self):
+        return self.completed_date is not None
+
+
+class FileValidation():
+    """The rows read from an uploaded file and the errors found by the
+    checks that only depend on the file, so that they can be saved in
+    the validation cache and the checks against the database run again.
+
+    specimen_errors holds the errors for each specimen column definition,
+    by its class name, or is None if the rows were not checked because
+    the file is not in the right form.  is_complete is False if the
+    error budget stopped any of the checks.
+    """
+    def __init__(self, spreadsheet, errors, specimen_errors, is_complete):
+        self.spreadsheet = spreadsheet
+        self.errors = errors
+        self.specimen_errors = specimen_errors
+        self.is_complete = is_complete
+
+    @property
+    def all_errors(self):
+        result = list(self.errors)
+
+        for errors in (self.specimen_errors or {}).values():
+            result.extend(errors)
+
+        return result
+
+
+class ErrorBudget():
+    """Limits the number of validation errors that are looked for.
+
+    Once the maximum number of errors has been found the remaining checks
+    are skipped, and the total number of errors is estimated from the
+    proportion of rows that had errors in the checks that were run.
+    A maximum of 0 means that all the checks are always run.
+    """
+    def __init__(self, max_errors=0):
+        self.max_errors = max_errors
+        self.count = 0
+        self.unchecked_estimate = 0
+        self.is_estimate = False
+
+    @property
+    def is_spent(self):
+        return bool(self.max_errors) and self.count >= self.max_errors
+
+    @property
+    def estimated_total(self):
+        return self.count + self.unchecked_estimate
+
+    def spend(self, errors):
+        self.count += len(errors)
+
+    def skip_rows(self, errors, checked_rows, total_rows):
+        """Records that a check stopped after checking some of the rows,
+        having found the errors.
+        """
+        self.is_estimate = True
+
+        if checked_rows:
+            self.unchecked_estimate += round(len(errors) * (total_rows - checked_rows) / checked_rows)
+
+    def skip_stage(self):
+        self.is_estimate = True
+
+    def sample(self, errors):
+        if self.max_errors:
+            return errors[:self.max_errors]
+
+        return errors
+
+
+class UploadValidationMessage(ColumnsDefinitionValidationMessage):
+    """A validation message for a known column of the spreadsheet"""
+    def __init__(self, column=None, **kwargs):
+        super().__init__(**kwargs)
+        self.column = column
+
+
+def upload_error_column(error, column_names):
+    """Returns the name of the column that the validation message is for,
+    or None if it is for the whole row or spreadsheet.
+
+    Messages from the column definitions do not record their column, but
+    start with the column name or quote the missing column.
+    """
+    if column := getattr(error, 'column', None):
+        return column
+
+    for name in column_names:
+        if error.message.startswith(f"{name}:") or error.message.startswith(f"Missing column '{name}'"):
+            return name
+
+    return None
 
 
 class UploadColumnDefinition(ColumnsDefinition):
@@ -65,15 +378,77 @@ class UploadColumnDefinition(ColumnsDefinition):
 
         return result
 
-    def validation_errors(self, spreadsheet):
+    def validation_errors(self, spreadsheet, budget=None, progress=None):
+        budget = budget or ErrorBudget()
+
+        return self.database_validation_errors(
+            self.file_validation(spreadsheet, budget, progress),
+            budget,
+        )
+
+    def file_validation(self, spreadsheet, budget=None, progress=None):
+        """Runs the checks that only depend on the contents of the file"""
+        budget = budget or ErrorBudget()
         errors = []
 
-        errors.extend(self.column_validation_errors(spreadsheet))
-        if not errors:
-            errors.extend(self._both_phage_and_bacterium_errors(spreadsheet))
-            errors.extend(self._not_enough_columns_errors(spreadsheet))
-            errors.extend(BacteriumFullColumnDefinition().data_validation_errors(spreadsheet))
-            errors.extend(PhageFullColumnDefinition().data_validation_errors(spreadsheet))
+        if isinstance(spreadsheet, WorkbookRows):
+            for name, sheet in spreadsheet.sheets:
+                sheet_errors = self.column_validation_errors(sheet)
+
+                for e in sheet_errors:
+                    e.sheet = name
+
+                errors.extend(sheet_errors)
+        else:
+            errors.extend(self.column_validation_errors(spreadsheet))
+
+        # Read the spreadsheet once, rather than once for every check
+        if isinstance(spreadsheet, RowsData):
+            rows = spreadsheet
+        else:
+            rows = RowsData.from_spreadsheet(spreadsheet)
+
+        if errors:
+            return FileValidation(rows, errors, specimen_errors=None, is_complete=True)
+
+        if progress:
+            progress.update(rows_total=len(rows))
+
+        for check in [self._both_phage_and_bacterium_errors, self._not_enough_columns_errors]:
+            check_errors = check(rows)
+            errors.extend(check_errors)
+            budget.spend(check_errors)
+
+        specimen_errors = {}
+
+        with validation_executor(len(rows)) as executor:
+            for definition_class in SPECIMEN_DEFINITION_CLASSES:
+                specimen_errors[definition_class.__name__] = definition_class().file_validation_errors(rows, executor, budget, progress)
+
+        return FileValidation(rows, errors, specimen_errors, is_complete=not budget.is_estimate)
+
+    def database_validation_errors(self, file_validation, budget=None):
+        """Returns the errors of the file_validation with those of the
+        checks against the database, which are not run if the file
+        itself is not in the right form.
+        """
+        budget = budget or ErrorBudget()
+        errors = list(file_validation.errors)
+
+        if file_validation.specimen_errors is None:
+            return errors
+
+        rows = file_validation.spreadsheet
+        errors = rows.located_errors(errors)
+
+        # The rows of the specimen errors are numbered through the rows
+        # of the specimen type, so are located using the same rows
+        for definition_class in SPECIMEN_DEFINITION_CLASSES:
+            definition = definition_class()
+            specimen_errors = file_validation.specimen_errors[definition_class.__name__]
+            specimen_errors = specimen_errors + definition.budgeted_database_validation_errors(rows, budget)
+            specimen_errors = sorted(specimen_errors, key=lambda e: e.row)
+            errors.extend(definition.filtered_rows(rows).located_errors(specimen_errors))
 
         return errors
 
@@ -218,33 +593,119 @@ class SpecimenFullColumnDefinition(ColumnsDefinition):
     def row_filter(self, spreadsheet):
         return self.rows_with_all_fields(spreadsheet)
 
-    def data_validation_errors(self, spreadsheet):
+    def filtered_rows(self, spreadsheet):
+        return RowsData(spreadsheet.get_column_names(), self.iter_filtered_data(spreadsheet))
+
+    def data_validation_errors(self, spreadsheet, executor=None, budget=None, progress=None):
+        budget = budget or ErrorBudget()
+
+        errors = self.file_validation_errors(spreadsheet, executor, budget, progress)
+        errors.extend(self.budgeted_database_validation_errors(spreadsheet, budget))
+
+        return sorted(errors, key=lambda e: e.row)
+
+    def file_validation_errors(self, spreadsheet, executor=None, budget=None, progress=None):
+        """Checks the values in the columns of the rows, which only
+        depend on the contents of the file.
+        """
+        budget = budget or ErrorBudget()
+        rows = self.filtered_rows(spreadsheet)
+
+        if budget.is_spent:
+            budget.skip_stage()
+            return []
+
+        chunks = list(rows.chunks(current_app.config["UPLOAD_VALIDATION_CHUNK_SIZE"]))
+
+        # Read here, as the worker processes have no app context
+        engine = validation_engine()
+
+        if executor is None:
+            pending = [
+                DeferredResult(_chunk_column_data_validation_errors, self.__class__, chunk, offset, engine)
+                for offset, chunk in chunks
+            ]
+        else:
+            pending = [
+                executor.submit(_chunk_column_data_validation_errors, self.__class__, chunk, offset, engine)
+                for offset, chunk in chunks
+            ]
+
+        errors = []
+        checked_rows = 0
+
+        with upload_stage('validate columns') as stage:
+            for (_, chunk), p in zip(chunks, pending):
+                if budget.is_spent:
+                    p.cancel()
+                    continue
+
+                chunk_errors = p.result()
+                errors.extend(chunk_errors)
+                budget.spend(chunk_errors)
+                checked_rows += len(chunk)
+
+                if progress:
+                    progress.add(rows_validated=len(chunk))
+
+            stage.row_count = checked_rows
+
+        if checked_rows < len(rows):
+            budget.skip_rows(errors, checked_rows, len(rows))
+
+        return errors
+
+    def budgeted_database_validation_errors(self, spreadsheet, budget):
+        # The database checks are the slowest, so are skipped
+        # once the upload has been shown to have enough errors
+        if budget.is_spent:
+            budget.skip_stage()
+            return []
+
+        rows = self.filtered_rows(spreadsheet)
+
+        with upload_stage('validate database', row_count=len(rows)):
+            errors = self.database_validation_errors(rows)
+
+        budget.spend(errors)
+
+        return errors
+
+    def column_data_validation_errors(self, spreadsheet):
+        return super().data_validation_errors(spreadsheet)
+
+    def database_validation_errors(self, spreadsheet):
         errors = []
 
-        errors.extend(super().data_validation_errors(spreadsheet))
         errors.extend(self._key_errors(spreadsheet))
         errors.extend(self._bacterial_species_errors(spreadsheet))
 
         return errors
-    
+
     def _key_errors(self, spreadsheet):
         errors = []
 
-        for i, row in enumerate(self.iter_filtered_data(spreadsheet), 1):
-            if key := row.get('key'):
-                existing = db.session.get(Specimen, key)
+        rows = list(enumerate(self.iter_filtered_data(spreadsheet), 1))
+        specimen_types = _specimen_types({_int_or_none(row.get('key')) for _, row in rows} - {None})
+        expected_type = self.cls.__mapper__.polymorphic_identity
 
-                if existing is None:
-                    errors.append(ColumnsDefinitionValidationMessage(
+        for i, row in rows:
+            if key := _int_or_none(row.get('key')):
+                existing_type = specimen_types.get(key)
+
+                if existing_type is None:
+                    errors.append(UploadValidationMessage(
                     type=ColumnsDefinitionValidationMessage.TYPE__ERROR,
                     row=i,
+                    column='key',
                     message="Key does not exist"
                 ))
                 
-                if not isinstance(existing, self.cls):
-                    errors.append(ColumnsDefinitionValidationMessage(
+                if existing_type != expected_type:
+                    errors.append(UploadValidationMessage(
                         type=ColumnsDefinitionValidationMessage.TYPE__ERROR,
                         row=i,
+                        column='key',
                         message="Key is for the wrong type of specimen"
                     ))
 
@@ -253,20 +714,136 @@ class SpecimenFullColumnDefinition(ColumnsDefinition):
     def _bacterial_species_errors(self, spreadsheet):
         errors = []
 
-        for i, row in enumerate(self.iter_filtered_data(spreadsheet), 1):
+        rows = list(enumerate(self.iter_filtered_data(spreadsheet), 1))
+        existing = _existing_bacterial_species_name_keys({lookup_name_key(row.get(self.bacterial_species_name)) for _, row in rows} - {''})
+
+        matcher = None
+
+        for i, row in rows:
             if bacterial_species_name := row.get(self.bacterial_species_name):
-                existing = db.session.execute(select(BacterialSpecies).where(BacterialSpecies.name == bacterial_species_name)).scalar_one_or_none()
+                if lookup_name_key(bacterial_species_name) not in existing:
+                    message = f"{self.bacterial_species_name.title()} does not exist"
 
-                if existing is None:
-                    errors.append(ColumnsDefinitionValidationMessage(
+                    matcher = matcher or bacterial_species_matcher()
+                    if suggestions := matcher.matches(bacterial_species_name):
+                        message += f" (did you mean {' or '.join(repr(name) for _, name, _ in suggestions)}?)"
+
+                    errors.append(UploadValidationMessage(
                         type=ColumnsDefinitionValidationMessage.TYPE__ERROR,
                         row=i,
-                        message=f"{self.bacterial_species_name.title()} does not exist"
+                        column=self.bacterial_species_name,
+                        message=message,
                     ))
 
         return errors
 
-        
+
+def _chunk_column_data_validation_errors(definition_class, chunk, offset, engine=ENGINE__PYTHON):
+    definition = definition_class()
+
+    if engine == ENGINE__COLUMNAR:
+        errors = columnar_validation_errors(definition, chunk)
+    else:
+        errors = definition.column_data_validation_errors(chunk)
+
+    for e in errors:
+        e.row += offset
+
+    return errors
+
+
+def _specimen_types(ids):
+    result = {}
+
+    for batch in batched(ids, IN_CLAUSE_BATCH_SIZE):
+        result.update(db.session.execute(
+            select(Specimen.id, Specimen.type).where(Specimen.id.in_(batch))
+        ).tuples())
+
+    return result
+
+
+def _existing_bacterial_species_name_keys(name_keys):
+    result = set()
+
+    for batch in batched(name_keys, IN_CLAUSE_BATCH_SIZE):
+        result.update(db.session.execute(
+            select(BacterialSpecies.name_key).where(BacterialSpecies.name_key.in_(batch))
+        ).scalars())
+
+    return result
+
+
+def _int_or_none(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class DeferredResult():
+    """Calculates a value when its result is first asked for, so that
+    it looks like a Future that has not yet been started.
+    """
+    def __init__(self, fn, *args):
+        self.fn = fn
+        self.args = args
+
+    def result(self):
+        return self.fn(*self.args)
+
+    def cancel(self):
+        return True
+
+
+class PoolExecutor():
+    """Submits calls to a billiard process pool, so that it can be used
+    like an Executor.  billiard is Celery's fork of multiprocessing, whose
+    pools can be started from the daemonic processes of a Celery prefork
+    worker, which the multiprocessing pools cannot.
+    """
+    def __init__(self, pool):
+        self.pool = pool
+
+    def submit(self, fn, *args):
+        return PoolResult(self.pool.apply_async(fn, args))
+
+
+class PoolResult():
+    def __init__(self, async_result):
+        self.async_result = async_result
+
+    def result(self):
+        return self.async_result.get()
+
+    def cancel(self):
+        # Calls cannot be removed from the pool's queue, but the
+        # pool is terminated once validation has finished
+        return False
+
+
+@contextmanager
+def validation_executor(row_count):
+    """Provides a process pool for the CPU bound validation checks.
+
+    Yields None when there are too few rows to be worth splitting.
+    """
+    processes = current_app.config["UPLOAD_VALIDATION_PROCESSES"]
+    chunk_size = current_app.config["UPLOAD_VALIDATION_CHUNK_SIZE"]
+
+    if processes < 2 or row_count <= chunk_size:
+        yield None
+        return
+
+    pool = Pool(processes)
+
+    try:
+        yield PoolExecutor(pool)
+    finally:
+        # Stops any calls left running after the error budget was spent
+        pool.terminate()
+        pool.join()
+
 
 class BacteriumFullColumnDefinition(SpecimenFullColumnDefinition):
     def __init__(self):
@@ -290,3 +867,7 @@ class PhageFullColumnDefinition(SpecimenFullColumnDefinition):
         result.extend(PhageOnlyColumnDefinition().column_definition)
 
         return result
+
+
+# The specimen column definitions that the rows of an upload are checked against
+SPECIMEN_DEFINITION_CLASSES = [BacteriumFullColumnDefinition, PhageFullColumnDefinition]
@@ -0,0 +1,200 @@
+"""Profiling of single requests by administrators.
+
+An administrator profiles a request by sending it with the X-Profile
+header, or by adding _profile=1 to its URL.  The request is run under
+cProfile, and the SQL statements it runs are timed.  The report is saved
+as a RequestProfile, which can be downloaded from the Maintenance pages,
+so that a slow search can be investigated against the production data.
+
+Result caches are bypassed while profiling, so that the report shows the
+cost of calculating the results.  The time taken to stream a response
+is not included.
+
+From Python 3.12, cProfile records the calls of every thread of the
+process and only one profile can run at a time.  Requests that ask to be
+profiled while another is being profiled are run without profiling, and
+the reports are only clean when the server runs one request at a time.
+"""
+import cProfile
+import io
+import pstats
+import threading
+from time import perf_counter
+from flask import current_app, g, has_app_context, request
+from flask_security import current_user
+from lbrc_flask.database import db
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from phage_catalogue.cache import bypass_result_caches
+from phage_catalogue.model.request_profiles import RequestProfile
+
+
+PROFILE_HEADER = 'X-Profile'
+PROFILE_ARG = '_profile'
+
+# Number of functions listed in the report
+REPORT_FUNCTION_LIMIT = 100
+
+# Number of SQL statements listed in the report.  All statements are counted.
+REPORT_STATEMENT_LIMIT = 500
+
+# Longest parameter list shown for each statement
+REPORT_PARAMETERS_LENGTH = 1000
+
+# Held while a request is being profiled
+_profile_lock = threading.Lock()
+
+
+class RequestProfiler():
+    def __init__(self):
+        self.profile = cProfile.Profile()
+        self.statements = []
+        self.query_count = 0
+        self.query_duration = 0
+        self.duration = None
+        self._start = None
+
+    def start(self):
+        """Starts profiling, or returns False if another request is
+        already being profiled.
+        """
+        if not _profile_lock.acquire(blocking=False):
+            return False
+
+        self._start = perf_counter()
+        self.profile.enable()
+
+        return True
+
+    def stop(self):
+        try:
+            self.profile.disable()
+        finally:
+            _profile_lock.release()
+
+        self.duration = perf_counter() - self._start
+
+    def statement_executed(self, statement, parameters, duration):
+        self.query_count += 1
+        self.query_duration += duration
+
+        if len(self.statements) < REPORT_STATEMENT_LIMIT:
+            self.statements.append((statement, parameters, duration))
+
+    def report(self, method, url, endpoint, status_code):
+        result = io.StringIO()
+
+        result.write(f"{method} {url}\n")
+        result.write(f"Endpoint: {endpoint}\n")
+        result.write(f"Status: {status_code}\n")
+        result.write(f"Duration: {self.duration:.3f}s\n")
+        result.write(f"Queries: {self.query_count} taking {self.query_duration:.3f}s\n")
+        result.write("Note: the functions of other requests are included unless the server runs one request at a time\n")
+
+        result.write(f"\n== Functions (top {REPORT_FUNCTION_LIMIT} by cumulative time) ==\n")
+        pstats.Stats(self.profile, stream=result).sort_stats('cumulative').print_stats(REPORT_FUNCTION_LIMIT)
+
+        result.write("\n== SQL statements ==\n")
+
+        for i, (statement, parameters, duration) in enumerate(self.statements, 1):
+            result.write(f"\n{i}. {duration * 1000:.1f}ms\n")
+            result.write(f"{statement.strip()}\n")
+
+            if parameters:
+                result.write(f"Parameters: {str(parameters)[:REPORT_PARAMETERS_LENGTH]}\n")
+
+        if self.query_count > len(self.statements):
+            result.write(f"\n... and {self.query_count - len(self.statements)} more statements\n")
+
+        return result.getvalue()
+
+
+def _is_profile_requested():
+    if not current_app.config["REQUEST_PROFILING_ENABLED"]:
+        return False
+
+    if not (request.headers.get(PROFILE_HEADER) or request.args.get(PROFILE_ARG)):
+        return False
+
+    return current_user.is_authenticated and current_user.is_admin
+
+
+def _before_request():
+    if not _is_profile_requested():
+        return
+
+    profiler = RequestProfiler()
+
+    if not profiler.start():
+        current_app.logger.warning(f"Request not profiled, as another request is being profiled: {request.url}")
+        return
+
+    g.request_profiler = profiler
+    g.request_profiler_cache_token = bypass_result_caches.set(True)
+
+
+def _after_request(response):
+    profiler = g.pop('request_profiler', None)
+
+    if profiler is None:
+        return response
+
+    profiler.stop()
+
+    profile = RequestProfile(
+        method=request.method,
+        url=request.url[:2000],
+        endpoint=request.endpoint,
+        status_code=response.status_code,
+        duration=profiler.duration,
+        query_count=profiler.query_count,
+        query_duration=profiler.query_duration,
+        report=profiler.report(request.method, request.url, request.endpoint, response.status_code),
+        created_by=current_user.email,
+    )
+
+    # Saved in its own session, so that the request's
+    # own changes are not committed with the profile
+    with Session(db.engine) as session:
+        session.add(profile)
+        session.commit()
+
+        response.headers['X-Profile-Id'] = str(profile.id)
+
+    return response
+
+
+def _teardown_request(exc):
+    if profiler := g.pop('request_profiler', None):
+        # The request failed before the profile could be saved
+        profiler.stop()
+
+    if token := g.pop('request_profiler_cache_token', None):
+        bypass_result_caches.reset(token)
+
+
+def _current_profiler():
+    if has_app_context():
+        return g.get('request_profiler')
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and _current_profiler():
+        context.request_profile_start = perf_counter()
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, 'request_profile_start', None)
+
+    if start is not None and (profiler := _current_profiler()):
+        profiler.statement_executed(statement, parameters, perf_counter() - start)
+
+
+def init_profiling(app):
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
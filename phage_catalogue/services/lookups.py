@@ -1,7 +1,13 @@
-from sqlalchemy import select
+from collections import namedtuple
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import delete, func, select, union_all, update
 from lbrc_flask.database import db
 
-from phage_catalogue.model.specimens import BacterialSpecies, BoxNumber, Medium, PhageIdentifier, Plasmid, Project, ResistanceMarker, StaffMember, StorageMethod, Strain
+from phage_catalogue.cache import lookup_usage_cache, mark_specimens_changed, specimen_generation
+from phage_catalogue.model.lookups import Lookup, LookupMerge, lookup_name_key
+from phage_catalogue.model.specimens import BacterialSpecies, BoxNumber, Medium, PhageIdentifier, Plasmid, Project, ResistanceMarker, Specimen, StaffMember, StorageMethod, Strain
+from phage_catalogue.services.statistics import mark_specimens_for_statistics
 
 
 def get_box_number(name):
@@ -50,7 +56,7 @@ def get_lookup(cls, name):
     if not name:
         return None
 
-    q = select(cls).where(cls.name == name)
+    q = select(cls).where(cls.name_key == lookup_name_key(name)).order_by(cls.id).limit(1)
     result = db.session.execute(q).scalar_one_or_none()
 
     return result
@@ -70,6 +76,177 @@ def get_lookup_or_create(cls, name):
     return result
 
 
+def lookup_classes():
+    return Lookup.__subclasses__()
+
+
+def lookup_class_for_name(name):
+    return {cls.__name__: cls for cls in lookup_classes()}.get(name)
+
+
+def get_lookup_type_choices():
+    return [(cls.__name__, cls.__name__) for cls in sorted(lookup_classes(), key=lambda c: c.__name__)]
+
+
+def lookup_referencing_columns(cls):
+    """Returns all the columns that have a foreign key to the lookup table"""
+    result = []
+
+    for table in db.metadata.sorted_tables:
+        for fk in table.foreign_keys:
+            if fk.column.table is cls.__table__:
+                result.append(fk.parent)
+
+    return result
+
+
+def lookup_merge(cls, target, merged_ids, updated_by):
+    """Repoints everything that references the merged lookups to
+    the target lookup and deletes the merged lookups.
+
+    Uses one set-based UPDATE per referencing column, rather than
+    loading and saving each referencing object, and records a single
+    LookupMerge audit entry for the whole merge.  The rows that are
+    repointed are recorded as last updated by updated_by.
+    """
+    merged_ids = [id for id in merged_ids if id != target.id]
+
+    if not merged_ids:
+        return
+
+    merged_names = db.session.execute(
+        select(cls.name).where(cls.id.in_(merged_ids)).order_by(cls.name)
+    ).scalars().all()
+
+    reference_count = 0
+    updated_date = datetime.now()
+
+    for column in lookup_referencing_columns(cls):
+        if column.table is Specimen.__table__:
+            mark_specimens_for_statistics(db.session, db.session.execute(
+                select(Specimen.__table__.c.id).where(column.in_(merged_ids))
+            ).scalars())
+
+        values = {column.name: target.id}
+
+        if 'last_update_by' in column.table.c:
+            values['last_update_date'] = updated_date
+            values['last_update_by'] = updated_by
+
+        reference_count += db.session.execute(
+            update(column.table)
+            .where(column.in_(merged_ids))
+            .values(values)
+        ).rowcount
+
+    db.session.execute(delete(cls).where(cls.id.in_(merged_ids)))
+
+    db.session.add(LookupMerge(
+        lookup_type=cls.__name__,
+        target_id=target.id,
+        target_name=target.name,
+        merged_names='\n'.join(merged_names),
+        reference_count=reference_count,
+    ))
+
+    db.session.expire_all()
+    mark_specimens_changed(db.session)
+    lookup_usage_cache.clear()
+
+
+def lookup_merge_duplicates(cls, updated_by):
+    """Merges lookups whose names only differ by case or whitespace
+    into the oldest lookup with that name.
+
+    Returns the number of lookups that were merged.
+    """
+    duplicate_keys = db.session.execute(
+        select(cls.name_key)
+        .group_by(cls.name_key)
+        .having(func.count(cls.id) > 1)
+    ).scalars().all()
+
+    result = 0
+
+    for name_key in duplicate_keys:
+        target, *duplicates = db.session.execute(
+            select(cls).where(cls.name_key == name_key).order_by(cls.id)
+        ).scalars().all()
+
+        lookup_merge(cls, target, [d.id for d in duplicates], updated_by)
+        result += len(duplicates)
+
+    return result
+
+
+LookupUsage = namedtuple('LookupUsage', ['id', 'name', 'usage'])
+
+
+def lookup_usage_counts(cls):
+    """Returns a LookupUsage for every value of the lookup, giving the
+    number of times it is referenced.
+
+    The counts for all the values come from a single GROUP BY over the
+    referencing columns.  Results are cached until the specimens or
+    lookups change, or for at most LOOKUP_USAGE_CACHE_TIMEOUT seconds.
+    """
+    return lookup_usage_cache.get(
+        (specimen_generation(), cls.__name__),
+        lambda: _lookup_usage_counts(cls),
+        timeout=current_app.config["LOOKUP_USAGE_CACHE_TIMEOUT"],
+    )
+
+
+def _lookup_usage_counts(cls):
+    references = [select(c.label('lookup_id')) for c in lookup_referencing_columns(cls)]
+
+    if len(references) == 1:
+        references = references[0].subquery()
+    else:
+        references = union_all(*references).subquery()
+
+    counts = (
+        select(references.c.lookup_id, func.count().label('usage'))
+        .where(references.c.lookup_id.is_not(None))
+        .group_by(references.c.lookup_id)
+        .subquery()
+    )
+
+    q = (
+        select(cls.id, cls.name, func.coalesce(counts.c.usage, 0))
+        .outerjoin(counts, counts.c.lookup_id == cls.id)
+        .order_by(cls.name)
+    )
+
+    return [LookupUsage(*row) for row in db.session.execute(q).tuples()]
+
+
+def lookup_can_delete_unused(cls):
+    """Returns whether the unused values of the lookup can be deleted.
+
+    The bacterial species are the canonical list that uploads are
+    checked against, so species that are not used yet are kept.
+    """
+    return cls is not BacterialSpecies
+
+
+def lookup_delete_unused(cls):
+    """Deletes all the values of the lookup that are not referenced.
+
+    Returns the number of values deleted.
+    """
+    q = delete(cls)
+
+    for column in lookup_referencing_columns(cls):
+        q = q.where(cls.id.not_in(select(column).where(column.is_not(None))))
+
+    result = db.session.execute(q, execution_options={'synchronize_session': False}).rowcount
+    mark_specimens_changed(db.session)
+    lookup_usage_cache.clear()
+
+    return result
+
+
 def get_bacterial_species_choices():
     l = db.session.execute(
         select(BacterialSpecies).order_by(BacterialSpecies.name)
@@ -113,6 +290,12 @@ def get_phage_identifier_datalist_choices():
     return get_lookup_datalist_choices(PhageIdentifier)
 
 
+def get_lookup_choices(cls):
+    return [(id, name) for id, name in db.session.execute(
+        select(cls.id, cls.name).order_by(cls.name, cls.id)
+    ).tuples()]
+
+
 def get_lookup_datalist_choices(cls):
     l = db.session.execute(
         select(cls).order_by(cls.name)
@@ -0,0 +1,108 @@
+from collections import defaultdict
+from threading import Lock
+from sqlalchemy import func, select
+from lbrc_flask.database import db
+
+from phage_catalogue.model.specimens import BacterialSpecies
+
+
+class TrigramIndex():
+    """In-memory trigram index for finding the nearest matching names.
+
+    Similarity is the Jaccard index of the two names' trigram sets,
+    in the same way as the PostgreSQL pg_trgm extension, so
+    'Bacilluc megaterium' is found to be close to 'Bacillus megaterium'.
+    """
+    def __init__(self, items, threshold=0.3):
+        self.threshold = threshold
+        self.items = []
+        self.trigram_counts = []
+        self.index = defaultdict(list)
+
+        for id, name in items:
+            trigrams = trigrams_for(name)
+
+            position = len(self.items)
+            self.items.append((id, name))
+            self.trigram_counts.append(len(trigrams))
+
+            for t in trigrams:
+                self.index[t].append(position)
+
+    def matches(self, name, limit=3):
+        """Returns a list of (id, name, similarity) for the best matches"""
+        trigrams = trigrams_for(name)
+
+        if not trigrams:
+            return []
+
+        shared = defaultdict(int)
+
+        for t in trigrams:
+            for position in self.index.get(t, ()):
+                shared[position] += 1
+
+        result = []
+
+        for position, count in shared.items():
+            similarity = count / (len(trigrams) + self.trigram_counts[position] - count)
+
+            if similarity >= self.threshold:
+                id, item_name = self.items[position]
+                result.append((id, item_name, similarity))
+
+        result.sort(key=lambda m: (-m[2], m[1]))
+
+        return result[:limit]
+
+
+def trigrams_for(name):
+    words = (name or '').lower().split()
+
+    result = set()
+
+    for w in words:
+        padded = f"  {w} "
+        result.update(padded[i:i+3] for i in range(len(padded) - 2))
+
+    return result
+
+
+_matcher_lock = Lock()
+_matcher_signature = None
+_matcher = None
+
+
+def bacterial_species_matcher():
+    """Returns a TrigramIndex of all the bacterial species.
+
+    The index is rebuilt whenever a species has been added, changed or
+    deleted, which is detected by a single aggregate query, so the
+    matcher can be fetched once and then used for many lookups.
+    """
+    global _matcher, _matcher_signature
+
+    signature = tuple(db.session.execute(
+        select(func.count(BacterialSpecies.id), func.max(BacterialSpecies.last_update_date))
+    ).one())
+
+    with _matcher_lock:
+        if _matcher is None or signature != _matcher_signature:
+            _matcher = TrigramIndex(db.session.execute(
+                select(BacterialSpecies.id, BacterialSpecies.name)
+            ).tuples())
+            _matcher_signature = signature
+
+        return _matcher
+
+
+def clear_bacterial_species_matcher():
+    global _matcher, _matcher_signature
+
+    with _matcher_lock:
+        _matcher = None
+        _matcher_signature = None
+
+
+def get_bacterial_species_suggestions(name, limit=3):
+    return bacterial_species_matcher().matches(name, limit=limit)
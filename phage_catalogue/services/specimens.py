@@ -1,7 +1,22 @@
-from sqlalchemy import or_, select
+from array import array
+from collections import namedtuple
+from datetime import date, datetime
+from itertools import batched
+from flask import current_app
+from flask_sqlalchemy.pagination import Pagination
+from sqlalchemy import String, cast, delete, func, literal, or_, select, union_all, update
+from sqlalchemy.orm import aliased
+from lbrc_flask.celery import celery
 from lbrc_flask.database import db
-from phage_catalogue.model.specimens import Bacterium, Phage, Project, Specimen, StaffMember, StorageMethod
+from phage_catalogue.cache import mark_specimens_changed, specimen_facet_cache, specimen_generation, specimen_search_cache
+from phage_catalogue.model.lookups import lookup_name_key
+from phage_catalogue.model.specimens import BacterialSpecies, Bacterium, Phage, Project, Specimen, StaffMember, StorageMethod
 from phage_catalogue.services.lookups import get_bacterial_species, get_box_number, get_medium, get_phage_identifier, get_plasmid, get_project, get_resistance_marker, get_staff_member, get_storage_method, get_strain
+from phage_catalogue.services.statistics import mark_specimens_for_statistics
+
+
+# Number of specimens changed by each set-based UPDATE or DELETE
+BULK_CHUNK_SIZE = 1000
 
 
 def specimen_search_query(search_data=None):
@@ -44,6 +59,15 @@ def specimen_search_query(search_data=None):
     if x := search_data.get('staff_member'):
         q = q.where(Specimen.staff_member.has(StaffMember.name.like(f"%{x}%")))
 
+    if x := search_data.get('project_id'):
+        q = q.where(Specimen.project_id == x)
+
+    if x := search_data.get('storage_method_id'):
+        q = q.where(Specimen.storage_method_id == x)
+
+    if x := search_data.get('staff_member_id'):
+        q = q.where(Specimen.staff_member_id == x)
+
     if x := search_data.get('species_id'):
         q = q.where(Bacterium.species_id == x)
 
@@ -68,6 +92,135 @@ def specimen_search_query(search_data=None):
     return q
 
 
+def specimen_search_key(search_data=None):
+    """Returns a hashable key for the search that is the same for all
+    equivalent searches, ignoring empty fields, case and extra whitespace.
+    """
+    result = []
+
+    for k, v in specimen_search_serializable(search_data).items():
+        if isinstance(v, str):
+            v = ' '.join(v.split()).lower()
+
+        if v:
+            result.append((k, v))
+
+    return tuple(sorted(result))
+
+
+def specimen_search_ids(search_data=None):
+    """Returns the ids of the specimens matching the search, in id order.
+
+    The ids are cached for each distinct search until the specimens change.
+    """
+    return specimen_search_cache.get(
+        (specimen_generation(), specimen_search_key(search_data)),
+        lambda: array('q', db.session.execute(
+            specimen_search_query(search_data)
+            .with_only_columns(Specimen.__table__.c.id)
+            .order_by(Specimen.__table__.c.id)
+        ).scalars()),
+        timeout=current_app.config["SPECIMEN_SEARCH_CACHE_TIMEOUT"],
+    )
+
+
+class SpecimenIdPagination(Pagination):
+    """Paginates a list of specimen ids, only loading the
+    specimens for the current page by primary key.
+
+    Takes the keyword arguments ``ids`` and ``select``, which is
+    the query used to load the specimens, for example with
+    loader options.
+    """
+    def _query_items(self):
+        ids = list(self._query_args['ids'][self._query_offset:self._query_offset + self.per_page])
+
+        specimens = {s.id: s for s in db.session.execute(
+            self._query_args['select'].where(Specimen.id.in_(ids))
+        ).scalars()}
+
+        return [specimens[id] for id in ids if id in specimens]
+
+    def _query_count(self):
+        return len(self._query_args['ids'])
+
+
+Facet = namedtuple('Facet', ['field', 'title', 'values'])
+FacetValue = namedtuple('FacetValue', ['filter_value', 'label', 'count'])
+
+
+def specimen_facet_counts(search_data=None):
+    """Returns the number of specimens matching the search for each
+    value of the facet fields, as a list of Facet.
+
+    The counts come from a single query, with a GROUP BY for each
+    facet, and are cached for each distinct search until the
+    specimens change.
+    """
+    return specimen_facet_cache.get(
+        (specimen_generation(), specimen_search_key(search_data)),
+        lambda: _specimen_facet_counts(search_data),
+        timeout=current_app.config["SPECIMEN_SEARCH_CACHE_TIMEOUT"],
+    )
+
+
+def _specimen_facet_counts(search_data):
+    # Use the table columns so that the single table inheritance
+    # does not restrict the query to bacteria or phages
+    t = Specimen.__table__
+
+    # (search field, title, column, lookup whose name is the label)
+    facets = [
+        ('type', 'Type', 'type', None),
+        ('species_id', 'Bacterial Species', 'species_id', BacterialSpecies),
+        ('host_id', 'Phage Host', 'host_id', BacterialSpecies),
+        ('project_id', 'Project', 'project_id', Project),
+        ('storage_method_id', 'Storage Method', 'storage_method_id', StorageMethod),
+        ('staff_member_id', 'Staff Member', 'staff_member_id', StaffMember),
+        ('freezer', 'Freezer', 'freezer', None),
+    ]
+
+    matching = (
+        specimen_search_query(search_data)
+        .with_only_columns(*[t.c[column] for _, _, column, _ in facets])
+        .cte('matching')
+    )
+
+    # Each facet is counted by its own GROUP BY, rather than grouping by
+    # all the facets at once, which returns a row for each combination
+    counts = []
+
+    for i, (_, _, column, lookup) in enumerate(facets):
+        value = matching.c[column]
+        q = select(matching).where(value != None)
+
+        if lookup is None:
+            label = value
+        else:
+            lookup = aliased(lookup)
+            label = lookup.name
+            q = q.join(lookup, lookup.id == value)
+
+        counts.append(
+            q.with_only_columns(
+                literal(i).label('facet'),
+                cast(value, String).label('value'),
+                cast(label, String).label('label'),
+                func.count().label('count'),
+            ).group_by(value, label)
+        )
+
+    values = [[] for _ in facets]
+
+    for facet, value, label, count in db.session.execute(union_all(*counts)):
+        values[facet].append(FacetValue(value, label, count))
+
+    return [
+        Facet(field, title, sorted(v, key=lambda x: x.count, reverse=True))
+        for (field, title, _, _), v in zip(facets, values)
+    ]
+
+
 def specimen_bacteria_save(data):
     for d in data:
         if d['key']:
@@ -123,5 +276,164 @@ def specimen_save(specimen, data):
     db.session.add(specimen)
 
 
+def specimen_lookups_save(data):
+    """Creates any new lookup values used by the specimen data, so that
+    chunks of specimens can then be saved in parallel without each chunk
+    trying to create the same lookup values.
+    """
+    for field, getter in [
+        ('box_number', get_box_number),
+        ('project', get_project),
+        ('storage_method', get_storage_method),
+        ('staff_member', get_staff_member),
+        ('strain', get_strain),
+        ('medium', get_medium),
+        ('plasmid', get_plasmid),
+        ('resistance_marker', get_resistance_marker),
+        ('phage_identifier', get_phage_identifier),
+    ]:
+        names = {lookup_name_key(d[field]): d[field] for d in data if d.get(field)}
+
+        for name in names.values():
+            if lookup := getter(name):
+                db.session.add(lookup)
+
+        db.session.flush()
+
+
+def specimen_search_serializable(search_data=None):
+    """Returns the non-empty search fields in a form that can be
+    passed to a Celery task and then to specimen_search_query.
+    """
+    result = {}
+
+    for k, v in (search_data or {}).items():
+        if k in ('csrf_token', 'page') or k.endswith('_datalist') or not v:
+            continue
+
+        result[k] = v.isoformat() if isinstance(v, date) else v
+
+    return result
+
+
+def specimen_bulk_update_values(data):
+    """Returns the specimen column values for the bulk edit fields that
+    have been completed, creating any new lookup values.
+    """
+    result = {}
+
+    for field in ['freezer', 'drawer']:
+        if data.get(field):
+            result[field] = data[field]
+
+    if data.get('position'):
+        result['position'] = data['position'].upper()
+
+    for field, getter in [
+        ('box_number', get_box_number),
+        ('project', get_project),
+        ('storage_method', get_storage_method),
+        ('staff_member', get_staff_member),
+    ]:
+        if lookup := getter(data.get(field) or ''):
+            db.session.add(lookup)
+            db.session.flush()
+            result[f'{field}_id'] = lookup.id
+
+    return result
+
+
+def specimen_bulk_update(search_data, values, updated_by):
+    """Applies the column values to all the specimens matching the search
+    using chunked set-based UPDATEs, rather than loading each specimen.
+
+    The database's specimen audit trigger records each change.
+
+    Returns the number of specimens updated.
+    """
+    t = Specimen.__table__
+
+    ids = db.session.execute(
+        specimen_search_query(search_data)
+        .with_only_columns(t.c.id)
+        .order_by(t.c.id)
+    ).scalars().all()
+
+    values = {
+        **values,
+        'last_update_date': datetime.now(),
+        'last_update_by': updated_by,
+    }
+
+    for batch in batched(ids, BULK_CHUNK_SIZE):
+        mark_specimens_for_statistics(db.session, batch)
+        db.session.execute(update(t).where(t.c.id.in_(batch)).values(values))
+
+    mark_specimens_changed(db.session)
+    db.session.expire_all()
+
+    return len(ids)
+
+
+@celery.task()
+def specimen_bulk_update_task(search_data, values, updated_by):
+    specimen_bulk_update(search_data, values, updated_by)
+    db.session.commit()
+
+
+def specimen_keys_from_text(text):
+    """Returns the specimen keys from text containing keys separated by
+    whitespace or commas, such as a pasted spreadsheet column or CSV file,
+    ignoring anything that is not a key, such as column headings.
+    """
+    result = set()
+
+    for k in (text or '').replace(',', ' ').split():
+        if k.isdigit():
+            result.add(int(k))
+
+    return result
+
+
+def specimen_ids_for_keys(keys):
+    """Returns the ids of the existing specimens with the keys"""
+    t = Specimen.__table__
+
+    result = []
+
+    for batch in batched(sorted(keys), BULK_CHUNK_SIZE):
+        result.extend(db.session.execute(
+            select(t.c.id).where(t.c.id.in_(batch))
+        ).scalars())
+
+    return result
+
+
+def specimen_delete_ids(ids):
+    """Deletes the specimens using chunked set-based DELETEs, rather than
+    loading and deleting each specimen.
+
+    The database's specimen audit trigger records each deletion.
+
+    Returns the number of specimens deleted.
+    """
+    t = Specimen.__table__
+
+    for batch in batched(ids, BULK_CHUNK_SIZE):
+        mark_specimens_for_statistics(db.session, batch)
+        db.session.execute(delete(t).where(t.c.id.in_(batch)))
+
+    mark_specimens_changed(db.session)
+    db.session.expire_all()
+
+    return len(ids)
+
+
+@celery.task()
+def specimen_delete_ids_task(ids):
+    specimen_delete_ids(ids)
+    db.session.commit()
+
+
 def get_type_choices():
     return [('', ''), ('Bacterium', 'Bacterium'), ('Phage', 'Phage')]
\ No newline at end of file
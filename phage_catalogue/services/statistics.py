@@ -0,0 +1,188 @@
+from collections import Counter, defaultdict
+from itertools import batched
+from lbrc_flask.database import db
+from sqlalchemy import delete, event, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from phage_catalogue.model.specimens import BacterialSpecies, Project, Specimen
+from phage_catalogue.model.statistics import SpecimenStatistic
+
+
+# Maximum number of values to put in a single SQL IN clause
+IN_CLAUSE_BATCH_SIZE = 1000
+
+_SPECIMEN_TABLE = Specimen.__table__
+
+_DIMENSION_COLUMNS = [
+    _SPECIMEN_TABLE.c.type,
+    _SPECIMEN_TABLE.c.species_id,
+    _SPECIMEN_TABLE.c.host_id,
+    _SPECIMEN_TABLE.c.project_id,
+    _SPECIMEN_TABLE.c.freezer,
+    _SPECIMEN_TABLE.c.sample_date,
+]
+
+
+def specimen_statistic_keys(type, species_id, host_id, project_id, freezer, sample_date):
+    """Returns the (dimension, type, value) keys that a specimen is counted under"""
+    result = [(SpecimenStatistic.DIMENSION__TYPE, type, type)]
+
+    if species_id:
+        result.append((SpecimenStatistic.DIMENSION__SPECIES, type, str(species_id)))
+    if host_id:
+        result.append((SpecimenStatistic.DIMENSION__HOST, type, str(host_id)))
+    if project_id:
+        result.append((SpecimenStatistic.DIMENSION__PROJECT, type, str(project_id)))
+    if freezer is not None:
+        result.append((SpecimenStatistic.DIMENSION__FREEZER, type, str(freezer)))
+    if sample_date:
+        result.append((SpecimenStatistic.DIMENSION__MONTH, type, sample_date.strftime('%Y-%m')))
+
+    return result
+
+
+def _specimen_statistic_counts(connection, ids):
+    result = Counter()
+
+    for batch in batched(ids, IN_CLAUSE_BATCH_SIZE):
+        for row in connection.execute(select(*_DIMENSION_COLUMNS).where(_SPECIMEN_TABLE.c.id.in_(batch))):
+            result.update(specimen_statistic_keys(*row))
+
+    return result
+
+
+def mark_specimens_for_statistics(session, ids):
+    """Records the statistics of the specimens as they currently are in
+    the database, so that the statistics can be updated with their new
+    values when the session commits.
+
+    Changes made through the ORM are tracked automatically, so this only
+    needs calling before set-based UPDATEs and DELETEs.
+    """
+    tracked = session.info.setdefault('statistics_specimen_ids', set())
+    new_ids = set(ids) - tracked
+
+    if new_ids:
+        old = _specimen_statistic_counts(session.connection(), new_ids)
+        session.info.setdefault('statistics_delta', Counter()).subtract(old)
+        tracked.update(new_ids)
+
+
+@event.listens_for(Session, 'before_flush')
+def _before_flush(session, flush_context, instances):
+    ids = [o.id for o in (*session.dirty, *session.deleted) if isinstance(o, Specimen) and o.id is not None]
+
+    if ids:
+        mark_specimens_for_statistics(session, ids)
+
+
+@event.listens_for(Session, 'after_flush')
+def _after_flush(session, flush_context):
+    ids = [o.id for o in session.new if isinstance(o, Specimen)]
+
+    if ids:
+        session.info.setdefault('statistics_specimen_ids', set()).update(ids)
+
+
+@event.listens_for(Session, 'before_commit')
+def _before_commit(session):
+    session.flush()
+
+    ids = session.info.pop('statistics_specimen_ids', None)
+    delta = session.info.pop('statistics_delta', Counter())
+
+    if not ids:
+        return
+
+    delta.update(_specimen_statistic_counts(session.connection(), ids))
+
+    _apply_statistics_delta(session.connection(), delta)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _after_rollback(session):
+    session.info.pop('statistics_specimen_ids', None)
+    session.info.pop('statistics_delta', None)
+
+
+def _apply_statistics_delta(connection, delta):
+    # Apply in key order so that concurrent transactions
+    # lock the rows in the same order and do not deadlock
+    for (dimension, type, value), change in sorted(delta.items()):
+        if change == 0:
+            continue
+
+        where = [
+            SpecimenStatistic.dimension == dimension,
+            SpecimenStatistic.type == type,
+            SpecimenStatistic.value == value,
+        ]
+        increment = update(SpecimenStatistic).where(*where).values(count=SpecimenStatistic.count + change)
+
+        if connection.execute(increment).rowcount:
+            continue
+
+        try:
+            with connection.begin_nested():
+                connection.execute(insert(SpecimenStatistic).values(dimension=dimension, type=type, value=value, count=change))
+        except IntegrityError:
+            connection.execute(increment)
+
+
+def statistics_rebuild():
+    """Recalculates all the statistics from the specimen table"""
+    counts = Counter()
+
+    q = select(*_DIMENSION_COLUMNS, func.count()).group_by(*_DIMENSION_COLUMNS)
+
+    for *row, count in db.session.execute(q):
+        for key in specimen_statistic_keys(*row):
+            counts[key] += count
+
+    db.session.execute(delete(SpecimenStatistic))
+
+    if counts:
+        db.session.execute(insert(SpecimenStatistic), [
+            {'dimension': dimension, 'type': type, 'value': value, 'count': count}
+            for (dimension, type, value), count in counts.items()
+        ])
+
+
+def get_specimen_statistics():
+    """Returns a dictionary of dimension to a list of
+    (label, {type: count}) sorted by label.
+    """
+    counts = defaultdict(lambda: defaultdict(dict))
+
+    for s in db.session.execute(select(SpecimenStatistic).where(SpecimenStatistic.count != 0)).scalars():
+        counts[s.dimension][s.value][s.type] = s.count
+
+    labels = {}
+
+    for dimension, cls in [
+        (SpecimenStatistic.DIMENSION__SPECIES, BacterialSpecies),
+        (SpecimenStatistic.DIMENSION__HOST, BacterialSpecies),
+        (SpecimenStatistic.DIMENSION__PROJECT, Project),
+    ]:
+        ids = [int(v) for v in counts[dimension]]
+
+        if ids:
+            labels[dimension] = {str(id): name for id, name in db.session.execute(
+                select(cls.id, cls.name).where(cls.id.in_(ids))
+            ).tuples()}
+
+    result = {}
+
+    for dimension, values in counts.items():
+        dimension_labels = labels.get(dimension, {})
+        rows = [(dimension_labels.get(value, value), types) for value, types in values.items()]
+
+        if dimension == SpecimenStatistic.DIMENSION__FREEZER:
+            rows.sort(key=lambda r: int(r[0]))
+        else:
+            rows.sort(key=lambda r: r[0])
+
+        result[dimension] = rows
+
+    return result
@@ -1,8 +1,28 @@
-from sqlalchemy import select
+from datetime import datetime, timedelta
+from itertools import batched
+import pickle
+from celery import chord
+from flask import current_app
+from sqlalchemy import func, insert, select
+from lbrc_flask.celery import celery
+from lbrc_flask.column_data import ColumnsDefinitionValidationMessage
 from lbrc_flask.database import db
 
-from phage_catalogue.model.uploads import Upload
-from phage_catalogue.services.specimens import specimen_bacteria_save, specimen_phages_save
+from phage_catalogue.file_store import upload_file_store
+from phage_catalogue.model.specimens import Bacterium, Phage
+from phage_catalogue.model.upload_metrics import UploadMetrics, upload_stage
+from phage_catalogue.model.upload_progress import UploadProgress
+from phage_catalogue.model.uploads import Upload, UploadChunk, UploadError, UploadStageMetric
+from phage_catalogue.services.specimens import specimen_bacteria_save, specimen_lookups_save, specimen_phages_save
+from phage_catalogue.validation_cache import upload_validation_cache
+
+
+# Number of uploads whose files are removed in each transaction
+CLEANUP_BATCH_SIZE = 1000
+
+# Stored files saved or reused more recently than this are not removed,
+# in case they belong to an upload that has not yet been committed
+CLEANUP_MIN_FILE_AGE = timedelta(days=1)
 
 
 def upload_search_query(search_data=None):
@@ -17,27 +37,437 @@ def upload_search_query(search_data=None):
     return q
 
 
+def upload_error_search_query(upload, search_data=None):
+    q = select(UploadError).where(UploadError.upload_id == upload.id)
+
+    search_data = search_data or {}
+
+    if (x := search_data.get('column')) == UploadError.COLUMN__WHOLE_ROW:
+        q = q.where(UploadError.column.is_(None))
+    elif x:
+        q = q.where(UploadError.column == x)
+
+    if x := search_data.get('search'):
+        for word in x.split():
+            q = q.where(UploadError.message.like(f"%{word}%"))
+
+    return q.order_by(UploadError.sheet, UploadError.row, UploadError.id)
+
+
+def upload_error_column_counts(upload):
+    """Returns a list of (column, count) of the upload's errors for each
+    column, with the most errors first.  Errors for the whole row or
+    spreadsheet have a column of None.
+    """
+    return db.session.execute(
+        select(UploadError.column, func.count(UploadError.id))
+        .where(UploadError.upload_id == upload.id)
+        .group_by(UploadError.column)
+        .order_by(func.count(UploadError.id).desc(), UploadError.column)
+    ).tuples().all()
+
+
 def upload_save(data):
-    u: Upload = Upload(filename=data['sample_file'].filename)
+    u: Upload = Upload(
+        filename=data['sample_file'].filename,
+        status=Upload.STATUS__AWAITING_PROCESSING,
+    )
+
+    u.save_file(data['sample_file'].stream)
 
     db.session.add(u)
-    db.session.flush()
+    db.session.commit()
+
+    UploadProgress(u.id).update(stage=UploadProgress.STAGE__QUEUED)
+
+    _run_task(upload_process_task, u.id)
+
+
+def upload_process(upload_id):
+    """Validates the upload and, if it is valid, splits its rows into
+    chunks that are imported by parallel tasks.
+
+    New lookup values are created first, so that the chunks do not
+    race each other to create them.
+
+    If the upload has already been split into chunks, because this is a
+    restarted task, the chunks that have not been completed are imported.
+    """
+    upload: Upload = db.session.get(Upload, upload_id)
+
+    if upload.status != Upload.STATUS__AWAITING_PROCESSING:
+        return
+
+    progress = UploadProgress(upload_id)
+
+    if not upload_chunk_count(upload_id):
+        progress.update(stage=UploadProgress.STAGE__VALIDATING)
+
+        metrics = UploadMetrics(trace_memory=current_app.config['UPLOAD_METRICS_TRACE_MEMORY'])
+
+        try:
+            with metrics.recording():
+                _upload_validate_and_split(upload, progress)
+        except Exception as e:
+            current_app.logger.exception(f"Upload {upload_id} could not be processed")
+            upload_failed(upload_id, f"The file could not be processed: {e}")
+            return
+
+        upload_metrics_save(upload_id, metrics)
+
+        if upload.is_error:
+            progress.delete()
+            return
+
+    progress.update(stage=UploadProgress.STAGE__IMPORTING)
+
+    upload_import(upload_id)
+
 
-    u.local_filepath.parent.mkdir(parents=True, exist_ok=True)
-    data['sample_file'].save(u.local_filepath)
+def _upload_validate_and_split(upload: Upload, progress):
+    spreadsheet = upload.validate(progress)
 
-    upload_process(u)
+    if upload.is_error:
+        db.session.commit()
+        return
 
+    with upload_stage('translate') as stage:
+        rows = [(Bacterium.__name__, d) for d in upload.bacteria_data(spreadsheet)]
+        rows.extend((Phage.__name__, d) for d in upload.phages_data(spreadsheet))
+        stage.row_count = len(rows)
+
+    with upload_stage('save lookups', row_count=len(rows)):
+        specimen_lookups_save([d for _, d in rows])
+
+    chunk_size = current_app.config["UPLOAD_IMPORT_CHUNK_SIZE"]
+
+    with upload_stage('split', row_count=len(rows)):
+        for number, chunk in enumerate(batched(rows, chunk_size), 1):
+            with upload.chunk_filepath(number).open('wb') as f:
+                pickle.dump(chunk, f)
+
+            db.session.add(UploadChunk(
+                upload_id=upload.id,
+                number=number,
+                first_row=(number - 1) * chunk_size + 1,
+                last_row=(number - 1) * chunk_size + len(chunk),
+            ))
+
+    with upload_stage('commit', row_count=len(rows)):
+        db.session.commit()
+
+
+def upload_import(upload_id):
+    """Queues the import of the upload's chunks that have not been
+    completed, followed by marking the upload as processed.
+    """
+    chunk_numbers = db.session.execute(
+        select(UploadChunk.number)
+        .where(UploadChunk.upload_id == upload_id)
+        .where(UploadChunk.completed_date == None)
+        .order_by(UploadChunk.number)
+    ).scalars().all()
+
+    chunk_tasks = [upload_import_chunk_task.si(upload_id, n) for n in chunk_numbers]
+    complete_task = upload_import_complete_task.si(upload_id)
+
+    if not current_app.config["UPLOAD_IMPORT_ASYNC"]:
+        try:
+            for t in chunk_tasks:
+                t.apply(throw=True)
+            complete_task.apply(throw=True)
+        except Exception:
+            current_app.logger.exception(f"Upload {upload_id} could not be imported")
+            upload_import_failed(upload_id)
+    elif chunk_tasks:
+        # The callback's errback is called if any of the chunks fail
+        chord(chunk_tasks)(complete_task.on_error(upload_import_failed_task.si(upload_id)))
+    else:
+        complete_task.delay()
+
+
+def upload_chunk_count(upload_id):
+    return db.session.execute(
+        select(func.count(UploadChunk.id)).where(UploadChunk.upload_id == upload_id)
+    ).scalar()
+
+
+def upload_import_chunk(upload_id, chunk_number):
+    """Saves the specimens in one chunk of the upload in its own transaction.
+
+    The chunk's checkpoint is locked while it is saved, and marked as
+    completed in the same transaction, so running the task again for a
+    chunk, for example after a worker has been killed, does nothing.
+    """
+    chunk: UploadChunk = db.session.execute(
+        select(UploadChunk)
+        .where(UploadChunk.upload_id == upload_id)
+        .where(UploadChunk.number == chunk_number)
+        .with_for_update()
+    ).scalar_one()
+
+    if chunk.is_completed:
+        db.session.commit()
+        return
+
+    upload: Upload = db.session.get(Upload, upload_id)
+
+    metrics = UploadMetrics(trace_memory=current_app.config['UPLOAD_METRICS_TRACE_MEMORY'])
+
+    with metrics.recording():
+        with upload.chunk_filepath(chunk_number).open('rb') as f:
+            rows = pickle.load(f)
+
+        with upload_stage('save', chunk_number=chunk_number, row_count=len(rows)):
+            specimen_bacteria_save([d for type, d in rows if type == Bacterium.__name__])
+            specimen_phages_save([d for type, d in rows if type == Phage.__name__])
+
+            chunk.completed_date = datetime.now()
+            db.session.add(chunk)
+            db.session.flush()
+
+        with upload_stage('commit', chunk_number=chunk_number, row_count=len(rows)):
+            db.session.commit()
+
+    upload_metrics_save(upload_id, metrics)
+
+    UploadProgress(upload_id).add(rows_saved=len(rows))
+
+
+def upload_import_complete(upload_id):
+    upload: Upload = db.session.get(Upload, upload_id)
+
+    upload.status = Upload.STATUS__PROCESSED
+
+    for p in upload.chunk_filepaths():
+        p.unlink(missing_ok=True)
+
+    db.session.add(upload)
     db.session.commit()
 
+    UploadProgress(upload_id).delete()
+
 
-def upload_process(upload: Upload):
-    upload.validate()
+def upload_failed(upload_id, message):
+    """Marks the upload as failed with the message, after an error that
+    stopped it being processed.
+    """
+    db.session.rollback()
 
-    if not upload.is_error:
-        specimen_bacteria_save(upload.bacteria_data())
-        specimen_phages_save(upload.phages_data())
-        upload.status = Upload.STATUS__AWAITING_PROCESSING
+    upload: Upload = db.session.get(Upload, upload_id)
+
+    upload.save_errors([ColumnsDefinitionValidationMessage(
+        type=ColumnsDefinitionValidationMessage.TYPE__ERROR,
+        message=message,
+    )], column_names=[])
+    upload.error_count_is_estimate = False
+    upload.status = Upload.STATUS__ERROR
+
+    for p in upload.chunk_filepaths():
+        p.unlink(missing_ok=True)
 
     db.session.add(upload)
     db.session.commit()
+
+    UploadProgress(upload_id).delete()
+
+
+def upload_import_failed(upload_id):
+    """Marks the upload as failed after one of its chunks could not be
+    imported.  The chunks that had already been saved stay imported.
+    """
+    db.session.rollback()
+
+    chunks = db.session.execute(
+        select(UploadChunk).where(UploadChunk.upload_id == upload_id)
+    ).scalars().all()
+
+    saved = sum(c.last_row - c.first_row + 1 for c in chunks if c.is_completed)
+    total = sum(c.last_row - c.first_row + 1 for c in chunks)
+
+    upload_failed(upload_id, f"The import failed after {saved} of {total} rows had been saved")
+
+
+def upload_metrics_save(upload_id, metrics):
+    if metrics.stages:
+        db.session.execute(insert(UploadStageMetric), [
+            {
+                'upload_id': upload_id,
+                'stage': s.stage,
+                'chunk_number': s.chunk_number,
+                'duration': s.duration,
+                'row_count': s.row_count,
+                'query_count': s.query_count,
+                'peak_memory': s.peak_memory,
+            }
+            for s in metrics.stages
+        ])
+
+    db.session.commit()
+
+
+def upload_metrics_query(upload_id=None):
+    q = (
+        select(Upload.id, Upload.filename, UploadStageMetric)
+        .join(UploadStageMetric, UploadStageMetric.upload_id == Upload.id)
+        .order_by(Upload.id, UploadStageMetric.id)
+    )
+
+    if upload_id:
+        q = q.where(Upload.id == upload_id)
+
+    return q
+
+
+def upload_resume_incomplete():
+    """Queues the processing of all the uploads that have not finished,
+    for example because the Celery queue was lost.
+
+    Returns the number of uploads queued.
+    """
+    upload_ids = db.session.execute(
+        select(Upload.id)
+        .where(Upload.status == Upload.STATUS__AWAITING_PROCESSING)
+        .order_by(Upload.id)
+    ).scalars().all()
+
+    for id in upload_ids:
+        _run_task(upload_process_task, id)
+
+    return len(upload_ids)
+
+
+def upload_files_store_legacy():
+    """Moves the files of uploads saved before the upload file store
+    was used into the store.
+
+    Returns the number of files moved.
+    """
+    uploads = db.session.execute(
+        select(Upload)
+        .where(Upload.content_hash == None)
+        .where(Upload.file_removed_date == None)
+        .order_by(Upload.id)
+    ).scalars().all()
+
+    result = 0
+
+    for u in uploads:
+        if not u.legacy_filepath.exists():
+            continue
+
+        with u.legacy_filepath.open('rb') as f:
+            u.save_file(f)
+
+        db.session.add(u)
+        db.session.commit()
+
+        u.legacy_filepath.unlink()
+        result += 1
+
+    return result
+
+
+def upload_files_cleanup():
+    """Removes the files of uploads that finished processing more than
+    UPLOAD_RETENTION_DAYS ago.  A stored file is kept while an upload
+    that has not expired has the same contents.
+
+    A stored file that has been saved again in the last
+    CLEANUP_MIN_FILE_AGE is not removed, as a new upload with the same
+    contents may not have been committed yet.  Its uploads are left to
+    be removed the next time that the files are cleaned up.
+
+    Returns the number of uploads whose files were removed.
+    """
+    retention_days = current_app.config["UPLOAD_RETENTION_DAYS"]
+
+    if not retention_days:
+        return 0
+
+    expired = db.session.execute(
+        select(Upload)
+        .where(Upload.status.in_([Upload.STATUS__PROCESSED, Upload.STATUS__ERROR]))
+        .where(Upload.file_removed_date == None)
+        .where(Upload.created_date < datetime.now() - timedelta(days=retention_days))
+        .order_by(Upload.id)
+    ).scalars().all()
+
+    store = upload_file_store()
+    result = 0
+
+    for batch in batched(expired, CLEANUP_BATCH_SIZE):
+        hashes = {u.content_hash: u.file_suffix for u in batch if u.content_hash}
+
+        still_used = set(db.session.execute(
+            select(Upload.content_hash)
+            .where(Upload.content_hash.in_(hashes.keys()))
+            .where(Upload.id.not_in([u.id for u in batch]))
+            .where(Upload.file_removed_date == None)
+        ).scalars())
+
+        # The expired uploads no longer need a file that is kept for
+        # another upload, or that has been removed from the store
+        released = set(still_used)
+
+        for content_hash, suffix in hashes.items():
+            if content_hash in still_used:
+                continue
+
+            store.delete(content_hash, suffix, min_age=CLEANUP_MIN_FILE_AGE.total_seconds())
+
+            if store.filepath(content_hash, suffix) is None:
+                released.add(content_hash)
+
+        for u in batch:
+            if not u.content_hash:
+                u.legacy_filepath.unlink(missing_ok=True)
+            elif u.content_hash not in released:
+                continue
+
+            u.file_removed_date = datetime.now()
+            db.session.add(u)
+            UploadProgress(u.id).delete()
+            result += 1
+
+        db.session.commit()
+
+    return result
+
+
+def upload_validation_cache_cleanup():
+    """Removes the validation results of uploaded files that were saved
+    more than UPLOAD_VALIDATION_CACHE_DAYS ago.
+
+    Returns the number of results removed.
+    """
+    return upload_validation_cache().delete_expired()
+
+
+# Tasks are only acknowledged once they have finished, so that
+# the tasks of a worker that is killed are run again.
+@celery.task(acks_late=True, reject_on_worker_lost=True)
+def upload_process_task(upload_id):
+    upload_process(upload_id)
+
+
+@celery.task(acks_late=True, reject_on_worker_lost=True)
+def upload_import_chunk_task(upload_id, chunk_number):
+    upload_import_chunk(upload_id, chunk_number)
+
+
+@celery.task(acks_late=True, reject_on_worker_lost=True)
+def upload_import_complete_task(upload_id):
+    upload_import_complete(upload_id)
+
+
+@celery.task(acks_late=True, reject_on_worker_lost=True)
+def upload_import_failed_task(upload_id):
+    upload_import_failed(upload_id)
+
+
+def _run_task(task, *args):
+    if current_app.config["UPLOAD_IMPORT_ASYNC"]:
+        task.delay(*args)
+    else:
+        task.apply(args=args, throw=True)
@@ -1,4 +1,6 @@
 __all__ = [
+    "lookups",
     "specimens",
+    "statistics",
     "uploads",
 ]
\ No newline at end of file
@@ -0,0 +1,125 @@
+from phage_catalogue.security import ROLENAME_EDITOR
+from phage_catalogue.services.lookups import get_lookup_choices, get_lookup_type_choices, lookup_can_delete_unused, lookup_class_for_name, lookup_delete_unused, lookup_merge, lookup_usage_counts
+from .. import blueprint
+from flask import abort, render_template, request, url_for
+from lbrc_flask.forms import SearchForm
+from lbrc_flask.database import db
+from wtforms import HiddenField, SelectField, SelectMultipleField
+from lbrc_flask.forms import FlashingForm
+from lbrc_flask.response import refresh_response
+from wtforms.validators import DataRequired, ValidationError
+from flask_security import current_user
+from flask_security.decorators import roles_accepted
+
+
+class LookupSearchForm(SearchForm):
+    lookup_type = SelectField('Lookup Type')
+    sort = SelectField('Sort', choices=[
+        ('name', 'Name'),
+        ('usage', 'Least used first'),
+        ('-usage', 'Most used first'),
+    ])
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+
+        self.lookup_type.choices = get_lookup_type_choices()
+
+
+class LookupMergeForm(FlashingForm):
+    # Hidden, as the values to choose from are those of the lookup type
+    lookup_type = HiddenField('Lookup Type')
+    target = SelectField('Merge Into', coerce=int, render_kw={'class':' select2'}, validators=[DataRequired()])
+    merged = SelectMultipleField('Values to Merge', coerce=int, render_kw={'class':' select2'}, validators=[DataRequired()])
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+
+        # The values are chosen by id, so that values whose names only
+        # differ by case or whitespace can be merged into each other
+        choices = get_lookup_choices(self.lookup_class) if self.lookup_class else []
+        self.target.choices = choices
+        self.merged.choices = choices
+
+    @property
+    def lookup_class(self):
+        return lookup_class_for_name(self.lookup_type.data)
+
+    @property
+    def merged_ids(self):
+        return [id for id in self.merged.data or [] if id != self.target.data]
+
+    def validate_lookup_type(self, field):
+        if not self.lookup_class:
+            raise ValidationError(f"Unknown lookup type '{field.data}'")
+
+    def validate_merged(self, field):
+        if not self.merged_ids:
+            raise ValidationError("Choose at least one value other than the value to merge into")
+
+
+@blueprint.route("/lookups/")
+@roles_accepted(ROLENAME_EDITOR)
+def lookups_index():
+    search_form = LookupSearchForm(formdata=request.args, search_placeholder='Search lookup values')
+
+    lookup_type = search_form.lookup_type.data or search_form.lookup_type.choices[0][0]
+    cls = lookup_class_for_name(lookup_type) or abort(404)
+    values = lookup_usage_counts(cls)
+
+    if search := (search_form.search.data or '').lower():
+        values = [v for v in values if search in v.name.lower()]
+
+    match search_form.sort.data:
+        case 'usage':
+            values = sorted(values, key=lambda v: (v.usage, v.name))
+        case '-usage':
+            values = sorted(values, key=lambda v: (-v.usage, v.name))
+
+    return render_template(
+        "ui/lookups/index.html",
+        search_form=search_form,
+        lookup_type=lookup_type,
+        values=values,
+        can_delete_unused=lookup_can_delete_unused(cls),
+        unused_count=sum(1 for v in values if v.usage == 0),
+    )
+
+
+@blueprint.route("/lookups/<string:lookup_type>/delete_unused", methods=['POST'])
+@roles_accepted(ROLENAME_EDITOR)
+def lookups_delete_unused(lookup_type):
+    cls = lookup_class_for_name(lookup_type) or abort(404)
+
+    if not lookup_can_delete_unused(cls):
+        abort(403)
+
+    lookup_delete_unused(cls)
+    db.session.commit()
+
+    return refresh_response()
+
+
+@blueprint.route("/lookups/merge", methods=['GET', 'POST'])
+@roles_accepted(ROLENAME_EDITOR)
+def lookup_merge_edit():
+    form = LookupMergeForm(
+        lookup_type=request.args.get('lookup_type'),
+        target=request.args.get('target', type=int),
+    )
+
+    if form.validate_on_submit():
+        cls = form.lookup_class
+        target = db.session.get(cls, form.target.data)
+
+        lookup_merge(cls, target, form.merged_ids, current_user.email)
+        db.session.commit()
+
+        return refresh_response()
+
+    return render_template(
+        "lbrc/form_modal.html",
+        title="Merge Lookup Values",
+        form=form,
+        url=url_for('ui.lookup_merge_edit'),
+    )
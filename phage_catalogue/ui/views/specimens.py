@@ -1,16 +1,19 @@
 from phage_catalogue.model.specimens import Bacterium, Phage, Specimen
 from phage_catalogue.security import ROLENAME_EDITOR
 from phage_catalogue.services.lookups import get_bacterial_species_choices, get_box_number_datalist_choices, get_medium_datalist_choices, get_phage_identifier_datalist_choices, get_plasmid_datalist_choices, get_project_datalist_choices, get_resistance_marker_datalist_choices, get_staff_member_datalist_choices, get_storage_method_datalist_choices, get_strain_datalist_choices
-from phage_catalogue.services.specimens import get_type_choices, specimen_bacterium_save, specimen_phage_save, specimen_search_query
+from phage_catalogue.services.species_matcher import get_bacterial_species_suggestions
+from phage_catalogue.services.specimens import SpecimenIdPagination, get_type_choices, specimen_bacterium_save, specimen_bulk_update, specimen_bulk_update_task, specimen_bulk_update_values, specimen_delete_ids, specimen_delete_ids_task, specimen_facet_counts, specimen_ids_for_keys, specimen_keys_from_text, specimen_phage_save, specimen_search_ids, specimen_search_serializable
 from .. import blueprint
-from flask import render_template, render_template_string, request, url_for
+from flask import current_app, flash, render_template, render_template_string, request, url_for
 from lbrc_flask.forms import SearchForm
 from lbrc_flask.database import db
 from wtforms import DateField, HiddenField, IntegerField, SelectField, StringField, TextAreaField
-from lbrc_flask.forms import FlashingForm, DataListField
+from lbrc_flask.forms import FlashingForm, DataListField, FileField
 from lbrc_flask.response import refresh_response
-from wtforms.validators import Length, DataRequired
+from wtforms.validators import Length, DataRequired, Optional
+from sqlalchemy import select
 from sqlalchemy.orm import selectinload
+from flask_security import current_user
 from flask_security.decorators import roles_accepted
 
 
@@ -29,6 +32,10 @@ class SpecimenSearchForm(SearchForm):
     storage_method_datalist = DataListField()
     staff_member = StringField('Staff Member', validators=[Length(max=100)], render_kw={'list': 'staff_member_datalist', 'autocomplete': 'off'})
     staff_member_datalist = DataListField()
+    # Set by the facet links, which filter by id rather than by name
+    project_id = HiddenField()
+    storage_method_id = HiddenField()
+    staff_member_id = HiddenField()
     species_id = SelectField('Bacterial Species', coerce=int, render_kw={'class':' select2'})
     strain = StringField('Strain', validators=[Length(max=100)], render_kw={'list': 'strain_datalist', 'autocomplete': 'off'})
     strain_datalist = DataListField()
@@ -85,6 +92,43 @@ class EditSpecimenForm(FlashingForm):
         self.staff_member_datalist.choices = get_staff_member_datalist_choices()
 
 
+class BulkEditForm(FlashingForm):
+    freezer = IntegerField('Freezer', validators=[Optional()])
+    drawer = IntegerField('Drawer', validators=[Optional()])
+    position = StringField('Position', validators=[Length(max=20)], render_kw={'autocomplete': 'off'})
+    box_number = StringField('Box Number', validators=[Length(max=100)], render_kw={'list': 'box_number_datalist', 'autocomplete': 'off'})
+    box_number_datalist = DataListField()
+    project = StringField('Project', validators=[Length(max=100)], render_kw={'list': 'project_datalist', 'autocomplete': 'off'})
+    project_datalist = DataListField()
+    storage_method = StringField('Storage Method', validators=[Length(max=100)], render_kw={'list': 'storage_method_datalist', 'autocomplete': 'off'})
+    storage_method_datalist = DataListField()
+    staff_member = StringField('Staff Member', validators=[Length(max=100)], render_kw={'list': 'staff_member_datalist', 'autocomplete': 'off'})
+    staff_member_datalist = DataListField()
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+
+        self.box_number_datalist.choices = get_box_number_datalist_choices()
+        self.project_datalist.choices = get_project_datalist_choices()
+        self.storage_method_datalist.choices = get_storage_method_datalist_choices()
+        self.staff_member_datalist.choices = get_staff_member_datalist_choices()
+
+    def validate(self, extra_validators=None):
+        result = super().validate(extra_validators=extra_validators)
+
+        if result and not any(f.data for f in self if f.name not in ('csrf_token',) and not f.name.endswith('_datalist')):
+            self.freezer.errors.append('Enter at least one value to change')
+            return False
+
+        return result
+
+
+class BulkDeleteForm(FlashingForm):
+    keys = TextAreaField('Specimen Keys', description='Leave blank to delete all the specimens found by the search')
+    key_file = FileField('Specimen Key File', accept=['text/plain', 'text/csv', '.csv', '.txt'])
+    confirm_count = IntegerField('Number of Specimens to Delete', validators=[Optional()])
+
+
 class EditBacteriumForm(EditSpecimenForm):
     species_id = SelectField('Species', default=0, render_kw={'class':' select2'}, validators=[DataRequired()])
     strain = StringField('Strain', validators=[Length(max=100), DataRequired()], render_kw={'list': 'strain_datalist', 'autocomplete': 'off'})
@@ -124,7 +168,7 @@ class EditPhageForm(EditSpecimenForm):
 def index():
     search_form = SpecimenSearchForm(formdata=request.args, search_placeholder='Search specimen names, notes or descriptions')
 
-    q = specimen_search_query(search_form.data)
+    q = select(Specimen)
 
     q = q.options(selectinload(Specimen.project))
     q = q.options(selectinload(Specimen.storage_method))
@@ -137,12 +181,19 @@ def index():
     q = q.options(selectinload(Phage.phage_identifier))
     q = q.options(selectinload(Phage.host))
 
-    specimens = db.paginate(select=q)
+    specimens = SpecimenIdPagination(ids=specimen_search_ids(search_form.data), select=q)
+
+    species_suggestions = []
+
+    if (search := search_form.search.data) and not search_form.species_id.data:
+        species_suggestions = get_bacterial_species_suggestions(search)
 
     return render_template(
         "ui/specimens/index.html",
         specimens=specimens,
         search_form=search_form,
+        species_suggestions=species_suggestions,
+        facets=specimen_facet_counts(search_form.data),
     )
 
 
@@ -213,6 +264,80 @@ def specimen_phage_edit(id=None):
     )
 
 
+@blueprint.route("/specimen/bulk_edit", methods=['GET', 'POST'])
+@roles_accepted(ROLENAME_EDITOR)
+def specimen_bulk_edit():
+    search_form = SpecimenSearchForm(formdata=request.args)
+    count = len(specimen_search_ids(search_form.data))
+
+    form = BulkEditForm()
+
+    if form.validate_on_submit():
+        values = specimen_bulk_update_values(form.data)
+
+        if count > current_app.config['SPECIMEN_BULK_BACKGROUND_THRESHOLD']:
+            db.session.commit()
+            specimen_bulk_update_task.delay(
+                specimen_search_serializable(search_form.data),
+                values,
+                current_user.email,
+            )
+            flash(f"Changes to {count} specimens will be made in the background")
+        else:
+            specimen_bulk_update(search_form.data, values, current_user.email)
+            db.session.commit()
+
+        return refresh_response()
+
+    return render_template(
+        "lbrc/form_modal.html",
+        title=f"Edit {count} Specimens",
+        form=form,
+        url=url_for('ui.specimen_bulk_edit', **request.args),
+    )
+
+
+@blueprint.route("/specimen/bulk_delete", methods=['GET', 'POST'])
+@roles_accepted(ROLENAME_EDITOR)
+def specimen_bulk_delete():
+    search_form = SpecimenSearchForm(formdata=request.args)
+    ids = specimen_search_ids(search_form.data)
+
+    form = BulkDeleteForm()
+
+    if form.validate_on_submit():
+        if form.key_file.data:
+            form.keys.data = form.key_file.data.read().decode('utf-8-sig', errors='replace')
+
+        has_keys = bool((form.keys.data or '').strip())
+        keys = specimen_keys_from_text(form.keys.data)
+
+        # Never fall back to deleting the search results
+        # when keys were given but none could be read
+        if has_keys:
+            ids = specimen_ids_for_keys(keys) if keys else []
+
+        if has_keys and not keys:
+            form.keys.errors.append("No specimen keys found.  Enter the keys as numbers separated by spaces, commas or new lines")
+        elif form.confirm_count.data != len(ids):
+            form.confirm_count.errors.append(f"Enter {len(ids)} to confirm deleting {len(ids)} specimens")
+        elif len(ids) > current_app.config['SPECIMEN_BULK_BACKGROUND_THRESHOLD']:
+            specimen_delete_ids_task.delay(list(ids))
+            flash(f"{len(ids)} specimens will be deleted in the background")
+            return refresh_response()
+        else:
+            specimen_delete_ids(ids)
+            db.session.commit()
+            return refresh_response()
+
+    return render_template(
+        "lbrc/form_modal.html",
+        title=f"Delete {len(ids)} Specimens",
+        form=form,
+        url=url_for('ui.specimen_bulk_delete', **request.args),
+    )
+
+
 @blueprint.route("/specimen/delete/<int:id>", methods=['POST'])
 @roles_accepted(ROLENAME_EDITOR)
 def specimen_delete(id):
@@ -0,0 +1,20 @@
+from phage_catalogue.model.statistics import SpecimenStatistic
+from phage_catalogue.services.statistics import get_specimen_statistics
+from .. import blueprint
+from flask import render_template
+
+
+@blueprint.route("/statistics/")
+def statistics_index():
+    return render_template(
+        "ui/statistics/index.html",
+        statistics=get_specimen_statistics(),
+        dimensions=[
+            (SpecimenStatistic.DIMENSION__TYPE, 'Type'),
+            (SpecimenStatistic.DIMENSION__SPECIES, 'Bacterial Species'),
+            (SpecimenStatistic.DIMENSION__HOST, 'Phage Host'),
+            (SpecimenStatistic.DIMENSION__PROJECT, 'Project'),
+            (SpecimenStatistic.DIMENSION__FREEZER, 'Freezer'),
+            (SpecimenStatistic.DIMENSION__MONTH, 'Month Sampled'),
+        ],
+    )
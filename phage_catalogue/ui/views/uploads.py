@@ -1,23 +1,41 @@
+import csv
+from io import StringIO
+from pathlib import Path
 from flask_wtf.file import FileRequired
-from phage_catalogue.model.uploads import Upload
+from phage_catalogue.model.upload_progress import UploadProgress
+from phage_catalogue.model.spreadsheets import DELIMITED_SUFFIXES, is_utf8
+from phage_catalogue.model.uploads import Upload, UploadError
 from phage_catalogue.security import ROLENAME_UPLOADER
-from phage_catalogue.services.uploads import upload_save, upload_search_query
+from phage_catalogue.services.uploads import upload_error_column_counts, upload_error_search_query, upload_metrics_query, upload_save, upload_search_query
 from .. import blueprint
-from flask import render_template, request, url_for
+from flask import Response, render_template, request, stream_with_context, url_for
 from lbrc_flask.forms import SearchForm
 from lbrc_flask.database import db
 from lbrc_flask.forms import FlashingForm, FileField
 from lbrc_flask.response import refresh_response
+from wtforms import HiddenField
+from wtforms.validators import ValidationError
 from flask_security.decorators import roles_accepted
+from sqlalchemy import select
 
 
 class UploadForm(FlashingForm):
     sample_file = FileField(
         'Sample File',
-        accept=['application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'],
+        accept=[
+            'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+            'text/csv',
+            'text/tab-separated-values',
+            '.csv',
+            '.tsv',
+        ],
         validators=[FileRequired()],
     )
 
+    def validate_sample_file(self, field):
+        if Path(field.data.filename).suffix.lower() in DELIMITED_SUFFIXES and not is_utf8(field.data.stream):
+            raise ValidationError("The file is not saved as UTF-8.  In Excel, save it as 'CSV UTF-8 (Comma delimited)'")
+
 
 @blueprint.route("/uploads/")
 @roles_accepted(ROLENAME_UPLOADER)
@@ -36,6 +54,98 @@ def uploads_index():
     )
 
 
+class UploadErrorSearchForm(SearchForm):
+    id = HiddenField('id')
+    column = HiddenField('Column')
+
+
+@blueprint.route("/uploads/<int:id>/errors")
+@roles_accepted(ROLENAME_UPLOADER)
+def uploads_errors(id):
+    upload = db.get_or_404(Upload, id)
+
+    search_form = UploadErrorSearchForm(formdata=request.args, id=upload.id, search_placeholder='Search error messages')
+
+    q = upload_error_search_query(upload, search_form.data)
+
+    errors = db.paginate(select=q)
+
+    return render_template(
+        "ui/uploads/errors.html",
+        upload=upload,
+        errors=errors,
+        search_form=search_form,
+        column_counts=upload_error_column_counts(upload),
+        whole_row_column=UploadError.COLUMN__WHOLE_ROW,
+    )
+
+
+@blueprint.route("/uploads/<int:id>/progress")
+@roles_accepted(ROLENAME_UPLOADER)
+def uploads_progress(id):
+    # Only reads the progress file, so that polling
+    # does not query the uploads table.  The file is
+    # deleted once the upload has finished, so the
+    # status is then read to stop the polling.
+    progress = UploadProgress(id).read()
+
+    if progress is None:
+        status = db.session.execute(select(Upload.status).where(Upload.id == id)).scalar()
+
+        if status in UploadProgress.FINAL_STAGES:
+            progress = {'stage': status, 'is_final': True}
+
+    return render_template(
+        "ui/uploads/progress.html",
+        id=id,
+        progress=progress,
+    )
+
+
+@blueprint.route("/uploads/<int:id>/metrics")
+@roles_accepted(ROLENAME_UPLOADER)
+def uploads_metrics(id):
+    upload = db.get_or_404(Upload, id)
+
+    metrics = db.session.execute(upload_metrics_query(upload.id)).tuples().all()
+
+    return render_template(
+        "ui/uploads/metrics.html",
+        upload=upload,
+        metrics=[m for _, _, m in metrics],
+    )
+
+
+@blueprint.route("/uploads/metrics.csv")
+@roles_accepted(ROLENAME_UPLOADER)
+def uploads_metrics_export():
+    q = upload_metrics_query(request.args.get('id', type=int))
+
+    def rows():
+        yield [
+            'upload_id', 'filename', 'stage', 'chunk_number', 'duration_seconds',
+            'row_count', 'query_count', 'peak_memory_kb', 'created_date',
+        ]
+
+        for upload_id, filename, m in db.session.execute(q.execution_options(yield_per=1000)).tuples():
+            yield [
+                upload_id, filename, m.stage, m.chunk_number, f"{m.duration:.3f}",
+                m.row_count, m.query_count, m.peak_memory, m.created_date,
+            ]
+
+    def generate():
+        for r in rows():
+            line = StringIO()
+            csv.writer(line).writerow(r)
+            yield line.getvalue()
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/csv',
+        headers={'Content-Disposition': 'attachment; filename=upload_metrics.csv'},
+    )
+
+
 @blueprint.route("/uploads/upload", methods=['GET', 'POST'])
 @roles_accepted(ROLENAME_UPLOADER)
 def uploads_upload(id=None):
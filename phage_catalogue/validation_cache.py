@@ -0,0 +1,126 @@
+"""Cache of the parsed and checked form of uploaded files, by their hash.
+
+Users often upload a file, find that some of its bacterial species do
+not exist, add them and upload the same file again.  The rows read from
+the file and the errors found by the checks that only depend on the file
+are saved by the file's hash, so that when the same file is uploaded
+again only the checks against the database are run.
+
+Results are saved as pickles, so are ignored when they were saved by a
+different VALIDATION_CACHE_VERSION or version of lbrc_flask, whose
+column definitions do most of the checks.  Increase the version whenever
+the checks or the way files are read change.
+"""
+import json
+import os
+import pickle
+from functools import cache
+from importlib import metadata
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from time import time
+from flask import current_app
+
+
+VALIDATION_CACHE_VERSION = 3
+
+CACHE_SUFFIX = '.pickle'
+
+
+@cache
+def lbrc_flask_version():
+    """Returns the version of lbrc_flask, with the commit that it was
+    installed from, as it is installed from git without its version
+    number always being changed.
+    """
+    try:
+        distribution = metadata.distribution('lbrc_flask')
+    except metadata.PackageNotFoundError:
+        return 'unknown'
+
+    result = distribution.version
+
+    if direct_url := distribution.read_text('direct_url.json'):
+        if commit_id := json.loads(direct_url).get('vcs_info', {}).get('commit_id'):
+            result = f"{result}+{commit_id[:12]}"
+
+    return result
+
+
+class ValidationCache():
+    def __init__(self, directory, max_age=0):
+        self.directory = Path(directory)
+        self.max_age = max_age
+        self.temp_directory = self.directory / 'tmp'
+
+    @property
+    def is_enabled(self):
+        return self.max_age > 0
+
+    def _filepath(self, content_hash, suffix):
+        filename = f"{content_hash}{suffix}.v{VALIDATION_CACHE_VERSION}.{lbrc_flask_version()}{CACHE_SUFFIX}"
+        return self.directory / content_hash[:2] / filename
+
+    def get(self, content_hash, suffix):
+        """Returns the saved result for the file, or None if it has not
+        been saved, has expired or cannot be read.
+        """
+        if not self.is_enabled:
+            return None
+
+        filepath = self._filepath(content_hash, suffix)
+
+        try:
+            if filepath.stat().st_mtime < time() - self.max_age:
+                return None
+
+            with filepath.open('rb') as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # For example, saved by code whose classes have changed
+            current_app.logger.warning(f"Could not read validation cache {filepath.name}", exc_info=True)
+            return None
+
+    def save(self, content_hash, suffix, value):
+        if not self.is_enabled:
+            return
+
+        self.temp_directory.mkdir(parents=True, exist_ok=True)
+
+        with NamedTemporaryFile(dir=self.temp_directory, delete=False) as temp:
+            try:
+                pickle.dump(value, temp, protocol=pickle.HIGHEST_PROTOCOL)
+            except Exception:
+                os.unlink(temp.name)
+                raise
+
+        filepath = self._filepath(content_hash, suffix)
+        filepath.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(temp.name, filepath)
+
+    def delete_expired(self):
+        """Removes the results saved more than max_age seconds ago, or
+        all the results if the cache is not enabled.  Returns the number
+        of results removed.
+        """
+        result = 0
+        expires = time() - self.max_age
+
+        for filepath in self.directory.glob(f"??/*{CACHE_SUFFIX}"):
+            try:
+                if not self.is_enabled or filepath.stat().st_mtime < expires:
+                    filepath.unlink()
+                    result += 1
+            except FileNotFoundError:
+                pass
+
+        return result
+
+
+def upload_validation_cache():
+    return ValidationCache(
+        current_app.config["FILE_UPLOAD_DIRECTORY"] / 'validation_cache',
+        max_age=current_app.config["UPLOAD_VALIDATION_CACHE_DAYS"] * 24 * 60 * 60,
+    )
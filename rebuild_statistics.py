@@ -0,0 +1,18 @@
+#!/usr/bin/env python3
+
+from dotenv import load_dotenv
+from lbrc_flask.database import db
+
+# Load environment variables from '.env' file.
+load_dotenv()
+
+from phage_catalogue import create_app
+from phage_catalogue.services.statistics import statistics_rebuild
+
+application = create_app()
+application.app_context().push()
+
+statistics_rebuild()
+db.session.commit()
+
+db.session.close()
@@ -0,0 +1,17 @@
+#!/usr/bin/env python3
+
+from dotenv import load_dotenv
+from lbrc_flask.database import db
+
+# Load environment variables from '.env' file.
+load_dotenv()
+
+from phage_catalogue import create_app
+from phage_catalogue.services.uploads import upload_resume_incomplete
+
+application = create_app()
+application.app_context().push()
+
+print(f"Resumed {upload_resume_incomplete()} uploads")
+
+db.session.close()
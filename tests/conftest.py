@@ -1,13 +1,23 @@
 import os
 import shutil
+from contextlib import contextmanager
+from pathlib import Path
 import pytest
 from faker import Faker
 from lbrc_flask.pytest.fixtures import *
+from lbrc_flask.database import db
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy_utils import create_database, database_exists
 from phage_catalogue import create_app
+from phage_catalogue import cache
+from phage_catalogue.cache import lookup_usage_cache, specimen_facet_cache, specimen_search_cache
 from lbrc_flask.pytest.faker import LbrcFlaskFakerProvider, LbrcFileProvider, UserProvider
 from lbrc_flask.pytest.helpers import login
+from lbrc_flask.security import Role
 from phage_catalogue.config import TestConfig
 from phage_catalogue.security import ROLENAME_EDITOR, ROLENAME_UPLOADER, init_authorization
+from phage_catalogue.services.species_matcher import clear_bacterial_species_matcher
 from tests.faker import LookupProvider, SpecimenProvider, UploadProvider
 
 
@@ -39,11 +49,144 @@ def loggedin_user_uploader(client, faker):
 
 
 @pytest.fixture(scope="function")
-def app(tmp_path):
+def loggedin_user_admin(client, faker):
+    init_authorization()
+
+    user = faker.get_test_user(rolename=Role.ADMIN_ROLENAME)
+    return login(client, faker, user)
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    # Caches are per process, so would otherwise return
+    # results from a previous test's database
+    lookup_usage_cache.clear()
+    specimen_facet_cache.clear()
+    specimen_search_cache.clear()
+    clear_bacterial_species_matcher()
+
+
+def worker_database_uri(uri):
+    """Returns the URI of the database for the pytest-xdist worker, so
+    that tests run in parallel do not share a database.  Each worker
+    process has its own in-memory SQLite database anyway.
+    """
+    worker = os.environ.get('PYTEST_XDIST_WORKER')
+    url = make_url(uri)
+
+    if not worker or url.database in (None, '', ':memory:'):
+        return uri
+
+    if url.get_backend_name() == 'sqlite':
+        database = Path(url.database)
+        url = url.set(database=str(database.with_stem(f"{database.stem}_{worker}")))
+    else:
+        url = url.set(database=f"{url.database}_{worker}")
+
+    return url.render_as_string(hide_password=False)
+
+
+@pytest.fixture(scope="session")
+def session_app(tmp_path_factory):
+    """The app and database schema shared by all the tests run by a
+    process.  Each test is isolated by running it in a transaction
+    that is rolled back.
+    """
     class LocalTestConfig(TestConfig):
-        FILE_UPLOAD_DIRECTORY = tmp_path
+        FILE_UPLOAD_DIRECTORY = tmp_path_factory.mktemp('uploads')
+        SQLALCHEMY_DATABASE_URI = worker_database_uri(TestConfig.SQLALCHEMY_DATABASE_URI)
+
+    result = create_app(LocalTestConfig)
+
+    with result.app_context():
+        if db.engine.dialect.name == 'sqlite':
+            _enable_sqlite_savepoints(db.engine)
+
+        if not database_exists(db.engine.url):
+            create_database(db.engine.url)
+
+        db.drop_all()
+        db.create_all()
+
+        # Sessions use a SAVEPOINT of the test's transaction, so that
+        # the commits and rollbacks of the code being tested do not end it
+        db.session.remove()
+        db.session.configure(join_transaction_mode='create_savepoint')
+
+    yield result
+
+    with result.app_context():
+        db.drop_all()
+
+
+def _enable_sqlite_savepoints(engine):
+    # pysqlite begins transactions itself, which breaks SAVEPOINTs, so
+    # SQLAlchemy is left to begin them.  See the SQLAlchemy SQLite docs.
+    @event.listens_for(engine, 'connect')
+    def _connect(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
 
-    yield create_app(LocalTestConfig)
+    @event.listens_for(engine, 'begin')
+    def _begin(conn):
+        conn.exec_driver_sql('BEGIN')
+
+
+@pytest.fixture(scope="function")
+def app(session_app, tmp_path, request, monkeypatch):
+    monkeypatch.setitem(session_app.config, 'FILE_UPLOAD_DIRECTORY', tmp_path)
+
+    if marker := request.node.get_closest_marker('app_crsf'):
+        monkeypatch.setitem(session_app.config, 'WTF_CSRF_ENABLED', marker.args[0])
+
+    yield session_app
+
+
+@pytest.fixture(scope="function")
+def initialised_app(app, monkeypatch):
+    """Runs the test in a request context, with the database engines
+    replaced by connections in a transaction that is rolled back once
+    the test has finished.
+
+    Changes that the app commits in a transaction of their own are
+    made in a SAVEPOINT of the connection instead.
+    """
+    monkeypatch.setattr(cache, '_separate_transaction', _savepoint)
+
+    context = app.test_request_context()
+    context.push()
+
+    engines = db.engines
+    bound = {}
+
+    for key, engine in engines.items():
+        connection = engine.connect()
+        bound[key] = (engine, connection, connection.begin())
+        engines[key] = connection
+
+    try:
+        yield app
+    finally:
+        db.session.remove()
+
+        for key, (engine, connection, transaction) in bound.items():
+            transaction.rollback()
+            connection.close()
+            engines[key] = engine
+
+        context.pop()
+
+
+@contextmanager
+def _savepoint():
+    connection = db.engine
+
+    with connection.begin_nested():
+        yield connection
+
+
+@pytest.fixture(scope="function")
+def client(initialised_app):
+    yield initialised_app.test_client()
 
 
 @pytest.fixture(scope="function")
@@ -87,7 +87,8 @@ class UploadFakeCreator(FakeCreator):
         return self.cls(
             filename = args.get('filename', self.faker.unique.file_name(extension='xslx')),
             status = args.get('status', choice(Upload.STATUS_NAMES)),
-            errors = args.get('errors', '\n'.join([self.faker.sentence() for _ in range(5)])),
+            error_count = args.get('error_count', 0),
+            content_hash = args.get('content_hash'),
         )
 
 
@@ -0,0 +1,71 @@
+from datetime import date
+import pytest
+from phage_catalogue.model.columnar_validation import columnar_validation_errors
+from phage_catalogue.model.spreadsheets import RowsData
+from phage_catalogue.model.uploads import BacteriumFullColumnDefinition, UploadColumnDefinition
+
+pytest.importorskip("pandas")
+
+
+def _row(**values):
+    result = {
+        'key': None,
+        'freezer': 1,
+        'drawer': 2,
+        'box_number': 'Box 1',
+        'position': 'A1',
+        'description': 'Description',
+        'project': 'Project',
+        'date': date(2024, 1, 2),
+        'storage method': 'Glycerol',
+        'name': 'Name',
+        'staff member': 'Staff',
+        'notes': 'Notes',
+        'bacterial species': 'Species',
+        'strain': 'Strain',
+        'media': 'Media',
+        'plasmid name': 'Plasmid',
+        'resistance marker': 'Marker',
+    }
+    result.update(values)
+
+    return result
+
+
+def _messages(errors):
+    return sorted((e.row, e.message) for e in errors)
+
+
+@pytest.mark.parametrize(
+    "rows",
+    [
+        [_row(), _row(freezer='3', date='2024-01-02')],
+        [_row(), _row(freezer='x'), _row(), _row(drawer=None)],
+        [_row(date='2024-02-30'), _row(date='02/01/2024'), _row(key='12')],
+        [_row(position='A' * 21), _row(project='P' * 101), _row(name='')],
+    ],
+)
+def test__columnar_validation_errors__same_as_python(rows):
+    definition = BacteriumFullColumnDefinition()
+    spreadsheet = RowsData(list(rows[0]), rows)
+
+    expected = definition.column_data_validation_errors(spreadsheet)
+    actual = columnar_validation_errors(definition, spreadsheet)
+
+    assert _messages(actual) == _messages(expected)
+
+
+def test__columnar_validation_errors__valid__none():
+    definition = BacteriumFullColumnDefinition()
+    rows = [_row(freezer=i) for i in range(100)]
+
+    assert columnar_validation_errors(definition, RowsData(list(rows[0]), rows)) == []
+
+
+def test__column_definitions__have_attributes_used():
+    columns = {c.name: c for c in UploadColumnDefinition().column_definition}
+
+    assert columns['key'].allow_null is True
+    assert columns['freezer'].allow_null is False
+    assert columns['position'].max_length == 20
+    assert not columns['notes'].max_length
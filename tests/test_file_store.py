@@ -0,0 +1,148 @@
+import os
+from datetime import datetime, timedelta
+from io import BytesIO
+from time import time
+import pytest
+from lbrc_flask.database import db
+from phage_catalogue.file_store import FileStore, upload_file_store
+from phage_catalogue.model.uploads import Upload
+from phage_catalogue.model.upload_progress import UploadProgress
+from phage_catalogue.services.uploads import upload_files_cleanup, upload_files_store_legacy
+
+
+CONTENTS = b'Some file contents'
+
+
+def _make_old(filepath):
+    old = time() - timedelta(days=7).total_seconds()
+    os.utime(filepath, (old, old))
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test__file_store__save(tmp_path, compress):
+    store = FileStore(tmp_path, compress=compress)
+
+    h = store.save(BytesIO(CONTENTS), '.xlsx')
+
+    assert store.filepath(h, '.xlsx').parent == tmp_path / h[:2] / h[2:4]
+
+    with store.local_filepath(h, '.xlsx') as filepath:
+        assert filepath.suffix == '.xlsx'
+        assert filepath.read_bytes() == CONTENTS
+
+    assert list((tmp_path / 'tmp').iterdir()) == []
+
+
+def test__file_store__save__duplicate_stored_once(tmp_path):
+    store = FileStore(tmp_path)
+
+    h1 = store.save(BytesIO(CONTENTS), '.xlsx')
+    h2 = store.save(BytesIO(CONTENTS), '.xlsx')
+    h3 = store.save(BytesIO(b'Other contents'), '.xlsx')
+
+    assert h1 == h2
+    assert h1 != h3
+    assert len(list(tmp_path.glob('*/*/*.xlsx'))) == 2
+
+
+def test__file_store__delete__recently_used__not_deleted(tmp_path):
+    store = FileStore(tmp_path)
+    h = store.save(BytesIO(CONTENTS), '.xlsx')
+
+    assert not store.delete(h, '.xlsx', min_age=60)
+    assert store.filepath(h, '.xlsx')
+
+    _make_old(store.filepath(h, '.xlsx'))
+
+    assert store.delete(h, '.xlsx', min_age=60)
+    assert store.filepath(h, '.xlsx') is None
+
+
+def _stored_upload(faker, created_date, contents=CONTENTS, status=Upload.STATUS__PROCESSED):
+    upload = faker.upload().get(save=False, filename='test.xlsx', status=status)
+    upload.save_file(BytesIO(contents))
+    upload.created_date = created_date
+    db.session.add(upload)
+    db.session.commit()
+
+    _make_old(upload_file_store().filepath(upload.content_hash, '.xlsx'))
+
+    return upload
+
+
+def test__upload_files_cleanup__expired__removed(client, app, faker, monkeypatch):
+    monkeypatch.setitem(app.config, 'UPLOAD_RETENTION_DAYS', 30)
+
+    expired = _stored_upload(faker, datetime.now() - timedelta(days=31))
+    kept = _stored_upload(faker, datetime.now(), contents=b'Other contents')
+    UploadProgress(expired.id).update(stage=UploadProgress.STAGE__PROCESSED)
+
+    assert upload_files_cleanup() == 1
+
+    assert expired.file_removed_date is not None
+    assert upload_file_store().filepath(expired.content_hash, '.xlsx') is None
+    assert UploadProgress(expired.id).read() is None
+
+    assert kept.file_removed_date is None
+    assert upload_file_store().filepath(kept.content_hash, '.xlsx')
+
+
+def test__upload_files_cleanup__contents_used_by_kept_upload__not_removed(client, app, faker, monkeypatch):
+    monkeypatch.setitem(app.config, 'UPLOAD_RETENTION_DAYS', 30)
+
+    expired = _stored_upload(faker, datetime.now() - timedelta(days=31))
+    _stored_upload(faker, datetime.now())
+
+    assert upload_files_cleanup() == 1
+
+    assert expired.file_removed_date is not None
+    assert upload_file_store().filepath(expired.content_hash, '.xlsx')
+
+
+def test__upload_files_cleanup__file_recently_saved__upload_kept(client, app, faker, monkeypatch):
+    monkeypatch.setitem(app.config, 'UPLOAD_RETENTION_DAYS', 30)
+
+    expired = _stored_upload(faker, datetime.now() - timedelta(days=31))
+    upload_file_store().save(BytesIO(CONTENTS), '.xlsx')
+
+    assert upload_files_cleanup() == 0
+
+    assert expired.file_removed_date is None
+    assert upload_file_store().filepath(expired.content_hash, '.xlsx')
+
+    _make_old(upload_file_store().filepath(expired.content_hash, '.xlsx'))
+
+    assert upload_files_cleanup() == 1
+
+    assert expired.file_removed_date is not None
+    assert upload_file_store().filepath(expired.content_hash, '.xlsx') is None
+
+
+def test__upload_files_cleanup__awaiting_processing__not_removed(client, app, faker, monkeypatch):
+    monkeypatch.setitem(app.config, 'UPLOAD_RETENTION_DAYS', 30)
+
+    upload = _stored_upload(faker, datetime.now() - timedelta(days=31), status=Upload.STATUS__AWAITING_PROCESSING)
+
+    assert upload_files_cleanup() == 0
+    assert upload_file_store().filepath(upload.content_hash, '.xlsx')
+
+
+def test__upload_files_cleanup__no_retention__not_removed(client, app, faker, monkeypatch):
+    monkeypatch.setitem(app.config, 'UPLOAD_RETENTION_DAYS', 0)
+
+    upload = _stored_upload(faker, datetime.now() - timedelta(days=3650))
+
+    assert upload_files_cleanup() == 0
+    assert upload_file_store().filepath(upload.content_hash, '.xlsx')
+
+
+def test__upload_files_store_legacy(client, app, faker):
+    upload = faker.upload().get(save=True, filename='test.xlsx')
+    upload.legacy_filepath.write_bytes(CONTENTS)
+
+    assert upload_files_store_legacy() == 1
+
+    assert not upload.legacy_filepath.exists()
+
+    with upload.local_filepath() as filepath:
+        assert filepath.read_bytes() == CONTENTS
@@ -0,0 +1,130 @@
+import multiprocessing
+import tracemalloc
+from flask import url_for
+from phage_catalogue import metrics as metrics_module
+from phage_catalogue.cache import specimen_search_cache
+from phage_catalogue.metrics import Histogram, enable_multiprocess_metrics, request_latency, write_process_metrics
+from phage_catalogue.model.upload_metrics import UploadMetrics, upload_stage
+from phage_catalogue.model.uploads import Upload
+
+
+def _metrics(client, **kwargs):
+    return client.get(url_for('metrics'), **kwargs)
+
+
+def test__metrics__not_local__not_found(client):
+    resp = _metrics(client, headers={'X-Forwarded-For': '10.0.0.1'})
+
+    assert resp.status_code == 404
+
+
+def test__metrics__request_latency(client, loggedin_user):
+    client.get(url_for('ui.index'))
+
+    resp = _metrics(client)
+
+    assert resp.status_code == 200
+    assert resp.content_type.startswith('text/plain')
+
+    text = resp.get_data(as_text=True)
+    assert '# TYPE phage_catalogue_request_duration_seconds histogram' in text
+    assert 'phage_catalogue_request_duration_seconds_count{endpoint="ui.index",method="GET",status="200"}' in text
+
+
+def test__metrics__upload_queue_depth(client, faker):
+    faker.upload().get(save=True, status=Upload.STATUS__AWAITING_PROCESSING)
+    faker.upload().get(save=True, status=Upload.STATUS__AWAITING_PROCESSING)
+    faker.upload().get(save=True, status=Upload.STATUS__PROCESSED)
+
+    text = _metrics(client).get_data(as_text=True)
+
+    assert 'phage_catalogue_upload_queue_depth 2' in text.splitlines()
+
+
+def test__metrics__cache_hit_ratio(client):
+    specimen_search_cache.get('a', lambda: 1, 60)
+    specimen_search_cache.get('a', lambda: 1, 60)
+
+    lines = _metrics(client).get_data(as_text=True).splitlines()
+
+    assert f'phage_catalogue_cache_hits_total{{cache="specimen_search"}} {specimen_search_cache.hits}' in lines
+    assert f'phage_catalogue_cache_misses_total{{cache="specimen_search"}} {specimen_search_cache.misses}' in lines
+
+
+def _record_metrics_in_child():
+    specimen_search_cache.get(('child process',), lambda: 1, 60)
+    request_latency.observe(0.5, endpoint='child', method='GET', status=200)
+    write_process_metrics(exiting=True)
+
+
+def test__metrics__multiprocess__recorded_in_child_process(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics_module, '_multiprocess_directory', None)
+    enable_multiprocess_metrics(tmp_path)
+
+    specimen_search_cache.get(('parent process',), lambda: 1, 60)
+    misses = specimen_search_cache.misses
+
+    child = multiprocessing.get_context('fork').Process(target=_record_metrics_in_child)
+    child.start()
+    child.join()
+
+    assert child.exitcode == 0
+
+    lines = _metrics(client).get_data(as_text=True).splitlines()
+
+    assert f'phage_catalogue_cache_misses_total{{cache="specimen_search"}} {misses + 1}' in lines
+    assert 'phage_catalogue_request_duration_seconds_count{endpoint="child",method="GET",status="200"} 1' in lines
+
+
+def test__histogram__cumulative_buckets():
+    h = Histogram('test_seconds', 'Test', ['endpoint'], buckets=(0.1, 1.0))
+
+    h.observe(0.05, endpoint='a')
+    h.observe(0.1, endpoint='a')
+    h.observe(0.5, endpoint='a')
+    h.observe(5, endpoint='a')
+
+    lines = list(h.lines())
+
+    assert 'test_seconds_bucket{endpoint="a",le="0.1"} 2' in lines
+    assert 'test_seconds_bucket{endpoint="a",le="1.0"} 3' in lines
+    assert 'test_seconds_bucket{endpoint="a",le="+Inf"} 4' in lines
+    assert 'test_seconds_count{endpoint="a"} 4' in lines
+
+
+def test__upload_metrics__traced_peak_memory_per_stage():
+    metrics = UploadMetrics(trace_memory=True)
+
+    with metrics.recording():
+        with upload_stage('large'):
+            data = bytearray(20 * 1024 * 1024)
+            del data
+
+        with upload_stage('small'):
+            data = bytearray(1024 * 1024)
+            del data
+
+    large, small = metrics.stages
+
+    assert large.peak_memory >= 20 * 1024
+    assert 1024 <= small.peak_memory < 20 * 1024
+
+
+def test__upload_metrics__process_peak_memory_per_stage():
+    metrics = UploadMetrics()
+
+    with metrics.recording():
+        with upload_stage('first'):
+            pass
+
+        with upload_stage('large'):
+            data = bytearray(20 * 1024 * 1024)
+            data[::4096] = b'x' * len(data[::4096])
+            del data
+
+    assert not tracemalloc.is_tracing()
+
+    first, large = metrics.stages
+
+    assert first.peak_memory > 0
+    assert large.peak_memory >= first.peak_memory
@@ -0,0 +1,82 @@
+from flask import url_for
+from lbrc_flask.database import db
+from sqlalchemy import func, select
+from phage_catalogue import profiling
+from phage_catalogue.model.request_profiles import RequestProfile
+
+
+def _profile_count():
+    return db.session.execute(select(func.count(RequestProfile.id))).scalar()
+
+
+def test__profile__admin__query_flag__saved(client, loggedin_user_admin, faker):
+    faker.bacterium().get(save=True)
+
+    resp = client.get(url_for('ui.index', _profile=1))
+
+    assert resp.status_code == 200
+
+    profile = db.session.get(RequestProfile, int(resp.headers['X-Profile-Id']))
+
+    assert profile.endpoint == 'ui.index'
+    assert profile.status_code == 200
+    assert profile.created_by == loggedin_user_admin.email
+    assert profile.query_count > 0
+    assert '== Functions' in profile.report
+    assert 'SELECT' in profile.report
+
+
+def test__profile__already_profiling__not_saved(client, loggedin_user_admin):
+    with profiling._profile_lock:
+        resp = client.get(url_for('ui.index', _profile=1))
+
+    assert resp.status_code == 200
+    assert 'X-Profile-Id' not in resp.headers
+    assert _profile_count() == 0
+
+    resp = client.get(url_for('ui.index', _profile=1))
+
+    assert 'X-Profile-Id' in resp.headers
+
+
+def test__profile__admin__header__saved(client, loggedin_user_admin):
+    resp = client.get(url_for('ui.index'), headers={'X-Profile': '1'})
+
+    assert 'X-Profile-Id' in resp.headers
+    assert _profile_count() == 1
+
+
+def test__profile__admin__not_requested__not_saved(client, loggedin_user_admin):
+    resp = client.get(url_for('ui.index'))
+
+    assert 'X-Profile-Id' not in resp.headers
+    assert _profile_count() == 0
+
+
+def test__profile__not_admin__not_saved(client, loggedin_user):
+    resp = client.get(url_for('ui.index', _profile=1))
+
+    assert resp.status_code == 200
+    assert 'X-Profile-Id' not in resp.headers
+    assert _profile_count() == 0
+
+
+def test__profile__disabled__not_saved(client, app, loggedin_user_admin, monkeypatch):
+    monkeypatch.setitem(app.config, "REQUEST_PROFILING_ENABLED", False)
+
+    resp = client.get(url_for('ui.index', _profile=1))
+
+    assert 'X-Profile-Id' not in resp.headers
+    assert _profile_count() == 0
+
+
+def test__profile__download(client, loggedin_user_admin):
+    resp = client.get(url_for('ui.index', _profile=1))
+    id = int(resp.headers['X-Profile-Id'])
+
+    resp = client.get(url_for('requestprofile.download', id=id))
+
+    assert resp.status_code == 200
+    assert resp.mimetype == 'text/plain'
+    assert 'attachment' in resp.headers['Content-Disposition']
+    assert resp.get_data(as_text=True) == db.session.get(RequestProfile, id).report
@@ -0,0 +1,92 @@
+import pickle
+import pytest
+from io import BytesIO
+from lbrc_flask.column_data import ColumnsDefinitionValidationMessage
+from openpyxl import Workbook
+from phage_catalogue.model.spreadsheets import CsvData, RowRecord, RowsData, WorkbookRows, is_utf8, row_records, workbook_sheet_names
+
+
+def test__row_records__read_like_dict():
+    rows = list(row_records([{'a': 1, 'b': None}, {'a': 2, 'b': 'x'}]))
+
+    assert all(isinstance(r, RowRecord) for r in rows)
+    assert rows[0]['a'] == 1
+    assert rows[1].get('b') == 'x'
+    assert rows[1].get('c', 'default') == 'default'
+    assert 'a' in rows[0]
+    assert 'c' not in rows[0]
+    assert dict(rows[1]) == {'a': 2, 'b': 'x'}
+    assert rows[0] == {'a': 1, 'b': None}
+
+    with pytest.raises(KeyError):
+        rows[0]['c']
+
+
+def test__row_records__fields_shared():
+    rows = list(row_records([{'a': 1}, {'a': 2}, {'b': 3}]))
+
+    assert rows[0]._fields is rows[1]._fields
+    assert rows[2]['b'] == 3
+
+
+def test__rows_data__chunk_pickled():
+    data = RowsData(['a'], [{'a': i} for i in range(5)])
+
+    _, chunk = list(data.chunks(2))[1]
+    out = pickle.loads(pickle.dumps(chunk))
+
+    assert [dict(r) for r in out.iter_rows()] == [{'a': 2}, {'a': 3}]
+
+
+def test__workbook_rows__filtered__located_errors():
+    rows = WorkbookRows([
+        ('One', RowsData(['a'], [{'a': 1}, {'a': 2}], sheet='One')),
+        ('Empty', RowsData(['a'], [], sheet='Empty')),
+        ('Two', RowsData(['a'], [{'a': 3}, {'a': 4}], sheet='Two')),
+    ])
+    even = RowsData(rows.column_names, [r for r in rows.rows if r['a'] % 2 == 0])
+    _, chunk = list(even.chunks(1))[1]
+    errors = [
+        ColumnsDefinitionValidationMessage(type=ColumnsDefinitionValidationMessage.TYPE__ERROR, row=r, message='Error')
+        for r in [1, 2]
+    ]
+
+    assert len(rows) == 4
+    assert pickle.loads(pickle.dumps(chunk)).rows[0].position == ('Two', 2)
+    assert [(e.sheet, e.row) for e in even.located_errors(errors)] == [('One', 2), ('Two', 2)]
+    assert [e.row for e in errors] == [1, 2]
+
+
+def test__csv_data(tmp_path):
+    filepath = tmp_path / 'test.tsv'
+    filepath.write_text('\ufeffKey\tName \n1\tOne\n\t\n2\t\n', encoding='utf8')
+
+    data = CsvData(filepath, delimiter='\t')
+
+    assert data.get_column_names() == ['key', 'name']
+    assert list(data.iter_rows()) == [{'key': '1', 'name': 'One'}, {'key': '2', 'name': None}]
+
+
+def test__workbook_sheet_names__all_columns_required(tmp_path):
+    filepath = tmp_path / 'test.xlsx'
+
+    workbook = Workbook()
+    workbook.active.title = 'Instructions'
+    workbook.active.append(['Key', 'Enter the key of existing specimens'])
+    workbook.create_sheet('Data').append(['Key', 'Name', 'Notes'])
+    workbook.save(filepath)
+
+    assert workbook_sheet_names(filepath, ['key', 'name']) == ['Data']
+
+
+@pytest.mark.parametrize(
+    "content, expected", [
+        ('\ufeffKey,Notes\n1,-80°C\n'.encode('utf8'), True),
+        ('Key,Notes\n1,-80°C\n'.encode('cp1252'), False),
+    ],
+)
+def test__is_utf8(content, expected):
+    stream = BytesIO(content)
+
+    assert is_utf8(stream, chunk_size=4) == expected
+    assert stream.tell() == 0
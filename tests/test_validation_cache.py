@@ -0,0 +1,68 @@
+import os
+from datetime import timedelta
+from time import time
+from phage_catalogue.validation_cache import ValidationCache, lbrc_flask_version
+
+
+HASH = 'abcd' + '0' * 60
+MAX_AGE = timedelta(days=7).total_seconds()
+
+
+def _make_old(filepath):
+    old = time() - MAX_AGE - 60
+    os.utime(filepath, (old, old))
+
+
+def test__validation_cache__save__get(tmp_path):
+    cache = ValidationCache(tmp_path, max_age=MAX_AGE)
+
+    cache.save(HASH, '.xlsx', {'rows': [1, 2, 3]})
+
+    assert cache.get(HASH, '.xlsx') == {'rows': [1, 2, 3]}
+    assert cache.get(HASH, '.csv') is None
+    assert list((tmp_path / 'tmp').iterdir()) == []
+
+
+def test__validation_cache__lbrc_flask_version_in_name(tmp_path):
+    cache = ValidationCache(tmp_path, max_age=MAX_AGE)
+
+    assert f".{lbrc_flask_version()}.pickle" in cache._filepath(HASH, '.xlsx').name
+
+
+def test__validation_cache__disabled__not_saved(tmp_path):
+    cache = ValidationCache(tmp_path, max_age=0)
+
+    cache.save(HASH, '.xlsx', {'rows': [1, 2, 3]})
+
+    assert cache.get(HASH, '.xlsx') is None
+    assert list(tmp_path.glob('*/*.pickle')) == []
+
+
+def test__validation_cache__expired__not_returned(tmp_path):
+    cache = ValidationCache(tmp_path, max_age=MAX_AGE)
+
+    cache.save(HASH, '.xlsx', {'rows': [1, 2, 3]})
+    _make_old(cache._filepath(HASH, '.xlsx'))
+
+    assert cache.get(HASH, '.xlsx') is None
+
+
+def test__validation_cache__unreadable__not_returned(client, tmp_path):
+    cache = ValidationCache(tmp_path, max_age=MAX_AGE)
+
+    cache.save(HASH, '.xlsx', {'rows': [1, 2, 3]})
+    cache._filepath(HASH, '.xlsx').write_bytes(b'Not a pickle')
+
+    assert cache.get(HASH, '.xlsx') is None
+
+
+def test__validation_cache__delete_expired(tmp_path):
+    cache = ValidationCache(tmp_path, max_age=MAX_AGE)
+
+    cache.save(HASH, '.xlsx', 'old')
+    cache.save(HASH, '.csv', 'new')
+    _make_old(cache._filepath(HASH, '.xlsx'))
+
+    assert cache.delete_expired() == 1
+    assert cache.get(HASH, '.xlsx') is None
+    assert cache.get(HASH, '.csv') == 'new'
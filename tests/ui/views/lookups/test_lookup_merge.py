@@ -0,0 +1,137 @@
+from flask import url_for
+from lbrc_flask.pytest.asserts import assert__requires_login, assert__refresh_response, assert__requires_role
+from lbrc_flask.database import db
+from sqlalchemy import func, select
+from phage_catalogue.model.lookups import LookupMerge
+from phage_catalogue.model.specimens import BacterialSpecies, Bacterium, Phage, Strain
+from tests.requests import phage_catalogue_modal_get
+
+
+def _url(external=True, **kwargs):
+    return url_for('ui.lookup_merge_edit', _external=external, **kwargs)
+
+
+def _post(client, url, data):
+    return client.post(
+        url,
+        data=data,
+    )
+
+
+def test__get__requires_login(client):
+    assert__requires_login(client, _url(external=False))
+
+
+def test__get__requires_editor_login__not(client, loggedin_user):
+    assert__requires_role(client, _url(external=False))
+
+
+def test__get__has_form(client, loggedin_user_editor):
+    resp = phage_catalogue_modal_get(client, _url(external=False), has_form=True)
+
+    assert resp.soup.find('select', attrs={'name': 'target'})
+    assert resp.soup.find('select', attrs={'name': 'merged', 'multiple': True})
+
+
+def test__post__merges_strains(client, faker, loggedin_user_editor, standard_lookups):
+    target, merged_1, merged_2, untouched, _ = standard_lookups['strain']
+    target_id, untouched_id = target.id, untouched.id
+
+    specimens = [
+        faker.bacterium().get(save=True, strain=target),
+        faker.bacterium().get(save=True, strain=merged_1),
+        faker.bacterium().get(save=True, strain=merged_2),
+        faker.bacterium().get(save=True, strain=merged_2),
+        faker.bacterium().get(save=True, strain=untouched),
+    ]
+    specimen_ids = [s.id for s in specimens]
+    db.session.commit()
+
+    resp = _post(client, _url(), {
+        'lookup_type': 'Strain',
+        'target': target.id,
+        'merged': [merged_1.id, merged_2.id],
+    })
+    assert__refresh_response(resp)
+
+    actual = [db.session.get(Bacterium, id).strain_id for id in specimen_ids]
+    assert actual == [target_id, target_id, target_id, target_id, untouched_id]
+
+    updated_by = [db.session.get(Bacterium, id).last_update_by for id in specimen_ids[1:4]]
+    assert updated_by == [loggedin_user_editor.email] * 3
+    assert db.session.execute(select(func.count(Strain.id))).scalar() == 3
+
+    audit = db.session.execute(select(LookupMerge)).scalar_one()
+    assert audit.lookup_type == 'Strain'
+    assert audit.target_id == target_id
+    assert audit.reference_count == 3
+
+
+def test__post__merges_bacterial_species__species_and_host(client, faker, loggedin_user_editor, standard_lookups):
+    target, merged, *_ = standard_lookups['bacterial_species']
+    target_id, merged_id = target.id, merged.id
+
+    bacterium_id = faker.bacterium().get(save=True, species=merged).id
+    phage_id = faker.phage().get(save=True, host=merged).id
+    db.session.commit()
+
+    resp = _post(client, _url(), {
+        'lookup_type': 'BacterialSpecies',
+        'target': target.id,
+        'merged': [merged.id],
+    })
+    assert__refresh_response(resp)
+
+    assert db.session.get(Bacterium, bacterium_id).species_id == target_id
+    assert db.session.get(Phage, phage_id).host_id == target_id
+    assert db.session.execute(select(func.count(BacterialSpecies.id)).where(BacterialSpecies.id == merged_id)).scalar() == 0
+
+
+def test__post__missing_value__not_merged(client, faker, loggedin_user_editor, standard_lookups):
+    target = standard_lookups['strain'][0]
+
+    resp = _post(client, _url(), {
+        'lookup_type': 'Strain',
+        'target': target.id,
+        'merged': [0],
+    })
+
+    assert resp.status_code == 200
+    assert db.session.execute(select(func.count(Strain.id))).scalar() == len(standard_lookups['strain'])
+    assert db.session.execute(select(func.count(LookupMerge.id))).scalar() == 0
+
+
+def test__post__only_target__not_merged(client, faker, loggedin_user_editor, standard_lookups):
+    target = standard_lookups['strain'][0]
+
+    resp = _post(client, _url(), {
+        'lookup_type': 'Strain',
+        'target': target.id,
+        'merged': [target.id],
+    })
+
+    assert resp.status_code == 200
+    assert 'Choose at least one value other than the value to merge into' in resp.text
+    assert db.session.execute(select(func.count(LookupMerge.id))).scalar() == 0
+
+
+def test__post__case_variant_duplicate__merged(client, faker, loggedin_user_editor, standard_lookups):
+    target = standard_lookups['strain'][0]
+    duplicate = faker.strain().get(save=True, name=f" {target.name.upper()} ")
+    target_id, duplicate_id = target.id, duplicate.id
+
+    bacterium_id = faker.bacterium().get(save=True, strain=duplicate).id
+    db.session.commit()
+
+    resp = _post(client, _url(), {
+        'lookup_type': 'Strain',
+        'target': target_id,
+        'merged': [duplicate_id],
+    })
+    assert__refresh_response(resp)
+
+    assert db.session.get(Bacterium, bacterium_id).strain_id == target_id
+    assert db.session.get(Strain, duplicate_id) is None
+
+    audit = db.session.execute(select(LookupMerge)).scalar_one()
+    assert audit.reference_count == 1
@@ -0,0 +1,100 @@
+from flask import url_for
+from lbrc_flask.pytest.asserts import assert__requires_login, assert__requires_role, assert__refresh_response
+from lbrc_flask.database import db
+from sqlalchemy import func, select
+from phage_catalogue.model.specimens import BacterialSpecies, Project
+from phage_catalogue.security import ROLENAME_EDITOR
+from tests.requests import phage_catalogue_get
+
+
+def _url(external=True, **kwargs):
+    return url_for('ui.lookups_index', _external=external, **kwargs)
+
+
+def _delete_unused_url(external=True, **kwargs):
+    return url_for('ui.lookups_delete_unused', _external=external, **kwargs)
+
+
+def _usage_by_name(resp):
+    result = {}
+
+    for row in resp.soup.find('tbody').find_all('tr'):
+        name, usage, flag, _ = row.find_all('td')
+        result[name.text.strip()] = (int(usage.text), 'Unused' in flag.text)
+
+    return result
+
+
+def test__get__requires_login(client):
+    assert__requires_login(client, _url(external=False))
+
+
+def test__get__requires_editor_login__not(client, loggedin_user):
+    assert__requires_role(client, _url(external=False))
+
+
+def test__get__usage_counts(client, faker, standard_lookups):
+    user = faker.user().get(save=True, rolename=ROLENAME_EDITOR)
+    projects = standard_lookups['project']
+
+    faker.bacterium().get(save=True, project=projects[0])
+    faker.bacterium().get(save=True, project=projects[0])
+    faker.phage().get(save=True, project=projects[1])
+    db.session.commit()
+
+    resp = phage_catalogue_get(client, _url(lookup_type='Project', sort='-usage'), user, has_form=True)
+
+    actual = _usage_by_name(resp)
+
+    assert actual[projects[0].name] == (2, False)
+    assert actual[projects[1].name] == (1, False)
+    assert actual[projects[2].name] == (0, True)
+    assert list(actual)[:2] == [projects[0].name, projects[1].name]
+
+
+def test__get__bacterial_species__counts_species_and_host(client, faker, standard_lookups):
+    user = faker.user().get(save=True, rolename=ROLENAME_EDITOR)
+    species = standard_lookups['bacterial_species'][0]
+
+    faker.bacterium().get(save=True, species=species)
+    faker.phage().get(save=True, host=species)
+    db.session.commit()
+
+    resp = phage_catalogue_get(client, _url(lookup_type='BacterialSpecies'), user, has_form=True)
+
+    assert _usage_by_name(resp)[species.name] == (2, False)
+
+
+def test__post__delete_unused(client, faker, loggedin_user_editor, standard_lookups):
+    projects = standard_lookups['project']
+
+    faker.bacterium().get(save=True, project=projects[0])
+    db.session.commit()
+
+    resp = client.post(_delete_unused_url(lookup_type='Project'))
+    assert__refresh_response(resp)
+
+    assert db.session.execute(select(func.count(Project.id))).scalar() == 1
+
+
+def test__get__unknown_lookup_type__not_found(client, loggedin_user_editor):
+    resp = client.get(_url(lookup_type='NotALookup'))
+
+    assert resp.status_code == 404
+
+
+def test__get__bacterial_species__delete_unused_not_offered(client, faker, standard_lookups):
+    user = faker.user().get(save=True, rolename=ROLENAME_EDITOR)
+
+    resp = phage_catalogue_get(client, _url(lookup_type='BacterialSpecies'), user, has_form=True)
+
+    assert resp.soup.find('a', title='Delete Unused BacterialSpecies Values') is None
+
+
+def test__post__delete_unused__bacterial_species__not_deleted(client, faker, loggedin_user_editor, standard_lookups):
+    count = db.session.execute(select(func.count(BacterialSpecies.id))).scalar()
+
+    resp = client.post(_delete_unused_url(lookup_type='BacterialSpecies'))
+
+    assert resp.status_code == 403
+    assert db.session.execute(select(func.count(BacterialSpecies.id))).scalar() == count
@@ -1,4 +1,5 @@
 import pytest
+from lbrc_flask.database import db
 from phage_catalogue.services.specimens import get_type_choices
 from phage_catalogue.services.lookups import get_bacterial_species_choices
 from lbrc_flask.pytest.testers import RequiresLoginTester, PanelListContentAsserter, IndexTester, PagedResultSet, RowContentAsserter
@@ -127,3 +128,90 @@ class TestSpecimenIndex(SpecimenListTester, IndexTester):
             page_count_helper=PagedResultSet(page=current_page, expected_results=phages),
             resp=resp,
         )
+
+
+class TestSpecimenIndexFacets(SpecimenListTester, IndexTester):
+    @property
+    def content_asserter(self) -> RowContentAsserter:
+        return SpecimenRowContentAsserter
+
+    def _facet_links(self, resp, title):
+        facets = resp.soup.find('details', class_='facets')
+        dt = facets.find('dt', string=title)
+        return [a.text.strip() for a in dt.find_next_sibling('dd').find_all('a')]
+
+    def test__get__facet_counts(self, standard_lookups):
+        projects = standard_lookups['project']
+
+        self.faker.bacterium().get_list(save=True, item_count=3, project=projects[0], freezer=1)
+        self.faker.phage().get_list(save=True, item_count=2, project=projects[1], freezer=1)
+
+        resp = self.get()
+
+        assert self._facet_links(resp, 'Type') == ['Bacterium (3)', 'Phage (2)']
+        assert self._facet_links(resp, 'Project') == [f'{projects[0].name} (3)', f'{projects[1].name} (2)']
+        assert self._facet_links(resp, 'Freezer') == ['1 (5)']
+
+    def test__get__facet_counts__filtered(self, standard_lookups):
+        projects = standard_lookups['project']
+
+        self.faker.bacterium().get_list(save=True, item_count=3, project=projects[0])
+        self.faker.phage().get_list(save=True, item_count=2, project=projects[1])
+
+        self.parameters['type'] = 'Phage'
+
+        resp = self.get()
+
+        assert self._facet_links(resp, 'Type') == ['Phage (2)']
+        assert self._facet_links(resp, 'Project') == [f'{projects[1].name} (2)']
+
+    def test__get__facet_link__filters_by_id(self):
+        alpha = self.faker.project().get(save=True, name='Alpha')
+        alpha_two = self.faker.project().get(save=True, name='Alpha Two')
+
+        self.faker.bacterium().get_list(save=True, item_count=1, project=alpha)
+        self.faker.bacterium().get_list(save=True, item_count=2, project=alpha_two)
+
+        resp = self.get()
+
+        facets = resp.soup.find('details', class_='facets')
+        link = facets.find('a', string='Alpha (1)')
+        assert f'project_id={alpha.id}' in link['href']
+
+        self.parameters['project_id'] = alpha.id
+
+        resp = self.get()
+
+        assert self._facet_links(resp, 'Project') == ['Alpha (1)']
+
+
+class TestSpecimenIndexCache(SpecimenListTester, IndexTester):
+    @property
+    def content_asserter(self) -> RowContentAsserter:
+        return SpecimenRowContentAsserter
+
+    def test__get__repeated_search__sees_new_specimens(self):
+        self.faker.phage().get_list(save=True, item_count=2)
+        db.session.commit()
+
+        first = self.get()
+        assert len(first.soup.select('ul.panel_list > li')) == 2
+
+        self.faker.phage().get_list(save=True, item_count=3)
+        db.session.commit()
+
+        second = self.get()
+        assert len(second.soup.select('ul.panel_list > li')) == 5
+
+    def test__get__repeated_search__does_not_see_deleted_specimens(self):
+        phages = self.faker.phage().get_list(save=True, item_count=2)
+        db.session.commit()
+
+        first = self.get()
+        assert len(first.soup.select('ul.panel_list > li')) == 2
+
+        db.session.delete(phages[0])
+        db.session.commit()
+
+        second = self.get()
+        assert len(second.soup.select('ul.panel_list > li')) == 1
@@ -0,0 +1,137 @@
+from io import BytesIO
+import pytest
+from flask import url_for
+from lbrc_flask.pytest.asserts import assert__requires_login, assert__refresh_response, assert__requires_role, assert__input_file, assert__input_textarea
+from lbrc_flask.database import db
+from sqlalchemy import func, select
+from phage_catalogue.model.specimens import Specimen
+from phage_catalogue.services.specimens import specimen_delete_ids_task
+from tests.requests import phage_catalogue_modal_get
+
+
+def _url(external=True, **kwargs):
+    return url_for('ui.specimen_bulk_delete', _external=external, **kwargs)
+
+
+def _post(client, url, data):
+    return client.post(
+        url,
+        data=data,
+    )
+
+
+def _specimen_ids():
+    return set(db.session.execute(select(Specimen.id)).scalars())
+
+
+def test__get__requires_login(client):
+    assert__requires_login(client, _url(external=False))
+
+
+def test__get__requires_editor_login__not(client, loggedin_user):
+    assert__requires_role(client, _url(external=False))
+
+
+def test__get__has_form(client, loggedin_user_editor):
+    resp = phage_catalogue_modal_get(client, _url(external=False), has_form=True)
+
+    assert__input_textarea(resp.soup, 'keys')
+    assert__input_file(resp.soup, 'key_file')
+
+
+def test__post__search__deletes_matching_specimens(client, faker, loggedin_user_editor, standard_lookups):
+    [faker.bacterium().get(save=True, freezer=1) for _ in range(3)]
+    [faker.phage().get(save=True, freezer=1) for _ in range(2)]
+    others = [faker.bacterium().get(save=True, freezer=2) for _ in range(2)]
+    other_ids = {s.id for s in others}
+    db.session.commit()
+
+    resp = _post(client, _url(freezer=1), {'confirm_count': 5})
+    assert__refresh_response(resp)
+
+    assert _specimen_ids() == other_ids
+
+
+def test__post__wrong_count__not_deleted(client, faker, loggedin_user_editor, standard_lookups):
+    [faker.bacterium().get(save=True, freezer=1) for _ in range(3)]
+    db.session.commit()
+
+    resp = _post(client, _url(freezer=1), {'confirm_count': 2})
+
+    assert resp.status_code == 200
+    assert 'HX-Refresh' not in resp.headers
+    assert len(_specimen_ids()) == 3
+
+
+def test__post__keys__deletes_listed_specimens(client, faker, loggedin_user_editor, standard_lookups):
+    specimens = [faker.bacterium().get(save=True) for _ in range(5)]
+    ids = [s.id for s in specimens]
+    db.session.commit()
+
+    resp = _post(client, _url(), {
+        'keys': f"key\n{ids[0]}\n{ids[2]}\n999999",
+        'confirm_count': 2,
+    })
+    assert__refresh_response(resp)
+
+    assert _specimen_ids() == {ids[1], ids[3], ids[4]}
+
+
+def test__post__key_file__deletes_listed_specimens(client, faker, loggedin_user_editor, standard_lookups):
+    specimens = [faker.phage().get(save=True) for _ in range(4)]
+    ids = [s.id for s in specimens]
+    db.session.commit()
+
+    resp = _post(client, _url(), {
+        'key_file': (BytesIO(f"key\r\n{ids[1]}\r\n{ids[3]}\r\n".encode()), 'keys.csv'),
+        'confirm_count': 2,
+    })
+    assert__refresh_response(resp)
+
+    assert _specimen_ids() == {ids[0], ids[2]}
+
+
+@pytest.mark.parametrize("keys", ["B123 B124", "123;124"])
+def test__post__keys_not_read__none_deleted(client, faker, loggedin_user_editor, standard_lookups, keys):
+    [faker.bacterium().get(save=True, freezer=1) for _ in range(3)]
+    db.session.commit()
+
+    resp = _post(client, _url(freezer=1), {
+        'keys': keys,
+        'confirm_count': 3,
+    })
+
+    assert resp.status_code == 200
+    assert 'HX-Refresh' not in resp.headers
+    assert 'No specimen keys found' in resp.text
+    assert len(_specimen_ids()) == 3
+
+
+def test__post__key_file_not_read__none_deleted(client, faker, loggedin_user_editor, standard_lookups):
+    [faker.bacterium().get(save=True, freezer=1) for _ in range(3)]
+    db.session.commit()
+
+    resp = _post(client, _url(freezer=1), {
+        'key_file': (BytesIO(b"key\r\nB123\r\n"), 'keys.csv'),
+        'confirm_count': 3,
+    })
+
+    assert resp.status_code == 200
+    assert 'No specimen keys found' in resp.text
+    assert len(_specimen_ids()) == 3
+
+
+def test__post__above_threshold__runs_in_background(client, app, faker, loggedin_user_editor, standard_lookups, monkeypatch):
+    specimens = [faker.bacterium().get(save=True) for _ in range(2)]
+    ids = [s.id for s in specimens]
+    db.session.commit()
+
+    queued = []
+    monkeypatch.setattr(specimen_delete_ids_task, 'delay', lambda *args: queued.append(args))
+    monkeypatch.setitem(app.config, 'SPECIMEN_BULK_BACKGROUND_THRESHOLD', 0)
+
+    resp = _post(client, _url(), {'confirm_count': 2})
+    assert__refresh_response(resp)
+
+    assert queued == [(ids,)]
+    assert db.session.execute(select(func.count(Specimen.id))).scalar() == 2
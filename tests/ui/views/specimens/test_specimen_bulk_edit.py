@@ -0,0 +1,93 @@
+from flask import url_for
+from lbrc_flask.pytest.asserts import assert__requires_login, assert__refresh_response, assert__requires_role, assert__input_text
+from lbrc_flask.database import db
+from phage_catalogue.model.specimens import Bacterium, Phage
+from phage_catalogue.services.specimens import specimen_bulk_update_task
+from tests.requests import phage_catalogue_modal_get
+
+
+def _url(external=True, **kwargs):
+    return url_for('ui.specimen_bulk_edit', _external=external, **kwargs)
+
+
+def _post(client, url, data):
+    return client.post(
+        url,
+        data=data,
+    )
+
+
+def test__get__requires_login(client):
+    assert__requires_login(client, _url(external=False))
+
+
+def test__get__requires_editor_login__not(client, loggedin_user):
+    assert__requires_role(client, _url(external=False))
+
+
+def test__get__has_form(client, loggedin_user_editor):
+    resp = phage_catalogue_modal_get(client, _url(external=False), has_form=True)
+
+    assert__input_text(resp.soup, 'position')
+    assert__input_text(resp.soup, 'project')
+    assert__input_text(resp.soup, 'storage_method')
+
+
+def test__post__updates_matching_specimens(client, faker, loggedin_user_editor, standard_lookups):
+    matching = [
+        faker.bacterium().get(save=True, freezer=1, project=standard_lookups['project'][0]),
+        faker.phage().get(save=True, freezer=1, project=standard_lookups['project'][0]),
+    ]
+    other = faker.bacterium().get(save=True, freezer=2, project=standard_lookups['project'][0])
+    matching_ids = [s.id for s in matching]
+    other_id = other.id
+    target_project_id = standard_lookups['project'][1].id
+    original_project_id = standard_lookups['project'][0].id
+    db.session.commit()
+
+    resp = _post(client, _url(freezer=1), {
+        'freezer': 7,
+        'position': 'c',
+        'project': standard_lookups['project'][1].name,
+    })
+    assert__refresh_response(resp)
+
+    actual = [db.session.get(Bacterium, matching_ids[0]), db.session.get(Phage, matching_ids[1])]
+
+    for s in actual:
+        assert s.freezer == 7
+        assert s.position == 'C'
+        assert s.project_id == target_project_id
+        assert s.last_update_by == loggedin_user_editor.email
+
+    other = db.session.get(Bacterium, other_id)
+    assert other.freezer == 2
+    assert other.project_id == original_project_id
+
+
+def test__post__no_values__not_updated(client, faker, loggedin_user_editor, standard_lookups):
+    original = faker.bacterium().get(save=True, freezer=1, drawer=1)
+    original_id = original.id
+    db.session.commit()
+
+    resp = _post(client, _url(), {})
+
+    assert resp.status_code == 200
+    assert 'HX-Refresh' not in resp.headers
+    assert db.session.get(Bacterium, original_id).freezer == 1
+
+
+def test__post__above_threshold__runs_in_background(client, app, faker, loggedin_user_editor, standard_lookups, monkeypatch):
+    original = faker.bacterium().get(save=True, freezer=1, drawer=1)
+    original_id = original.id
+    db.session.commit()
+
+    queued = []
+    monkeypatch.setattr(specimen_bulk_update_task, 'delay', lambda *args: queued.append(args))
+    monkeypatch.setitem(app.config, 'SPECIMEN_BULK_BACKGROUND_THRESHOLD', 0)
+
+    resp = _post(client, _url(freezer=1), {'drawer': 9})
+    assert__refresh_response(resp)
+
+    assert queued == [({'freezer': 1}, {'drawer': 9}, loggedin_user_editor.email)]
+    assert db.session.get(Bacterium, original_id).drawer == 1
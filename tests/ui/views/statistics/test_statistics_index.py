@@ -0,0 +1,54 @@
+from datetime import date
+from flask import url_for
+from lbrc_flask.pytest.asserts import assert__requires_login
+from lbrc_flask.database import db
+from tests.requests import phage_catalogue_get
+
+
+def _url(external=True, **kwargs):
+    return url_for('ui.statistics_index', _external=external, **kwargs)
+
+
+def _statistics(resp, dimension):
+    section = resp.soup.find('section', id=f'statistics_{dimension}')
+
+    result = {}
+
+    for row in section.find('tbody').find_all('tr'):
+        label, bacteria, phages = [td.text.strip() for td in row.find_all('td')]
+        result[label] = (int(bacteria), int(phages))
+
+    return result
+
+
+def test__get__requires_login(client):
+    assert__requires_login(client, _url(external=False))
+
+
+def test__get__counts_new_specimens(client, faker, loggedin_user, standard_lookups):
+    projects = standard_lookups['project']
+
+    faker.bacterium().get_list(save=True, item_count=3, project=projects[0], freezer=1, sample_date=date(2025, 1, 5))
+    faker.phage().get_list(save=True, item_count=2, project=projects[0], freezer=2, sample_date=date(2025, 2, 5))
+    db.session.commit()
+
+    resp = phage_catalogue_get(client, _url(), loggedin_user)
+
+    assert _statistics(resp, 'type') == {'Bacterium': (3, 0), 'Phage': (0, 2)}
+    assert _statistics(resp, 'project') == {projects[0].name: (3, 2)}
+    assert _statistics(resp, 'freezer') == {'1': (3, 0), '2': (0, 2)}
+    assert _statistics(resp, 'month') == {'2025-01': (3, 0), '2025-02': (0, 2)}
+
+
+def test__get__counts_updated_and_deleted_specimens(client, faker, loggedin_user, standard_lookups):
+    bacteria = faker.bacterium().get_list(save=True, item_count=3, freezer=1)
+    db.session.commit()
+
+    bacteria[0].freezer = 5
+    db.session.delete(bacteria[1])
+    db.session.commit()
+
+    resp = phage_catalogue_get(client, _url(), loggedin_user)
+
+    assert _statistics(resp, 'type') == {'Bacterium': (2, 0)}
+    assert _statistics(resp, 'freezer') == {'1': (1, 0), '5': (1, 0)}
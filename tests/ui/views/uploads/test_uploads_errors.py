@@ -0,0 +1,93 @@
+from flask import url_for
+from lbrc_flask.pytest.asserts import assert__requires_login, assert__requires_role
+from lbrc_flask.database import db
+from sqlalchemy import select
+from lbrc_flask.column_data import ColumnsDefinitionValidationMessage
+from phage_catalogue.model.uploads import Upload, UploadError, UploadValidationMessage
+from phage_catalogue.security import ROLENAME_UPLOADER
+from tests.requests import phage_catalogue_get
+
+
+def _url(external=True, **kwargs):
+    return url_for('ui.uploads_errors', _external=external, **kwargs)
+
+
+def _upload_with_errors(faker):
+    upload = faker.upload().get(save=True, status=Upload.STATUS__ERROR, error_count=4)
+
+    db.session.add_all([
+        UploadError(upload_id=upload.id, row=1, column='freezer', type='Error', message='freezer: Invalid value'),
+        UploadError(upload_id=upload.id, row=2, column='freezer', type='Error', message='freezer: Invalid value'),
+        UploadError(upload_id=upload.id, row=2, column='key', type='Error', message='Key does not exist'),
+        UploadError(upload_id=upload.id, row=3, column=None, type='Error', message='does not contain enough information'),
+    ])
+    db.session.commit()
+
+    return upload
+
+
+def test__get__requires_login(client, faker):
+    upload = faker.upload().get(save=True)
+    assert__requires_login(client, _url(id=upload.id, external=False))
+
+
+def test__get__requires_uploader_login__not(client, faker, loggedin_user):
+    upload = faker.upload().get(save=True)
+    assert__requires_role(client, _url(id=upload.id, external=False))
+
+
+def test__get__lists_errors(client, faker):
+    user = faker.user().get(save=True, rolename=ROLENAME_UPLOADER)
+    upload = _upload_with_errors(faker)
+
+    resp = phage_catalogue_get(client, _url(id=upload.id), user, has_form=True)
+
+    rows = resp.soup.select('#errors tbody tr')
+    assert len(rows) == 4
+
+    counts = [[td.get_text(strip=True) for td in tr.find_all('td')] for tr in resp.soup.select('#error_column_counts tbody tr')]
+    assert counts == [['freezer', '2'], ['Whole row', '1'], ['key', '1']]
+
+
+def test__get__filter_by_column(client, faker):
+    user = faker.user().get(save=True, rolename=ROLENAME_UPLOADER)
+    upload = _upload_with_errors(faker)
+
+    resp = phage_catalogue_get(client, _url(id=upload.id, column='freezer'), user, has_form=True)
+
+    rows = resp.soup.select('#errors tbody tr')
+    assert len(rows) == 2
+
+
+def test__get__filter_by_whole_row(client, faker):
+    user = faker.user().get(save=True, rolename=ROLENAME_UPLOADER)
+    upload = _upload_with_errors(faker)
+
+    resp = phage_catalogue_get(client, _url(id=upload.id), user, has_form=True)
+
+    whole_row_url = _url(id=upload.id, column=UploadError.COLUMN__WHOLE_ROW, external=False)
+    assert resp.soup.select_one('#error_column_counts').find('a', string='Whole row')['href'] == whole_row_url
+
+    resp = phage_catalogue_get(client, _url(id=upload.id, column=UploadError.COLUMN__WHOLE_ROW), user, has_form=True)
+
+    rows = [[td.get_text(strip=True) for td in tr.find_all('td')] for tr in resp.soup.select('#errors tbody tr')]
+    assert rows == [['3', '', 'does not contain enough information']]
+
+
+def test__upload__records_error_columns(client, faker, loggedin_user_uploader):
+    upload = faker.upload().get(save=True)
+
+    upload.save_errors([
+        ColumnsDefinitionValidationMessage(type=ColumnsDefinitionValidationMessage.TYPE__ERROR, row=1, message='freezer: Invalid value'),
+        ColumnsDefinitionValidationMessage(type=ColumnsDefinitionValidationMessage.TYPE__ERROR, row=None, message="Missing column 'drawer'"),
+        UploadValidationMessage(type=ColumnsDefinitionValidationMessage.TYPE__ERROR, row=2, column='host species', message='Host Species does not exist'),
+        ColumnsDefinitionValidationMessage(type=ColumnsDefinitionValidationMessage.TYPE__ERROR, row=3, message='does not contain enough information'),
+    ], ['freezer', 'drawer', 'host species'])
+    db.session.commit()
+
+    actual = db.session.execute(
+        select(UploadError.row, UploadError.column).where(UploadError.upload_id == upload.id).order_by(UploadError.id)
+    ).tuples().all()
+
+    assert actual == [(1, 'freezer'), (None, 'drawer'), (2, 'host species'), (3, None)]
+    assert upload.error_count == 4
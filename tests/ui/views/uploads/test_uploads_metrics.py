@@ -0,0 +1,94 @@
+import csv
+from io import StringIO
+import pytest
+from flask import url_for
+from lbrc_flask.pytest.asserts import assert__requires_login, assert__requires_role, assert__refresh_response
+from lbrc_flask.database import db
+from sqlalchemy import func, select
+from phage_catalogue.model.uploads import Upload, UploadColumnDefinition, UploadStageMetric
+from tests.requests import phage_catalogue_get
+
+
+def _url(external=True, **kwargs):
+    return url_for('ui.uploads_metrics', _external=external, **kwargs)
+
+
+def _export_url(external=True, **kwargs):
+    return url_for('ui.uploads_metrics_export', _external=external, **kwargs)
+
+
+def _post_upload(client, faker, data):
+    file = faker.xlsx(headers=UploadColumnDefinition().column_names, data=data)
+
+    resp = client.post(
+        url_for('ui.uploads_upload'),
+        data={'sample_file': (file.get_iostream(), file.filename)},
+    )
+    assert__refresh_response(resp)
+
+    return db.session.execute(select(Upload)).scalar()
+
+
+def test__get__requires_login(client, faker):
+    upload = faker.upload().get(save=True)
+    assert__requires_login(client, _url(id=upload.id, external=False))
+
+
+def test__get__requires_uploader_login__not(client, faker, loggedin_user):
+    upload = faker.upload().get(save=True)
+    assert__requires_role(client, _url(id=upload.id, external=False))
+
+
+def test__export__requires_uploader_login__not(client, loggedin_user):
+    assert__requires_role(client, _export_url(external=False))
+
+
+@pytest.mark.xdist_group(name="spreadsheets")
+def test__upload__records_stage_metrics(client, app, faker, loggedin_user_uploader, standard_lookups, monkeypatch):
+    monkeypatch.setitem(app.config, 'UPLOAD_IMPORT_CHUNK_SIZE', 2)
+
+    data = faker.bacteria_spreadsheet_data(rows=3)
+    upload = _post_upload(client, faker, data)
+
+    actual = db.session.execute(
+        select(UploadStageMetric.stage, UploadStageMetric.chunk_number, UploadStageMetric.row_count)
+        .where(UploadStageMetric.upload_id == upload.id)
+        .order_by(UploadStageMetric.id)
+    ).tuples().all()
+
+    assert ('parse', None, 3) in actual
+    assert ('translate', None, 3) in actual
+    assert ('save', 1, 2) in actual
+    assert ('save', 2, 1) in actual
+    assert ('commit', 2, 1) in actual
+
+    validate_database = db.session.execute(
+        select(UploadStageMetric).where(UploadStageMetric.upload_id == upload.id).where(UploadStageMetric.stage == 'validate database')
+    ).scalars().first()
+    assert validate_database.query_count > 0
+    assert validate_database.duration >= 0
+
+
+@pytest.mark.xdist_group(name="spreadsheets")
+def test__get__shows_metrics(client, faker, loggedin_user_uploader, standard_lookups):
+    upload = _post_upload(client, faker, faker.bacteria_spreadsheet_data(rows=2))
+
+    resp = phage_catalogue_get(client, _url(id=upload.id), loggedin_user_uploader)
+
+    stages = [tr.find('td').get_text(strip=True) for tr in resp.soup.select('#metrics tbody tr')]
+    assert 'parse' in stages
+    assert 'save' in stages
+
+
+@pytest.mark.xdist_group(name="spreadsheets")
+def test__export(client, faker, loggedin_user_uploader, standard_lookups):
+    upload = _post_upload(client, faker, faker.bacteria_spreadsheet_data(rows=2))
+
+    resp = client.get(_export_url(id=upload.id))
+
+    assert resp.status_code == 200
+    assert resp.mimetype == 'text/csv'
+
+    rows = list(csv.DictReader(StringIO(resp.get_data(as_text=True))))
+    assert len(rows) == db.session.execute(select(func.count(UploadStageMetric.id))).scalar()
+    assert {r['filename'] for r in rows} == {upload.filename}
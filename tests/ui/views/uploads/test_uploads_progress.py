@@ -0,0 +1,83 @@
+from flask import url_for
+from lbrc_flask.pytest.asserts import assert__requires_login, assert__requires_role
+from phage_catalogue.model.upload_progress import UploadProgress
+from phage_catalogue.model.uploads import Upload
+
+
+def _url(external=True, **kwargs):
+    return url_for('ui.uploads_progress', _external=external, **kwargs)
+
+
+def test__get__requires_login(client, faker):
+    upload = faker.upload().get(save=True)
+    assert__requires_login(client, _url(id=upload.id, external=False))
+
+
+def test__get__requires_uploader_login__not(client, faker, loggedin_user):
+    upload = faker.upload().get(save=True)
+    assert__requires_role(client, _url(id=upload.id, external=False))
+
+
+def test__get__no_progress__keeps_polling(client, faker, loggedin_user_uploader):
+    upload = faker.upload().get(save=True, status=Upload.STATUS__AWAITING_PROCESSING)
+
+    resp = client.get(_url(id=upload.id))
+
+    assert resp.status_code == 200
+    assert 'every 2s' in resp.get_data(as_text=True)
+
+
+def test__get__importing(client, faker, loggedin_user_uploader):
+    upload = faker.upload().get(save=True, status=Upload.STATUS__AWAITING_PROCESSING)
+
+    progress = UploadProgress(upload.id)
+    progress.update(stage=UploadProgress.STAGE__VALIDATING, rows_total=10)
+    progress.add(rows_validated=10)
+    progress.update(stage=UploadProgress.STAGE__IMPORTING)
+    progress.add(rows_saved=4)
+    progress.add(rows_saved=3)
+
+    actual = progress.read()
+    assert actual['stage'] == UploadProgress.STAGE__IMPORTING
+    assert actual['rows_total'] == 10
+    assert actual['rows_validated'] == 10
+    assert actual['rows_saved'] == 7
+    assert not actual['is_final']
+
+    resp = client.get(_url(id=upload.id))
+
+    text = ' '.join(resp.get_data(as_text=True).split())
+    assert 'Importing 7 of 10 rows' in text
+    assert 'every 2s' in text
+
+
+def test__get__processed__stops_polling(client, faker, loggedin_user_uploader):
+    upload = faker.upload().get(save=True, status=Upload.STATUS__PROCESSED)
+
+    resp = client.get(_url(id=upload.id))
+
+    text = resp.get_data(as_text=True)
+    assert UploadProgress.STAGE__PROCESSED in text
+    assert 'every 2s' not in text
+
+
+def test__get__error__stops_polling(client, faker, loggedin_user_uploader):
+    upload = faker.upload().get(save=True, status=Upload.STATUS__ERROR)
+
+    resp = client.get(_url(id=upload.id))
+
+    text = resp.get_data(as_text=True)
+    assert UploadProgress.STAGE__ERROR in text
+    assert 'every 2s' not in text
+
+
+def test__progress__deleted__later_counts_dropped(client, faker):
+    upload = faker.upload().get(save=True, status=Upload.STATUS__AWAITING_PROCESSING)
+
+    progress = UploadProgress(upload.id)
+    progress.update(stage=UploadProgress.STAGE__IMPORTING, rows_total=10)
+    progress.delete()
+    progress.add(rows_saved=5)
+
+    assert progress.read() is None
+    assert not progress.filepath.exists()
@@ -1,15 +1,21 @@
 import copy
-from io import BytesIO
+import csv
+from io import BytesIO, StringIO
 from pprint import pp
 from random import choice
 import pytest
 from flask import url_for
+from openpyxl import Workbook
 from lbrc_flask.pytest.asserts import assert__requires_login, assert__input_file, assert__refresh_response, assert__requires_role
 from lbrc_flask.database import db
 from lbrc_flask.python_helpers import dictlist_remove_key
 from sqlalchemy import func, select
 from phage_catalogue.model.specimens import BacterialSpecies, BoxNumber, Medium, PhageIdentifier, Plasmid, Project, ResistanceMarker, Specimen, StaffMember, StorageMethod, Strain
-from phage_catalogue.model.uploads import UploadColumnDefinition, Upload
+from phage_catalogue.model.upload_progress import UploadProgress
+from phage_catalogue.model.uploads import UploadChunk, UploadColumnDefinition, Upload, UploadStageMetric
+from phage_catalogue.services import uploads as uploads_service
+from phage_catalogue.services.specimens import specimen_bacteria_save
+from phage_catalogue.services.uploads import upload_process
 from tests import convert_specimens_to_spreadsheet_data
 from tests.requests import phage_catalogue_modal_get
 
@@ -49,10 +55,11 @@ def _post_upload_file(client, expected_status, expected_errors, expected_specime
     out = db.session.execute(select(Upload)).scalar()
     assert out.filename == file.filename
     if expected_errors:
-        assert expected_errors in out.errors
+        assert expected_errors in "\n".join(out.error_messages)
     else:
-        print(out.errors)
-        assert len(out.errors) == 0
+        print(out.error_messages)
+        assert len(out.error_messages) == 0
+        assert out.error_count == 0
     assert out.status == expected_status
     assert db.session.execute(select(func.count(Specimen.id))).scalar() == expected_specimens
 
@@ -70,6 +77,62 @@ def test__get__has_form(client, loggedin_user_uploader):
     _get(client, _url(external=False), loggedin_user_uploader, has_form=True)
 
 
+def _delimited_file(headers, data, delimiter):
+    result = StringIO()
+
+    writer = csv.writer(result, delimiter=delimiter)
+    writer.writerow(headers)
+    for row in data:
+        writer.writerow(['' if row.get(h) is None else row.get(h) for h in headers])
+
+    return result.getvalue().encode('utf8')
+
+
+@pytest.mark.parametrize(
+    "extension, delimiter", [("csv", ","), ("tsv", "\t")],
+)
+def test__post__valid_delimited_file__insert(client, faker, loggedin_user_uploader, standard_lookups, extension, delimiter):
+    data = faker.specimen_spreadsheet_data()
+    file = _delimited_file(UploadColumnDefinition().column_names, data, delimiter)
+
+    resp = _post(client, _url(external=False), file, f"specimens.{extension}")
+    assert__refresh_response(resp)
+
+    out = db.session.execute(select(Upload)).scalar()
+    assert out.error_messages == []
+    assert out.status == Upload.STATUS__PROCESSED
+
+    actual = dictlist_remove_key(convert_specimens_to_spreadsheet_data(db.session.execute(select(Specimen)).scalars()), 'key')
+    expected = dictlist_remove_key(data, 'key')
+    assert expected == actual
+
+
+def test__post__cp1252_csv__rejected(client, faker, loggedin_user_uploader, standard_lookups):
+    data = faker.specimen_spreadsheet_data(rows=1)
+    data[0]['notes'] = 'Stored at -80°C'
+
+    file = _delimited_file(UploadColumnDefinition().column_names, data, ',').decode('utf8').encode('cp1252')
+
+    resp = _post(client, _url(external=False), file, 'specimens.csv')
+
+    assert resp.status_code == 200
+    assert 'HX-Refresh' not in resp.headers
+    assert 'The file is not saved as UTF-8' in resp.text
+    assert db.session.execute(select(func.count(Upload.id))).scalar() == 0
+
+
+def test__post__invalid_delimited_file__errors(client, faker, loggedin_user_uploader, standard_lookups):
+    data = faker.bacteria_spreadsheet_data(rows=2)
+    data[1]['freezer'] = 'Not a number'
+    file = _delimited_file(UploadColumnDefinition().column_names, data, ',')
+
+    _post(client, _url(external=False), file, "bacteria.csv")
+
+    out = db.session.execute(select(Upload)).scalar()
+    assert out.status == Upload.STATUS__ERROR
+    assert out.error_messages == ["Row 2: freezer: Invalid value"]
+
+
 @pytest.mark.parametrize(
     "data_source", ["bacteria", "phages", "specimens"],
 )
@@ -87,7 +150,7 @@ def test__post__valid_file__insert(client, faker, loggedin_user_uploader, standa
         client,
         faker,
         data,
-        expected_status=Upload.STATUS__AWAITING_PROCESSING,
+        expected_status=Upload.STATUS__PROCESSED,
         expected_errors="",
         expected_specimens=len(data),
         )
@@ -130,7 +193,7 @@ def test__post__valid_file__update(client, faker, loggedin_user_uploader, standa
         client,
         faker,
         data,
-        expected_status=Upload.STATUS__AWAITING_PROCESSING,
+        expected_status=Upload.STATUS__PROCESSED,
         expected_errors="",
         expected_specimens=len(data),
         )
@@ -181,7 +244,7 @@ def test__post__case_insenstive_column_names(client, faker, loggedin_user_upload
 
     _post_upload_file(
         client,
-        expected_status=Upload.STATUS__AWAITING_PROCESSING,
+        expected_status=Upload.STATUS__PROCESSED,
         expected_errors="",
         expected_specimens=len(data),
         file=file,
@@ -408,6 +471,86 @@ def test__post__phage__invalid_host(client, faker, loggedin_user_uploader, stand
     )
 
 
+@pytest.mark.xdist_group(name="spreadsheets")
+def test__post__same_file_after_adding_species__validated_from_cache(client, faker, loggedin_user_uploader, standard_lookups):
+    data = faker.bacteria_spreadsheet_data(rows=2)
+    data[0]['bacterial species'] = 'A New Species'
+
+    file = faker.xlsx(headers=UploadColumnDefinition().column_names, data=data)
+    contents = file.get_iostream()
+
+    _post(client, _url(external=False), contents, file.filename)
+
+    first = db.session.execute(select(Upload)).scalar()
+    assert first.status == Upload.STATUS__ERROR
+    assert "Row 1: Bacterial Species does not exist" in "\n".join(first.error_messages)
+
+    db.session.add(BacterialSpecies(name='A New Species'))
+    db.session.commit()
+
+    _post(client, _url(external=False), contents, file.filename)
+
+    second = db.session.execute(select(Upload).where(Upload.id != first.id)).scalar()
+    assert second.status == Upload.STATUS__PROCESSED
+    assert db.session.execute(select(func.count(Specimen.id))).scalar() == 2
+
+    stages = db.session.execute(select(UploadStageMetric.stage).where(UploadStageMetric.upload_id == second.id)).scalars().all()
+    assert 'read validation cache' in stages
+    assert 'parse' not in stages
+    assert 'validate columns' not in stages
+
+
+@pytest.mark.parametrize(
+    "invalid_column, invalid_value, expected_status", [
+        (None, None, Upload.STATUS__PROCESSED),
+        ('freezer', 'Not a number', Upload.STATUS__ERROR),
+    ],
+)
+@pytest.mark.xdist_group(name="spreadsheets")
+def test__post__no_database_errors__not_saved_in_cache(client, app, faker, loggedin_user_uploader, standard_lookups, invalid_column, invalid_value, expected_status):
+    data = faker.bacteria_spreadsheet_data(rows=2)
+
+    if invalid_column:
+        data[0][invalid_column] = invalid_value
+
+    file = faker.xlsx(headers=UploadColumnDefinition().column_names, data=data)
+
+    _post(client, _url(external=False), file.get_iostream(), file.filename)
+
+    out = db.session.execute(select(Upload)).scalar()
+    assert out.status == expected_status
+
+    stages = db.session.execute(select(UploadStageMetric.stage).where(UploadStageMetric.upload_id == out.id)).scalars().all()
+    assert 'save validation cache' not in stages
+    assert list((app.config['FILE_UPLOAD_DIRECTORY'] / 'validation_cache').glob('*/*.pickle')) == []
+
+
+@pytest.mark.parametrize(
+    "data_source, column_name, expected_name", [
+        ("bacteria", 'bacterial species', 'Bacterial Species'),
+        ("phages", 'host species', 'Host Species'),
+    ],
+)
+@pytest.mark.xdist_group(name="spreadsheets")
+def test__post__misspelt_species__suggests_nearest(client, faker, loggedin_user_uploader, standard_lookups, data_source, column_name, expected_name):
+    match data_source:
+        case 'bacteria':
+            data = faker.bacteria_spreadsheet_data(rows=1)
+        case 'phages':
+            data = faker.phage_spreadsheet_data(rows=1)
+
+    data[0][column_name] = 'Bacterum 3'
+
+    _post_upload_data(
+        client=client,
+        faker=faker,
+        data=data,
+        expected_status=Upload.STATUS__ERROR,
+        expected_errors=f"Row 1: {expected_name} does not exist (did you mean 'Bacterium 3'",
+        expected_specimens=0,
+    )
+
+
 @pytest.mark.xdist_group(name="spreadsheets")
 def test__post__new_lookup_values__bacterium(client, faker, loggedin_user_uploader):
     data = convert_specimens_to_spreadsheet_data([faker.bacterium().get(
@@ -420,7 +563,7 @@ def test__post__new_lookup_values__bacterium(client, faker, loggedin_user_upload
         client,
         faker,
         data,
-        expected_status=Upload.STATUS__AWAITING_PROCESSING,
+        expected_status=Upload.STATUS__PROCESSED,
         expected_errors="",
         expected_specimens=1,
         )
@@ -450,7 +593,7 @@ def test__post__new_lookup_values__phage(client, faker, loggedin_user_uploader):
         client,
         faker,
         data,
-        expected_status=Upload.STATUS__AWAITING_PROCESSING,
+        expected_status=Upload.STATUS__PROCESSED,
         expected_errors="",
         expected_specimens=1,
         )
@@ -463,3 +606,320 @@ def test__post__new_lookup_values__phage(client, faker, loggedin_user_uploader):
     assert db.session.execute(select(func.count(StorageMethod.id)).where(StorageMethod.name == expected['storage method'])).scalar() == 1
     assert db.session.execute(select(func.count(StaffMember.id)).where(StaffMember.name == expected['staff member'])).scalar() == 1
     assert db.session.execute(select(func.count(BoxNumber.id)).where(BoxNumber.name == expected['box_number'])).scalar() == 1
+
+
+@pytest.mark.xdist_group(name="spreadsheets")
+def test__post__lookup_names_differing_by_case_and_whitespace__reuses_existing(client, faker, loggedin_user_uploader, standard_lookups):
+    data = faker.bacteria_spreadsheet_data(rows=1)
+    data[0]['bacterial species'] = f"  {standard_lookups['bacterial_species'][0].name.upper()} "
+    data[0]['strain'] = standard_lookups['strain'][0].name.lower().replace(' ', '   ')
+
+    _post_upload_data(
+        client,
+        faker,
+        data,
+        expected_status=Upload.STATUS__PROCESSED,
+        expected_errors="",
+        expected_specimens=1,
+        )
+
+    assert db.session.execute(select(func.count(Strain.id))).scalar() == len(standard_lookups['strain'])
+
+    actual = db.session.execute(select(Specimen)).scalar()
+    assert actual.species == standard_lookups['bacterial_species'][0]
+    assert actual.strain == standard_lookups['strain'][0]
+
+
+@pytest.mark.xdist_group(name="spreadsheets")
+def test__post__error_budget_spent__stops_validation(client, app, faker, loggedin_user_uploader, standard_lookups, monkeypatch):
+    monkeypatch.setitem(app.config, 'UPLOAD_VALIDATION_MAX_ERRORS', 2)
+    monkeypatch.setitem(app.config, 'UPLOAD_VALIDATION_CHUNK_SIZE', 2)
+
+    data = faker.bacteria_spreadsheet_data(rows=10)
+    for row in data:
+        row['freezer'] = faker.pystr()
+        row['key'] = 673
+
+    file = faker.xlsx(headers=UploadColumnDefinition().column_names, data=data)
+    resp = _post(client, _url(external=False), file.get_iostream(), file.filename)
+    assert__refresh_response(resp)
+
+    out = db.session.execute(select(Upload)).scalar()
+    assert out.status == Upload.STATUS__ERROR
+    assert out.error_messages == ["Row 1: freezer: Invalid value", "Row 2: freezer: Invalid value"]
+    assert out.error_count == 10
+    assert out.error_count_is_estimate
+
+
+@pytest.mark.xdist_group(name="spreadsheets")
+def test__post__validated_in_parallel__errors(client, app, faker, loggedin_user_uploader, standard_lookups, monkeypatch):
+    monkeypatch.setitem(app.config, 'UPLOAD_VALIDATION_PROCESSES', 2)
+    monkeypatch.setitem(app.config, 'UPLOAD_VALIDATION_CHUNK_SIZE', 2)
+
+    data = faker.bacteria_spreadsheet_data(rows=5)
+    data[3]['freezer'] = faker.pystr()
+
+    _post_upload_data(
+        client,
+        faker,
+        data,
+        expected_status=Upload.STATUS__ERROR,
+        expected_errors="Row 4: freezer: Invalid value",
+        expected_specimens=0,
+        )
+
+
+@pytest.mark.xdist_group(name="spreadsheets")
+def test__post__valid_file__imported_in_chunks(client, app, faker, loggedin_user_uploader, standard_lookups, monkeypatch):
+    monkeypatch.setitem(app.config, 'UPLOAD_IMPORT_CHUNK_SIZE', 2)
+
+    data = faker.specimen_spreadsheet_data(rows=5)
+    for row in data:
+        row['project'] = 'A New Project'
+
+    _post_upload_data(
+        client,
+        faker,
+        data,
+        expected_status=Upload.STATUS__PROCESSED,
+        expected_errors="",
+        expected_specimens=len(data),
+        )
+
+    assert db.session.execute(select(func.count(Project.id)).where(Project.name == 'A New Project')).scalar() == 1
+    assert list(app.config['FILE_UPLOAD_DIRECTORY'].glob('*.pickle')) == []
+
+    assert UploadProgress(db.session.execute(select(Upload.id)).scalar()).read() is None
+    assert list(app.config['FILE_UPLOAD_DIRECTORY'].glob('*_progress.jsonl')) == []
+
+
+@pytest.mark.slow
+@pytest.mark.xdist_group(name="spreadsheets")
+def test__post__large_file__insert(client, faker, loggedin_user_uploader, standard_lookups):
+    data = faker.bacteria_spreadsheet_data(rows=5000)
+
+    _post_upload_data(
+        client,
+        faker,
+        data,
+        expected_status=Upload.STATUS__PROCESSED,
+        expected_errors="",
+        expected_specimens=len(data),
+        )
+
+
+@pytest.mark.xdist_group(name="spreadsheets")
+def test__post__import_interrupted__resumes_from_incomplete_chunk(client, app, faker, loggedin_user_uploader, standard_lookups, monkeypatch):
+    monkeypatch.setitem(app.config, 'UPLOAD_IMPORT_CHUNK_SIZE', 2)
+
+    # The chunks are queued, but the queue is lost after the
+    # first chunk has been saved
+    upload_import = uploads_service.upload_import
+    monkeypatch.setattr(uploads_service, 'upload_import', lambda upload_id: None)
+
+    data = faker.bacteria_spreadsheet_data(rows=4)
+    file = faker.xlsx(headers=UploadColumnDefinition().column_names, data=data)
+
+    _post(client, _url(external=False), file.get_iostream(), file.filename)
+
+    upload_id = db.session.execute(select(Upload.id)).scalar()
+    uploads_service.upload_import_chunk(upload_id, 1)
+
+    assert db.session.execute(select(func.count(Specimen.id))).scalar() == 2
+    assert [c.is_completed for c in db.session.execute(select(UploadChunk).order_by(UploadChunk.number)).scalars()] == [True, False]
+
+    monkeypatch.setattr(uploads_service, 'upload_import', upload_import)
+
+    upload_process(upload_id)
+
+    out = db.session.get(Upload, upload_id)
+    assert out.status == Upload.STATUS__PROCESSED
+    assert db.session.execute(select(func.count(Specimen.id))).scalar() == 4
+    assert [c.is_completed for c in db.session.execute(select(UploadChunk).order_by(UploadChunk.number)).scalars()] == [True, True]
+
+
+@pytest.mark.xdist_group(name="spreadsheets")
+def test__post__chunk_fails__upload_error(client, app, faker, loggedin_user_uploader, standard_lookups, monkeypatch):
+    monkeypatch.setitem(app.config, 'UPLOAD_IMPORT_CHUNK_SIZE', 2)
+
+    saved_chunks = []
+
+    def failing_save(data):
+        if saved_chunks:
+            raise RuntimeError('Chunk failed')
+        saved_chunks.append(data)
+        specimen_bacteria_save(data)
+
+    monkeypatch.setattr(uploads_service, 'specimen_bacteria_save', failing_save)
+
+    data = faker.bacteria_spreadsheet_data(rows=4)
+    file = faker.xlsx(headers=UploadColumnDefinition().column_names, data=data)
+
+    resp = _post(client, _url(external=False), file.get_iostream(), file.filename)
+    assert__refresh_response(resp)
+
+    out = db.session.execute(select(Upload)).scalar()
+    assert out.status == Upload.STATUS__ERROR
+    assert out.error_messages == ["The import failed after 2 of 4 rows had been saved"]
+    assert db.session.execute(select(func.count(Specimen.id))).scalar() == 2
+    assert list(app.config['FILE_UPLOAD_DIRECTORY'].glob('*.pickle')) == []
+    assert UploadProgress(out.id).read() is None
+
+
+@pytest.mark.xdist_group(name="spreadsheets")
+def test__post__unreadable_file__upload_error(client, app, faker, loggedin_user_uploader, standard_lookups):
+    resp = _post(client, _url(external=False), b'Not a spreadsheet', 'corrupt.xlsx')
+    assert__refresh_response(resp)
+
+    out = db.session.execute(select(Upload)).scalar()
+    assert out.status == Upload.STATUS__ERROR
+    assert out.error_messages[0].startswith("The file could not be processed")
+    assert UploadProgress(out.id).read() is None
+
+
+@pytest.mark.xdist_group(name="spreadsheets")
+def test__post__valid_file__stored_by_content(client, app, faker, loggedin_user_uploader, standard_lookups):
+    data = faker.bacteria_spreadsheet_data(rows=2)
+    file = faker.xlsx(headers=UploadColumnDefinition().column_names, data=data)
+    contents = file.get_iostream()
+
+    _post(client, _url(external=False), contents, file.filename)
+    _post(client, _url(external=False), contents, file.filename)
+
+    uploads = db.session.execute(select(Upload).order_by(Upload.id)).scalars().all()
+    assert [u.status for u in uploads] == [Upload.STATUS__PROCESSED, Upload.STATUS__PROCESSED]
+    assert uploads[0].content_hash == uploads[1].content_hash
+
+    h = uploads[0].content_hash
+    stored = list((app.config['FILE_UPLOAD_DIRECTORY'] / 'store').glob('*/*/*.xlsx'))
+    assert stored == [app.config['FILE_UPLOAD_DIRECTORY'] / 'store' / h[:2] / h[2:4] / f"{h}.xlsx"]
+    assert list(app.config['FILE_UPLOAD_DIRECTORY'].glob('*.xlsx')) == []
+
+
+@pytest.mark.xdist_group(name="spreadsheets")
+def test__post__valid_file__compressed(client, app, faker, loggedin_user_uploader, standard_lookups, monkeypatch):
+    monkeypatch.setitem(app.config, 'UPLOAD_STORE_COMPRESS', True)
+
+    data = faker.bacteria_spreadsheet_data(rows=2)
+
+    _post_upload_data(
+        client,
+        faker,
+        data,
+        expected_status=Upload.STATUS__PROCESSED,
+        expected_errors="",
+        expected_specimens=len(data),
+        )
+
+    assert len(list((app.config['FILE_UPLOAD_DIRECTORY'] / 'store').glob('*/*/*.xlsx.gz'))) == 1
+
+
+def _workbook_file(sheets):
+    workbook = Workbook()
+    workbook.remove(workbook.active)
+
+    instructions = workbook.create_sheet('Instructions')
+    instructions.append(['Enter one freezer on each sheet'])
+
+    headers = UploadColumnDefinition().column_names
+
+    for name, data in sheets.items():
+        sheet = workbook.create_sheet(name)
+        sheet.append(headers)
+        for row in data:
+            sheet.append([row.get(h) for h in headers])
+
+    result = BytesIO()
+    workbook.save(result)
+
+    return result.getvalue()
+
+
+@pytest.mark.xdist_group(name="spreadsheets")
+def test__post__multiple_sheets__all_imported(client, faker, loggedin_user_uploader, standard_lookups):
+    sheets = {
+        'Freezer 1': faker.bacteria_spreadsheet_data(rows=3),
+        'Freezer 2': faker.phage_spreadsheet_data(rows=2),
+    }
+
+    resp = _post(client, _url(external=False), _workbook_file(sheets), 'freezers.xlsx')
+    assert__refresh_response(resp)
+
+    out = db.session.execute(select(Upload)).scalar()
+    assert out.error_messages == []
+    assert out.status == Upload.STATUS__PROCESSED
+
+    actual = dictlist_remove_key(convert_specimens_to_spreadsheet_data(db.session.execute(select(Specimen).order_by(Specimen.id)).scalars()), 'key')
+    expected = dictlist_remove_key([*sheets['Freezer 1'], *sheets['Freezer 2']], 'key')
+    assert expected == actual
+
+
+@pytest.mark.xdist_group(name="spreadsheets")
+def test__post__one_sheet_after_instructions__imported(client, faker, loggedin_user_uploader, standard_lookups):
+    sheets = {'Freezer 1': faker.bacteria_spreadsheet_data(rows=3)}
+    sheets['Freezer 1'][1]['freezer'] = 'Not a number'
+
+    _post(client, _url(external=False), _workbook_file(sheets), 'freezers.xlsx')
+
+    out = db.session.execute(select(Upload)).scalar()
+    assert out.status == Upload.STATUS__ERROR
+    assert out.error_messages == ["Row 2: freezer: Invalid value"]
+
+
+@pytest.mark.xdist_group(name="spreadsheets")
+def test__post__multiple_sheets__errors_reported_by_sheet(client, faker, loggedin_user_uploader, standard_lookups):
+    sheets = {
+        'Freezer 1': faker.bacteria_spreadsheet_data(rows=3),
+        'Freezer 2': faker.bacteria_spreadsheet_data(rows=3),
+    }
+    sheets['Freezer 2'][1]['freezer'] = 'Not a number'
+
+    _post(client, _url(external=False), _workbook_file(sheets), 'freezers.xlsx')
+
+    out = db.session.execute(select(Upload)).scalar()
+    assert out.status == Upload.STATUS__ERROR
+    assert out.error_messages == ["Freezer 2: Row 2: freezer: Invalid value"]
+    assert db.session.execute(select(func.count(Specimen.id))).scalar() == 0
+
+
+@pytest.mark.xdist_group(name="spreadsheets")
+def test__post__phage_sheet_then_bacteria_sheet__errors_reported_by_sheet(client, faker, loggedin_user_uploader, standard_lookups):
+    sheets = {
+        'Phages': faker.phage_spreadsheet_data(rows=3),
+        'Bacteria': faker.bacteria_spreadsheet_data(rows=3),
+    }
+    sheets['Phages'][2]['freezer'] = 'Not a number'
+    sheets['Bacteria'][1]['freezer'] = 'Not a number'
+
+    _post(client, _url(external=False), _workbook_file(sheets), 'freezers.xlsx')
+
+    out = db.session.execute(select(Upload)).scalar()
+    assert out.status == Upload.STATUS__ERROR
+    assert sorted(out.error_messages) == [
+        "Bacteria: Row 2: freezer: Invalid value",
+        "Phages: Row 3: freezer: Invalid value",
+    ]
+
+
+@pytest.mark.xdist_group(name="spreadsheets")
+def test__post__sheet_of_mixed_types__errors_reported_by_sheet(client, faker, loggedin_user_uploader, standard_lookups):
+    sheets = {
+        'Bacteria': faker.bacteria_spreadsheet_data(rows=2),
+        'Mixed': [
+            *faker.phage_spreadsheet_data(rows=1),
+            *faker.bacteria_spreadsheet_data(rows=1),
+            *faker.phage_spreadsheet_data(rows=1),
+            *faker.bacteria_spreadsheet_data(rows=1),
+        ],
+    }
+    sheets['Mixed'][3]['freezer'] = 'Not a number'
+    sheets['Mixed'][2]['host species'] = 'A New Species'
+
+    _post(client, _url(external=False), _workbook_file(sheets), 'freezers.xlsx')
+
+    out = db.session.execute(select(Upload)).scalar()
+    assert out.status == Upload.STATUS__ERROR
+
+    freezer_error, species_error = out.error_messages
+    assert freezer_error == "Mixed: Row 4: freezer: Invalid value"
+    assert species_error.startswith("Mixed: Row 3: Host Species does not exist")